@@ -9,6 +9,7 @@ from .serializers import (
     UserProfileSerializer
 )
 from .models import EmailVerificationToken, PasswordResetToken, PendingRegistration
+from auctions.dashboard_stats import user_stats
 from .utils import (
     generate_verification_token,
     send_verification_email,
@@ -272,25 +273,15 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        total_users = User.objects.count()
-        buyers = User.objects.filter(user_type='buyer').count()
-        sellers = User.objects.filter(user_type='seller').count()
-        admins = User.objects.filter(user_type='admin').count()
-        verified = User.objects.filter(is_verified=True).count()
-        
-        # Get users registered in last 30 days
-        from django.utils import timezone
-        from datetime import timedelta
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        new_users = User.objects.filter(date_joined__gte=thirty_days_ago, is_superuser=False).count()
-        
+        stats = user_stats()
+
         return Response({
-            'total_users': total_users,
-            'buyers': buyers,
-            'sellers': sellers,
-            'admins': admins,
-            'verified': verified,
-            'new_users_last_30_days': new_users,
+            'total_users': stats['total'],
+            'buyers': stats['buyer'],
+            'sellers': stats['seller'],
+            'admins': stats['admin'],
+            'verified': stats['verified'],
+            'new_users_last_30_days': stats['new_last_30_days'],
         })
 
     @action(detail=True, methods=['delete'], permission_classes=[IsAuthenticated])
@@ -7,6 +7,10 @@ from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from decimal import Decimal
 from auctions.models import Auction, Payment, Bid, Participation, Round, Order, OrderItem
+from auctions.leaderboard import evict_auction
+from auctions.round_cache import invalidate_active_round
+from auctions.counters import recompute_counters
+from auctions import dashboard_stats
 from collections import OrderedDict
 
 
@@ -39,52 +43,40 @@ class DashboardHomeView(AdminRequiredMixin, TemplateView):
         # Get ALL orders (platform-wide)
         all_orders = Order.objects.all()
 
-        # Calculate auction revenue
-        auction_revenue = Payment.objects.filter(
-            payment_type='participation',
-            status='completed'
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        # Calculate order revenue
-        order_revenue = all_orders.filter(
-            payment_status='completed'
-        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
+        # Status breakdowns: one aggregate query per table, cached briefly
+        auction_stats = dashboard_stats.auction_stats()
+        order_stats = dashboard_stats.order_stats()
 
         # Calculate statistics
         context['stats'] = {
             # Auction stats
-            'total_auctions': all_auctions.count(),
-            'active_auctions': all_auctions.filter(status='active').count(),
-            'draft_auctions': all_auctions.filter(status='draft').count(),
-            'closed_auctions': all_auctions.filter(status='closed').count(),
+            'total_auctions': auction_stats['total'],
+            'active_auctions': auction_stats['active'],
+            'draft_auctions': auction_stats['draft'],
+            'closed_auctions': auction_stats['closed'],
 
             # Revenue from auctions
-            'auction_revenue': auction_revenue,
+            'auction_revenue': auction_stats['revenue'],
 
-            'pending_revenue': Payment.objects.filter(
-                payment_type='final_pledge',
-                status='pending'
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00'),
+            'pending_revenue': auction_stats['pending_revenue'],
 
             # Order stats
-            'total_orders': all_orders.count(),
-            'pending_orders': all_orders.filter(status='pending').count(),
-            'processing_orders': all_orders.filter(status='processing').count(),
-            'shipped_orders': all_orders.filter(status='shipped').count(),
-            'delivered_orders': all_orders.filter(status='delivered').count(),
+            'total_orders': order_stats['total'],
+            'pending_orders': order_stats['pending'],
+            'processing_orders': order_stats['processing'],
+            'shipped_orders': order_stats['shipped'],
+            'delivered_orders': order_stats['delivered'],
 
             # Revenue from orders
-            'order_revenue': order_revenue,
+            'order_revenue': order_stats['paid_revenue'],
 
             # Combined total revenue
-            'total_revenue': auction_revenue + order_revenue,
+            'total_revenue': auction_stats['revenue'] + order_stats['paid_revenue'],
 
             # Participation statistics
-            'total_participants': all_auctions.aggregate(
-                total=Count('participations__user', distinct=True)
-            )['total'] or 0,
+            'total_participants': auction_stats['participants'] or 0,
 
-            'total_bids': Bid.objects.filter(is_valid=True).count(),
+            'total_bids': auction_stats['bids'],
         }
 
         # Get recent auctions
@@ -456,6 +448,11 @@ class CreateRoundView(AdminRequiredMixin, View):
             # Invalidate all previous bids
             Bid.objects.filter(auction=auction).update(is_valid=False)
 
+            # Bulk updates skip signals, so drop cached leaderboards explicitly
+            evict_auction(auction.id)
+            invalidate_active_round(auction.id)
+            recompute_counters(auction_id=auction.id)
+
             # Create new round
             new_round = Round.objects.create(
                 auction=auction,
@@ -0,0 +1,170 @@
+"""
+Bid placement service.
+
+place_bid validates a pledge against the cached active round and
+participation entitlement (auctions/round_cache.py), then writes it with
+a single INSERT ... ON CONFLICT statement against the partial unique
+index unique_valid_bid_per_user_round (one valid bid per user per round).
+The conflicting row is locked by the upsert itself, so concurrent bids
+from the same user update one row instead of creating duplicates, and
+the statement re-checks participation and that the round is still active.
+"""
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import status
+
+from . import counters, leaderboard, round_cache
+from .broadcast import schedule_leaderboard_broadcast
+from .standings import record_pledge
+from .models import Auction, Bid, Participation, Round
+
+
+class BidRejected(Exception):
+    """A bid that cannot be placed, with the HTTP status to answer with"""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+_UPSERT_SQL = """
+INSERT INTO {bid} (id, user_id, auction_id, round_id, pledge_amount, is_valid, submitted_at)
+SELECT %s, %s, %s, %s, %s, %s, %s
+WHERE EXISTS (
+    SELECT 1 FROM {participation}
+    WHERE user_id = %s AND round_id = %s AND payment_status = 'completed'
+) AND EXISTS (
+    SELECT 1 FROM {round} WHERE id = %s AND is_active = %s
+)
+ON CONFLICT (user_id, round_id) WHERE "is_valid"
+DO UPDATE SET pledge_amount = excluded.pledge_amount, submitted_at = excluded.submitted_at
+RETURNING id
+"""
+
+
+def _db_value(model, field_name, value):
+    return model._meta.get_field(field_name).get_db_prep_save(value, connection)
+
+
+def get_bidding_round(auction_id):
+    """
+    Active round for an auction, with its auction loaded (cached, see
+    auctions/round_cache.py). Raises BidRejected if bidding is closed.
+    """
+    try:
+        current_round = round_cache.get_active_round(auction_id)
+    except (ValidationError, ValueError):
+        raise BidRejected('Auction not found', status.HTTP_404_NOT_FOUND)
+
+    if current_round is None:
+        auction_status = Auction.objects.filter(id=auction_id).values_list('status', flat=True).first()
+        if auction_status is None:
+            raise BidRejected('Auction not found', status.HTTP_404_NOT_FOUND)
+        if auction_status != 'active':
+            raise BidRejected('Auction is not active')
+        raise BidRejected('No active round for this auction')
+
+    if current_round.auction.status != 'active':
+        raise BidRejected('Auction is not active')
+
+    return current_round
+
+
+def validate_pledge(current_round, pledge_amount):
+    """Parse and range-check a pledge against the round's pricing window"""
+    try:
+        amount = Decimal(str(pledge_amount)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        raise BidRejected('Invalid pledge amount')
+
+    if current_round.min_pledge is not None and amount < current_round.min_pledge:
+        raise BidRejected(f'Minimum pledge is {current_round.min_pledge}')
+    if current_round.max_pledge is not None and amount > current_round.max_pledge:
+        raise BidRejected(f'Maximum pledge is {current_round.max_pledge}')
+    if amount < current_round.base_price:
+        raise BidRejected(f'Pledge amount must be at least KES {current_round.base_price}')
+
+    return amount
+
+
+def upsert_bid(user, current_round, amount):
+    """
+    Insert the user's bid for the round, or update their existing valid bid.
+    Returns (bid, created); bid is None if the user has no paid participation
+    or the round closed in the meantime.
+    """
+    new_id = uuid.uuid4()
+    submitted_at = timezone.now()
+
+    sql = _UPSERT_SQL.format(
+        bid=connection.ops.quote_name(Bid._meta.db_table),
+        participation=connection.ops.quote_name(Participation._meta.db_table),
+        round=connection.ops.quote_name(Round._meta.db_table),
+    )
+    round_id = _db_value(Bid, 'round', current_round.id)
+    params = [
+        _db_value(Bid, 'id', new_id),
+        user.pk,
+        _db_value(Bid, 'auction', current_round.auction_id),
+        round_id,
+        _db_value(Bid, 'pledge_amount', amount),
+        True,
+        _db_value(Bid, 'submitted_at', submitted_at),
+        user.pk,
+        round_id,
+        round_id,
+        True,
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    if row is None:
+        return None, False
+
+    bid = Bid(
+        id=Bid._meta.pk.to_python(row[0]),
+        user=user,
+        auction=current_round.auction,
+        round=current_round,
+        pledge_amount=amount,
+        is_valid=True,
+        submitted_at=submitted_at,
+    )
+    return bid, bid.id == new_id
+
+
+def place_bid(user, auction_id, pledge_amount):
+    """
+    Place or update the user's pledge in the auction's active round.
+    Returns (bid, created) or raises BidRejected.
+    """
+    current_round = get_bidding_round(auction_id)
+
+    if not round_cache.has_entitlement(user.pk, current_round.id):
+        raise BidRejected('You must pay the participation fee first', status.HTTP_403_FORBIDDEN)
+
+    amount = validate_pledge(current_round, pledge_amount)
+
+    with transaction.atomic():
+        bid, created = upsert_bid(user, current_round, amount)
+        if bid is not None:
+            # Cross-round standing, locked and updated in the same transaction
+            record_pledge(current_round.auction_id, user.pk, current_round.round_number, amount)
+            counters.record_bid_placed(current_round, amount, created)
+
+    if bid is None:
+        # Round closed (or participation revoked) between the read and the write
+        raise BidRejected('No active round for this auction')
+
+    # Raw upsert skips post_save, so apply the leaderboard update here
+    leaderboard.record_bid(bid, user)
+    schedule_leaderboard_broadcast(current_round, user.id)
+
+    return bid, created
@@ -0,0 +1,230 @@
+"""
+Coalesced leaderboard broadcasting.
+
+Accepted bids mark their auction's leaderboard as dirty instead of
+broadcasting straight away. Each worker process sends at most one
+'leaderboard_update' to an auction_<id> group per
+LEADERBOARD_BROADCAST_INTERVAL seconds, built when the tick fires so it
+always carries the latest state. Coalescing is per process: with N workers
+taking bids for the same auction a group can get up to N updates per
+interval (sequence numbers still come from the shared leaderboard store).
+Bids that land while a tick is pending are counted as suppressed; the
+sent / suppressed counters are logged at INFO at most once per
+LEADERBOARD_BROADCAST_STATS_INTERVAL seconds, and broadcaster.stats()
+returns them.
+
+Nothing here runs on the HTTP request path: bids hand their broadcast to
+an after-commit outbox (settings.LEADERBOARD_BROADCAST_QUEUE), whose
+worker builds and sends the update once the bid row is committed.
+- ThreadedBroadcastQueue: background worker thread (default)
+- InlineBroadcastQueue: sends on commit in the calling thread, uncoalesced (tests)
+"""
+import logging
+import queue
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connection, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .leaderboard import publish_leaderboard
+
+logger = logging.getLogger(__name__)
+
+
+def send_leaderboard_update(round_obj, bidder_ids=()):
+    """Publish the round's shared leaderboard and send it to the auction group"""
+    seq, shared_data, patch = publish_leaderboard(round_obj)
+
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        f'auction_{round_obj.auction_id}',
+        {
+            'type': 'leaderboard_update',
+            'data': shared_data,
+            'seq': seq,
+            'patch': patch,
+            'round_id': str(round_obj.id),
+            'bidder_ids': sorted(str(bidder_id) for bidder_id in bidder_ids),
+        }
+    )
+
+
+class LeaderboardBroadcaster:
+    """
+    Per-process scheduler holding one pending tick per auction.
+    An interval of 0 sends every update immediately (no coalescing).
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        self.sent = 0
+        self.suppressed = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_report = time.monotonic()
+
+    def get_interval(self):
+        if self.interval is not None:
+            return self.interval
+        return getattr(settings, 'LEADERBOARD_BROADCAST_INTERVAL', 0.15)
+
+    def schedule(self, round_obj, bidder_id=None):
+        """Request a leaderboard broadcast for the round's auction"""
+        bidder_ids = {bidder_id} if bidder_id is not None else set()
+        interval = self.get_interval()
+
+        if interval <= 0:
+            self.send_now(round_obj, bidder_ids)
+            return
+
+        auction_id = str(round_obj.auction_id)
+        with self._lock:
+            pending = self._pending.get(auction_id)
+            if pending is not None:
+                # A tick is already due - it will pick up this bid too
+                pending['round'] = round_obj
+                pending['bidder_ids'] |= bidder_ids
+                self.suppressed += 1
+                return
+            self._pending[auction_id] = {'round': round_obj, 'bidder_ids': bidder_ids}
+
+        timer = threading.Timer(interval, self.flush, args=[auction_id])
+        timer.daemon = True
+        timer.start()
+
+    def stats(self):
+        """This process's broadcast counters since start"""
+        with self._lock:
+            return {'sent': self.sent, 'suppressed': self.suppressed, 'pending': len(self._pending)}
+
+    def _count_sent(self):
+        """Count a send and periodically log the counters (INFO)"""
+        now = time.monotonic()
+        with self._lock:
+            self.sent += 1
+            report_every = getattr(settings, 'LEADERBOARD_BROADCAST_STATS_INTERVAL', 60)
+            report = now - self._last_report >= report_every
+            if report:
+                self._last_report = now
+            sent, suppressed = self.sent, self.suppressed
+        if report:
+            logger.info("Leaderboard broadcasts: sent=%s suppressed=%s", sent, suppressed)
+
+    def send_now(self, round_obj, bidder_ids=()):
+        """Send an update for the round's auction straight away (no coalescing)"""
+        send_leaderboard_update(round_obj, bidder_ids)
+        self._count_sent()
+
+    def flush(self, auction_id):
+        """Send the pending update for an auction (runs on the timer thread)"""
+        with self._lock:
+            pending = self._pending.pop(str(auction_id), None)
+        if pending is None:
+            return
+
+        try:
+            send_leaderboard_update(pending['round'], pending['bidder_ids'])
+            self._count_sent()
+        except Exception:
+            logger.exception("Leaderboard broadcast failed for auction %s", auction_id)
+        finally:
+            # Timer threads are short-lived; don't leak their DB connections
+            connection.close()
+
+
+broadcaster = LeaderboardBroadcaster()
+
+
+class InlineBroadcastQueue:
+    """
+    Sends each update immediately in the calling thread (tests / dev).
+    Never coalesces: no timer thread, whatever LEADERBOARD_BROADCAST_INTERVAL is
+    """
+
+    def put(self, round_obj, bidder_id=None):
+        broadcaster.send_now(round_obj, {bidder_id} if bidder_id is not None else ())
+
+
+class ThreadedBroadcastQueue:
+    """
+    In-process outbox drained by a single background worker thread, so the
+    bid request returns as soon as its row is committed
+    """
+
+    def __init__(self, maxsize=10000):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def put(self, round_obj, bidder_id=None):
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((round_obj, bidder_id))
+        except queue.Full:
+            # The next accepted bid re-broadcasts the latest state anyway
+            logger.error("Leaderboard broadcast queue full, dropping update for auction %s",
+                         round_obj.auction_id)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='leaderboard-broadcast', daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            round_obj, bidder_id = self._queue.get()
+            try:
+                broadcaster.schedule(round_obj, bidder_id)
+            except Exception:
+                logger.exception("Leaderboard broadcast job failed for auction %s",
+                                 round_obj.auction_id)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def join(self):
+        """Block until every queued job has run"""
+        self._queue.join()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_broadcast_queue():
+    """Return the configured outbox (settings.LEADERBOARD_BROADCAST_QUEUE)"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                backend = getattr(settings, 'LEADERBOARD_BROADCAST_QUEUE',
+                                  'auctions.broadcast.ThreadedBroadcastQueue')
+                _queue = import_string(backend)()
+    return _queue
+
+
+@receiver(setting_changed)
+def reset_broadcast_queue(setting, **kwargs):
+    """Pick up LEADERBOARD_BROADCAST_QUEUE overrides in tests"""
+    global _queue
+    if setting == 'LEADERBOARD_BROADCAST_QUEUE':
+        _queue = None
+
+
+def schedule_leaderboard_broadcast(round_obj, bidder_id=None):
+    """
+    Queue a coalesced leaderboard update for the round's auction once the
+    current transaction commits (immediately when not in one)
+    """
+    transaction.on_commit(lambda: get_broadcast_queue().put(round_obj, bidder_id))
@@ -0,0 +1,150 @@
+"""
+Cache-aside helpers on top of Django's cache (CACHES in config/settings.py).
+
+Keys are namespaced and versioned: every namespace ('categories',
+'banners', 'dashboard', ...) has a version counter in the cache, and
+invalidate(namespace) bumps it, so all of the namespace's entries are
+dropped at once without knowing their keys (old ones just expire).
+
+get_or_set() protects against stampedes: on a miss only the caller that
+wins a short-lived lock recomputes; the others wait briefly for its result
+instead of all hitting the database.
+
+The cache is best-effort: when it is unreachable (e.g. Redis down) reads
+miss, writes and invalidations are skipped and logged, and values are
+computed from the database, so model saves and requests keep working.
+
+    @cached('categories', timeout=300)
+    def category_tree():
+        ...
+
+    category_tree()               # computed once, then served from cache
+    invalidate('categories')      # e.g. from a post_save receiver
+"""
+import functools
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+UNAVAILABLE = object()
+
+
+def _best_effort(operation, default=None):
+    """Run a cache operation, logging and returning default if the cache fails"""
+    try:
+        return operation()
+    except Exception:
+        logger.warning('Cache unavailable, skipping operation', exc_info=True)
+        return default
+
+
+def cache_get(key, default=None):
+    return _best_effort(lambda: cache.get(key, default), default)
+
+
+def cache_set(key, value, timeout=None):
+    _best_effort(lambda: cache.set(key, value, _default_timeout() if timeout is None else timeout))
+
+
+def cache_delete(key):
+    _best_effort(lambda: cache.delete(key))
+
+
+def _default_timeout():
+    return getattr(settings, 'CACHE_DEFAULT_TIMEOUT', 300)
+
+
+def _version_key(namespace):
+    return f'ns:{namespace}:version'
+
+
+def _namespace_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, None)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+def namespace_version(namespace):
+    """Current version of a namespace (1 until first invalidated)"""
+    return _best_effort(lambda: _namespace_version(namespace), 1)
+
+
+def make_key(namespace, *parts):
+    """'<namespace>:v<version>:<part>:<part>...'"""
+    return ':'.join([namespace, f'v{namespace_version(namespace)}', *map(str, parts)])
+
+
+def _bump_version(namespace):
+    key = _version_key(namespace)
+    cache.add(key, 1, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr
+        cache.set(key, 2, None)
+
+
+def invalidate(namespace):
+    """Drop every entry of a namespace by bumping its version"""
+    _best_effort(lambda: _bump_version(namespace))
+
+
+def get_or_set(key, compute, timeout=None, lock_timeout=10, wait=0.05, max_wait=2.0):
+    """
+    The cached value for key, computing and storing it on a miss. Only one
+    caller recomputes a missing key; concurrent callers poll for up to
+    max_wait seconds and fall back to computing it themselves.
+    timeout may be a callable taking the computed value (per-entry expiry).
+    Without a working cache every call computes.
+    """
+    value = _best_effort(lambda: cache.get(key, MISSING), UNAVAILABLE)
+    if value is UNAVAILABLE:
+        # Cache unreachable: no lock to wait on
+        return compute()
+    if value is not MISSING:
+        return value
+
+    timeout = _default_timeout() if timeout is None else timeout
+    lock_key = f'{key}:lock'
+    if _best_effort(lambda: cache.add(lock_key, 1, lock_timeout), True):
+        try:
+            value = compute()
+            cache_set(key, value, timeout(value) if callable(timeout) else timeout)
+            return value
+        finally:
+            cache_delete(lock_key)
+
+    deadline = time.monotonic() + max_wait
+    while time.monotonic() < deadline:
+        time.sleep(wait)
+        value = cache_get(key, MISSING)
+        if value is not MISSING:
+            return value
+
+    return compute()
+
+
+def cached(namespace, timeout=None, key=None):
+    """
+    Decorator: cache a function's result in a namespace. The key is built
+    from the call arguments, or by key(*args, **kwargs) when given.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if key is not None:
+                parts = [key(*args, **kwargs)]
+            else:
+                parts = [func.__name__, *args, *(f'{k}={v}' for k, v in sorted(kwargs.items()))]
+            return get_or_set(make_key(namespace, *parts), lambda: func(*args, **kwargs), timeout)
+
+        wrapper.invalidate = lambda: invalidate(namespace)
+        return wrapper
+    return decorator
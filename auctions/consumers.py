@@ -1,68 +1,81 @@
 import json
+import logging
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from .models import Auction, Bid, Round
+from .leaderboard import (
+    delta_protocol_supported, get_leaderboard_store, latest_published, personalise_leaderboard,
+    personal_fields, top_position_of,
+)
+from .round_cache import get_active_round
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 class AuctionConsumer(AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time auction updates
+
+    Two leaderboard protocols are supported:
+    - full (default): every change is a complete 'leaderboard_update'
+    - delta (?protocol=delta): a sequence-numbered 'leaderboard_snapshot'
+      on connect, then 'leaderboard_patch' messages. A client that sees a
+      gap (patch base_seq != its seq) sends {"type": "resync"} to get a
+      fresh snapshot. Delta needs a leaderboard store shared by all workers
+      (RedisLeaderboardStore); otherwise such clients get the full protocol.
+
+    Broadcasts carry the shared (anonymous) leaderboard; each connection
+    adds its own viewer's flags and position (see personal_position).
     """
 
     async def connect(self):
         """Called when WebSocket connection is established"""
-        print("=" * 60)
-        print("🔌 WEBSOCKET CONNECT CALLED")
-        
         try:
             self.auction_id = self.scope['url_route']['kwargs']['auction_id']
-            print(f"✅ Auction ID: {self.auction_id}")
-            
             self.room_group_name = f'auction_{self.auction_id}'
-            print(f"✅ Room group: {self.room_group_name}")
-            
+
             # Get user
             user = self.scope.get('user')
-            print(f"✅ User: {user}")
-            print(f"✅ Is authenticated: {user.is_authenticated if user else False}")
-            
             self.user_id = user.id if user and user.is_authenticated else None
-            print(f"✅ User ID: {self.user_id}")
+
+            query = parse_qs(self.scope.get('query_string', b'').decode())
+            self.delta_mode = query.get('protocol', [''])[0] == 'delta' and self.delta_supported()
+            # Whether this viewer has a bid in the current round (skips rank lookups if not)
+            self.has_bid = False
+            logger.debug(
+                'WebSocket connect: auction %s, user %s, %s protocol',
+                self.auction_id, self.user_id, 'delta' if self.delta_mode else 'full'
+            )
 
             # Join room group
-            print("📝 Joining room group...")
             await self.channel_layer.group_add(
                 self.room_group_name,
                 self.channel_name
             )
-            print("✅ Joined room group")
 
             # Accept connection
-            print("📝 Accepting connection...")
             await self.accept()
-            print("✅ Connection accepted")
 
             # Send initial data
-            print("📝 Fetching initial leaderboard...")
             try:
+                if self.delta_mode:
+                    await self.send_snapshot()
+                    return
+
                 leaderboard_data = await self.get_leaderboard()
-                print(f"✅ Leaderboard data: {len(leaderboard_data.get('top_bids', []))} bids")
-                
-                print("📝 Sending leaderboard...")
+                self.has_bid = leaderboard_data.get('user_position') is not None
                 await self.send(text_data=json.dumps({
                     'type': 'leaderboard_update',
                     'data': leaderboard_data
                 }))
-                print("✅ Leaderboard sent successfully")
-                
-            except Exception as e:
-                print(f"⚠️  Error getting/sending leaderboard: {e}")
-                import traceback
-                traceback.print_exc()
-                
+
+            except Exception:
+                logger.exception('Error sending the initial leaderboard for auction %s', self.auction_id)
+
                 # Send empty data
                 await self.send(text_data=json.dumps({
                     'type': 'leaderboard_update',
@@ -72,32 +85,24 @@ class AuctionConsumer(AsyncWebsocketConsumer):
                         'highest_amount': '0'
                     }
                 }))
-            
-            print("✅ CONNECT COMPLETED SUCCESSFULLY")
-            print("=" * 60)
-            
-        except Exception as e:
-            print(f"❌ FATAL ERROR IN CONNECT: {e}")
-            import traceback
-            traceback.print_exc()
-            print("=" * 60)
+
+        except Exception:
+            logger.exception('WebSocket connect failed')
             await self.close()
 
     async def disconnect(self, close_code):
         """Called when WebSocket connection is closed"""
-        print(f"🔌 DISCONNECT CALLED - Code: {close_code}")
+        logger.debug('WebSocket disconnect: code %s', close_code)
         try:
             await self.channel_layer.group_discard(
                 self.room_group_name,
                 self.channel_name
             )
-            print("✅ Left room group")
-        except Exception as e:
-            print(f"Error in disconnect: {e}")
+        except Exception:
+            logger.exception('Error leaving the auction group')
 
     async def receive(self, text_data):
         """Called when we receive a message from WebSocket"""
-        print(f"📨 RECEIVED MESSAGE: {text_data[:100]}")
         try:
             data = json.loads(text_data)
             message_type = data.get('type')
@@ -108,47 +113,143 @@ class AuctionConsumer(AsyncWebsocketConsumer):
                     'type': 'leaderboard_update',
                     'data': leaderboard_data
                 }))
-        except Exception as e:
-            print(f"Error in receive: {e}")
+            elif message_type == 'resync':
+                logger.debug('Resync requested for auction %s', self.auction_id)
+                await self.send_snapshot()
+            elif message_type == 'set_protocol':
+                self.delta_mode = data.get('protocol') == 'delta' and self.delta_supported()
+                if self.delta_mode:
+                    await self.send_snapshot()
+        except Exception:
+            logger.exception('Error handling a WebSocket message')
+
+    def delta_supported(self):
+        if delta_protocol_supported(self.channel_layer):
+            return True
+        logger.debug('Delta protocol needs a shared leaderboard store; using full updates')
+        return False
+
+    async def send_snapshot(self):
+        """Send the sequence-numbered leaderboard snapshot (delta mode)"""
+        seq, leaderboard_data = await self.get_snapshot()
+        await self.send(text_data=json.dumps({
+            'type': 'leaderboard_snapshot',
+            'seq': seq,
+            'data': leaderboard_data
+        }))
 
     async def leaderboard_update(self, event):
         """Send leaderboard update to WebSocket"""
-        print("📤 SENDING LEADERBOARD UPDATE")
         try:
-            await self.send(text_data=json.dumps({
-                'type': 'leaderboard_update',
-                'data': event['data']
-            }))
-            print("✅ Leaderboard update sent")
-        except Exception as e:
-            print(f"Error sending leaderboard_update: {e}")
+            user_position, user_pledge = await self.personal_position(event)
+
+            if not self.delta_mode:
+                await self.send(text_data=json.dumps({
+                    'type': 'leaderboard_update',
+                    'data': personalise_leaderboard(event['data'], self.user_id, user_position, user_pledge)
+                }))
+            elif event.get('patch'):
+                await self.send(text_data=json.dumps({
+                    'type': 'leaderboard_patch',
+                    **self.personalise_patch(event['patch'], user_position, user_pledge)
+                }))
+            else:
+                await self.send(text_data=json.dumps({
+                    'type': 'leaderboard_snapshot',
+                    'seq': event.get('seq', 0),
+                    'data': personalise_leaderboard(event['data'], self.user_id, user_position, user_pledge)
+                }))
+        except Exception:
+            logger.exception('Error sending leaderboard_update')
+
+    async def personal_position(self, event):
+        """
+        This viewer's (position, pledge) for a broadcast leaderboard.
+        Read from the broadcast itself when they are in the top 10, from the
+        leaderboard store (never the DB) only when they have a bid below it
+        """
+        if not self.user_id:
+            return None, None
+
+        if str(self.user_id) in event.get('bidder_ids', ()):
+            self.has_bid = True
+
+        user_position = top_position_of(event['data'], self.user_id)
+        if user_position is not None:
+            self.has_bid = True
+            return user_position, None
+
+        if not self.has_bid or not event.get('round_id'):
+            return None, None
+
+        user_position, user_pledge = await sync_to_async(
+            get_leaderboard_store().position_of, thread_sensitive=False
+        )(event['round_id'], self.user_id)
+        self.has_bid = user_position is not None
+        return user_position, user_pledge
+
+    def personalise_patch(self, patch, user_position, user_pledge):
+        """Flag this viewer's own entry in 'add' ops and attach their position"""
+        if not self.user_id:
+            return patch
+
+        user_id = str(self.user_id)
+        ops = []
+        for op in patch['ops']:
+            if op['op'] == 'add' and op['bid']['user']['id'] == user_id:
+                op = {**op, 'bid': {**op['bid'], 'is_current_user': True}}
+            ops.append(op)
+        return {
+            **patch,
+            'ops': ops,
+            'fields': {**patch['fields'], **personal_fields(user_position, user_pledge)},
+        }
 
     async def round_update(self, event):
         """Handle round update broadcast"""
-        print("📤 SENDING ROUND UPDATE")
         try:
             await self.send(text_data=json.dumps({
                 'type': 'round_update',
                 'data': event['data']
             }))
-            print("✅ Round update sent")
-        except Exception as e:
-            print(f"Error sending round_update: {e}")
+        except Exception:
+            logger.exception('Error sending round_update')
+
+    @database_sync_to_async
+    def get_snapshot(self):
+        """
+        Last published leaderboard (so its seq lines up with later patches),
+        with this viewer's own position filled in
+        """
+        current_round = get_active_round(self.auction_id)
+
+        if not current_round:
+            return 0, {
+                'top_bids': [],
+                'total_participants': 0,
+                'highest_amount': '0',
+                'round_number': 0,
+                'round_base_price': '0'
+            }
+
+        seq, leaderboard_data = latest_published(current_round)
+        if not self.user_id:
+            return seq, leaderboard_data
+
+        user_position, user_pledge = get_leaderboard_store().position_of(current_round.id, self.user_id)
+        self.has_bid = user_position is not None
+        return seq, personalise_leaderboard(leaderboard_data, self.user_id, user_position, user_pledge)
 
     @database_sync_to_async
     def get_leaderboard(self):
         """Fetch current leaderboard data"""
-        print(f"🔍 Getting leaderboard for auction: {self.auction_id}")
-        
         try:
-            auction = Auction.objects.get(id=self.auction_id)
-            print(f"✅ Found auction: {auction.title}")
-            
-            # Get current round
-            current_round = auction.rounds.filter(is_active=True).first()
-            
+            # Get current round (cached, auction preloaded)
+            current_round = get_active_round(self.auction_id)
+
             if not current_round:
-                print("⚠️  No active round found")
+                if not Auction.objects.filter(id=self.auction_id).exists():
+                    raise Auction.DoesNotExist
                 return {
                     'top_bids': [],
                     'total_participants': 0,
@@ -156,62 +257,19 @@ class AuctionConsumer(AsyncWebsocketConsumer):
                     'round_number': 0,
                     'round_base_price': '0'
                 }
-            
-            print(f"✅ Found round: {current_round.round_number}")
-
-            # Get bids
-            all_bids = current_round.bids.filter(
-                is_valid=True
-            ).select_related('user').order_by(
-                '-pledge_amount',
-                'submitted_at'
-            )
-            
-            print(f"✅ Found {all_bids.count()} bids")
-
-            # Serialize top 10
-            top_bids = all_bids[:10]
-            serialized_bids = []
-
-            for index, bid in enumerate(top_bids, start=1):
-                serialized_bids.append({
-                    'id': str(bid.id),
-                    'position': index,
-                    'is_current_user': bid.user.id == self.user_id if self.user_id else False,
-                    'user': {
-                        'id': str(bid.user.id),
-                        'username': bid.user.username,
-                        'first_name': bid.user.first_name or bid.user.username,
-                    },
-                    'pledge_amount': str(bid.pledge_amount),
-                    'submitted_at': bid.submitted_at.isoformat(),
-                })
-
-            highest_bid = top_bids.first() if top_bids else None
-            highest_amount = highest_bid.pledge_amount if highest_bid else 0
-
-            result = {
-                'top_bids': serialized_bids,
-                'total_participants': all_bids.count(),
-                'highest_amount': str(highest_amount),
-                'round_number': current_round.round_number,
-                'round_base_price': str(current_round.base_price),
-            }
-            
-            print(f"✅ Leaderboard data prepared")
-            return result
+
+            # Served from the shared leaderboard store
+            return get_leaderboard_store().snapshot(current_round, self.user_id)
 
         except Auction.DoesNotExist:
-            print(f"❌ Auction {self.auction_id} not found")
+            logger.warning('Leaderboard requested for unknown auction %s', self.auction_id)
             return {
                 'top_bids': [],
                 'total_participants': 0,
                 'highest_amount': '0'
             }
-        except Exception as e:
-            print(f"❌ Error in get_leaderboard: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception('Error building the leaderboard for auction %s', self.auction_id)
             return {
                 'top_bids': [],
                 'total_participants': 0,
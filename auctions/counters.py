@@ -0,0 +1,284 @@
+"""
+Denormalised auction, round and category counters.
+
+AuctionStats / RoundStats / CategoryStats hold what listings and detail
+pages used to aggregate on every read:
+- auction: unique participants, valid bids, highest valid pledge, revenue
+  from completed participation payments
+- round: completed participations, valid bids
+- category: active auctions
+
+Writes adjust them in place with F() expressions, so concurrent updates
+never lose increments:
+- place_bid (raw upsert, no signals) calls record_bid_placed in its transaction
+- Bid / Participation / Payment / Auction signals call the *_saved/*_deleted
+  helpers; the pre_save receivers remember the values the row was loaded
+  with (LoadedValuesMixin), so no extra SELECT is needed
+- bulk queryset updates skip signals: call recompute_counters(auction_id=...)
+
+`manage.py recompute_counters [--verify]` rebuilds (or checks) everything.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import (
+    Auction, AuctionStats, Bid, Category, CategoryStats, Participation, Payment, Round, RoundStats,
+)
+
+ZERO = Decimal('0.00')
+
+TRACKED_FIELDS = {
+    Bid: ('is_valid', 'pledge_amount'),
+    Participation: ('payment_status',),
+    Payment: ('payment_type', 'status', 'amount'),
+    Auction: ('status', 'category_id'),
+}
+
+
+# -------------------- F() updates --------------------
+
+def _update_stats(model, owner_field, owner_id, updates, create=True):
+    """
+    Apply an UPDATE to a stats row, creating the row first if it is missing.
+    Delete paths pass create=False: the owner may be going away in a cascade.
+    """
+    if owner_id is None or not updates:
+        return
+    rows = model.objects.filter(**{owner_field: owner_id})
+    if not rows.update(**updates) and create:
+        model.objects.get_or_create(**{owner_field: owner_id})
+        rows.update(**updates)
+
+
+def adjust(model, owner_field, owner_id, create=True, **deltas):
+    """Add deltas to counters with F() expressions, e.g. adjust(RoundStats, 'round_id', id, bid_count=1)"""
+    _update_stats(model, owner_field, owner_id, {
+        field: F(field) + delta for field, delta in deltas.items() if delta
+    }, create=create)
+
+
+def highest_pledge_subquery(auction_ref):
+    return Subquery(
+        Bid.objects.filter(
+            auction=OuterRef(auction_ref),
+            is_valid=True
+        ).order_by('-pledge_amount').values('pledge_amount')[:1]
+    )
+
+
+def refresh_highest_pledge(auction_id, create=True):
+    """Re-read the auction's highest valid pledge (single UPDATE ... SELECT)"""
+    _update_stats(AuctionStats, 'auction_id', auction_id, {
+        'highest_pledge': highest_pledge_subquery('auction_id')
+    }, create=create)
+
+
+def remember(instance):
+    """pre_save: keep the row's stored values (as loaded, no query) to diff against in post_save"""
+    instance._counter_previous = instance.loaded_values(TRACKED_FIELDS[type(instance)])
+
+
+def _previous(instance):
+    return getattr(instance, '_counter_previous', None)
+
+
+# -------------------- Bids --------------------
+
+def record_bid_placed(current_round, amount, created):
+    """A bid was upserted by auctions/bidding.py (no model signals fire)"""
+    if created:
+        _update_stats(AuctionStats, 'auction_id', current_round.auction_id, {
+            'bid_count': F('bid_count') + 1,
+            'highest_pledge': Greatest(Coalesce(F('highest_pledge'), Value(amount)), Value(amount)),
+        })
+        adjust(RoundStats, 'round_id', current_round.id, bid_count=1)
+    else:
+        # An existing pledge changed and may have been the highest
+        refresh_highest_pledge(current_round.auction_id)
+
+
+def bid_saved(bid):
+    previous = _previous(bid)
+    was_valid = bool(previous and previous['is_valid'])
+    delta = int(bid.is_valid) - int(was_valid)
+
+    adjust(AuctionStats, 'auction_id', bid.auction_id, bid_count=delta)
+    adjust(RoundStats, 'round_id', bid.round_id, bid_count=delta)
+    if bid.is_valid or was_valid:
+        refresh_highest_pledge(bid.auction_id)
+
+
+def bid_deleted(bid):
+    if bid.is_valid:
+        adjust(AuctionStats, 'auction_id', bid.auction_id, create=False, bid_count=-1)
+        adjust(RoundStats, 'round_id', bid.round_id, create=False, bid_count=-1)
+        refresh_highest_pledge(bid.auction_id, create=False)
+
+
+# -------------------- Participations --------------------
+
+def _other_participations(participation):
+    return Participation.objects.filter(
+        auction_id=participation.auction_id,
+        user_id=participation.user_id
+    ).exclude(pk=participation.pk)
+
+
+def participation_saved(participation, created):
+    previous = _previous(participation)
+    was_completed = bool(previous and previous['payment_status'] == 'completed')
+    is_completed = participation.payment_status == 'completed'
+
+    adjust(RoundStats, 'round_id', participation.round_id,
+           participant_count=int(is_completed) - int(was_completed))
+    if created and not _other_participations(participation).exists():
+        adjust(AuctionStats, 'auction_id', participation.auction_id, participant_count=1)
+
+
+def participation_deleted(participation):
+    if participation.payment_status == 'completed':
+        adjust(RoundStats, 'round_id', participation.round_id, create=False, participant_count=-1)
+    if not _other_participations(participation).exists():
+        adjust(AuctionStats, 'auction_id', participation.auction_id, create=False, participant_count=-1)
+
+
+# -------------------- Payments --------------------
+
+def _revenue(values):
+    if values and values['payment_type'] == 'participation' and values['status'] == 'completed':
+        return values['amount']
+    return ZERO
+
+
+def payment_saved(payment):
+    current = {'payment_type': payment.payment_type, 'status': payment.status, 'amount': payment.amount}
+    delta = Decimal(str(_revenue(current))) - Decimal(str(_revenue(_previous(payment))))
+    adjust(AuctionStats, 'auction_id', payment.auction_id, total_revenue=delta)
+
+
+def payment_deleted(payment):
+    current = {'payment_type': payment.payment_type, 'status': payment.status, 'amount': payment.amount}
+    adjust(AuctionStats, 'auction_id', payment.auction_id, create=False,
+           total_revenue=-Decimal(str(_revenue(current))))
+
+
+# -------------------- Auctions / categories --------------------
+
+def _active_category(values):
+    if values and values['status'] == 'active':
+        return values['category_id']
+    return None
+
+
+def auction_saved(auction, created):
+    if created:
+        AuctionStats.objects.get_or_create(auction=auction)
+
+    old_category = _active_category(_previous(auction))
+    new_category = _active_category({'status': auction.status, 'category_id': auction.category_id})
+    if old_category != new_category:
+        adjust(CategoryStats, 'category_id', old_category, auction_count=-1)
+        adjust(CategoryStats, 'category_id', new_category, auction_count=1)
+
+
+def auction_deleted(auction):
+    if auction.status == 'active':
+        adjust(CategoryStats, 'category_id', auction.category_id, create=False, auction_count=-1)
+
+
+# -------------------- Recompute / verify --------------------
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(queryset.order_by().values(field).annotate(n=Count('pk')).values('n'), output_field=IntegerField()),
+        Value(0)
+    )
+
+
+def expected_auction_stats():
+    participants = Participation.objects.filter(auction=OuterRef('pk')).order_by().values('auction').annotate(
+        n=Count('user', distinct=True)
+    ).values('n')
+    revenue = Payment.objects.filter(
+        auction=OuterRef('pk'),
+        payment_type='participation',
+        status='completed'
+    ).order_by().values('auction').annotate(total=Sum('amount')).values('total')
+    money = DecimalField(max_digits=12, decimal_places=2)
+
+    return Auction.objects.order_by().annotate(
+        participant_count=Coalesce(Subquery(participants, output_field=IntegerField()), Value(0)),
+        bid_count=_count(Bid.objects.filter(auction=OuterRef('pk'), is_valid=True), 'auction'),
+        highest_pledge=highest_pledge_subquery('pk'),
+        total_revenue=Coalesce(Subquery(revenue, output_field=money), Value(ZERO, output_field=money)),
+    ).values('pk', 'participant_count', 'bid_count', 'highest_pledge', 'total_revenue')
+
+
+def expected_round_stats():
+    return Round.objects.order_by().annotate(
+        participant_count=_count(
+            Participation.objects.filter(round=OuterRef('pk'), payment_status='completed'), 'round'
+        ),
+        bid_count=_count(Bid.objects.filter(round=OuterRef('pk'), is_valid=True), 'round'),
+    ).values('pk', 'participant_count', 'bid_count')
+
+
+def expected_category_stats():
+    return Category.objects.order_by().annotate(
+        auction_count=_count(Auction.objects.filter(category=OuterRef('pk'), status='active'), 'category'),
+    ).values('pk', 'auction_count')
+
+
+def _normalise(value):
+    if isinstance(value, (Decimal, float)):
+        return Decimal(str(value)).quantize(ZERO)
+    return value
+
+
+def _sync(stats_rows, owner_field, expected_rows, fields, verify_only):
+    """Compare stats rows with freshly aggregated values; fix them unless verify_only"""
+    stats_model = stats_rows.model
+    current = {
+        row[owner_field]: row
+        for row in stats_rows.values(owner_field, *fields).iterator()
+    }
+
+    mismatches = []
+    for row in expected_rows.iterator():
+        owner_id = row['pk']
+        expected = {field: _normalise(row[field]) for field in fields}
+        stored = current.get(owner_id)
+        actual = {field: _normalise(stored[field]) for field in fields} if stored else None
+        if actual == expected:
+            continue
+
+        mismatches.append({'id': owner_id, 'expected': expected, 'actual': actual})
+        if not verify_only:
+            stats_model.objects.update_or_create(**{owner_field: owner_id}, defaults=expected)
+    return mismatches
+
+
+def recompute_counters(auction_id=None, verify_only=False):
+    """
+    Rebuild (or with verify_only, just check) the counters from the source
+    tables. auction_id limits it to one auction and its rounds.
+    Returns {'auctions': [...], 'rounds': [...], 'categories': [...]} mismatches.
+    """
+    auctions, auction_stats = expected_auction_stats(), AuctionStats.objects.all()
+    rounds, round_stats = expected_round_stats(), RoundStats.objects.all()
+    if auction_id is not None:
+        auctions, auction_stats = auctions.filter(pk=auction_id), auction_stats.filter(auction_id=auction_id)
+        rounds, round_stats = rounds.filter(auction_id=auction_id), round_stats.filter(round__auction_id=auction_id)
+
+    result = {
+        'auctions': _sync(auction_stats, 'auction_id', auctions,
+                          ('participant_count', 'bid_count', 'highest_pledge', 'total_revenue'), verify_only),
+        'rounds': _sync(round_stats, 'round_id', rounds, ('participant_count', 'bid_count'), verify_only),
+        'categories': [],
+    }
+    if auction_id is None:
+        result['categories'] = _sync(CategoryStats.objects.all(), 'category_id', expected_category_stats(),
+                                     ('auction_count',), verify_only)
+    return result
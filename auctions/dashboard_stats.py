@@ -0,0 +1,116 @@
+"""
+Cached admin dashboard statistics.
+
+OrderViewSet.stats, UserViewSet.admin_stats and the admin panel dashboard
+all show status breakdowns of the same tables. Each table is summarised
+here with ONE aggregate query of filtered Count/Sum expressions, and the
+result is cached (auctions/caching.py) for DASHBOARD_STATS_CACHE_TIMEOUT
+seconds (default 60).
+
+The Order / User / Auction / Payment / Participation signals in
+auctions/signals.py drop the matching entry on writes. Bids are written
+with a raw upsert (auctions/bidding.py), so total_bids can lag by up to
+the timeout.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from . import caching
+from .models import Auction, Bid, Order, Participation, Payment
+
+ZERO = Decimal('0.00')
+
+ORDER_STATUSES = [status for status, _ in Order.STATUS_CHOICES]
+REVENUE_ORDER_STATUSES = ['paid', 'processing', 'shipped', 'delivered']
+AUCTION_STATUSES = ['active', 'draft', 'closed']
+USER_TYPES = ['buyer', 'seller', 'admin']
+
+
+def _timeout():
+    return getattr(settings, 'DASHBOARD_STATS_CACHE_TIMEOUT', 60)
+
+
+def _namespace(name):
+    return f'dashboard_stats:{name}'
+
+
+def _cached(name, compute):
+    return caching.get_or_set(caching.make_key(_namespace(name)), compute, _timeout())
+
+
+def invalidate_stats(name):
+    caching.invalidate(_namespace(name))
+
+
+# -------------------- Orders --------------------
+
+def _compute_order_stats():
+    aggregates = {'total': Count('pk')}
+    for status in ORDER_STATUSES:
+        aggregates[status] = Count('pk', filter=Q(status=status))
+    aggregates['revenue'] = Sum('total_amount', filter=Q(status__in=REVENUE_ORDER_STATUSES))
+    aggregates['paid_revenue'] = Sum('total_amount', filter=Q(payment_status='completed'))
+
+    stats = Order.objects.aggregate(**aggregates)
+    stats['revenue'] = stats['revenue'] or ZERO
+    stats['paid_revenue'] = stats['paid_revenue'] or ZERO
+    return stats
+
+
+def order_stats():
+    """
+    {'total', one count per Order status, 'revenue' (paid through delivered),
+    'paid_revenue' (payment_status completed)}
+    """
+    return _cached('orders', _compute_order_stats)
+
+
+# -------------------- Users --------------------
+
+def _compute_user_stats():
+    aggregates = {'total': Count('pk')}
+    for user_type in USER_TYPES:
+        aggregates[user_type] = Count('pk', filter=Q(user_type=user_type))
+    aggregates['verified'] = Count('pk', filter=Q(is_verified=True))
+    aggregates['new_last_30_days'] = Count('pk', filter=Q(
+        date_joined__gte=timezone.now() - timedelta(days=30),
+        is_superuser=False
+    ))
+    return get_user_model().objects.aggregate(**aggregates)
+
+
+def user_stats():
+    """{'total', 'buyer', 'seller', 'admin', 'verified', 'new_last_30_days'}"""
+    return _cached('users', _compute_user_stats)
+
+
+# -------------------- Auctions --------------------
+
+def _compute_auction_stats():
+    stats = {'total': Count('pk')}
+    for status in AUCTION_STATUSES:
+        stats[status] = Count('pk', filter=Q(status=status))
+    stats = Auction.objects.aggregate(**stats)
+
+    payments = Payment.objects.aggregate(
+        revenue=Sum('amount', filter=Q(payment_type='participation', status='completed')),
+        pending_revenue=Sum('amount', filter=Q(payment_type='final_pledge', status='pending')),
+    )
+    stats['revenue'] = payments['revenue'] or ZERO
+    stats['pending_revenue'] = payments['pending_revenue'] or ZERO
+    stats['participants'] = Participation.objects.aggregate(n=Count('user', distinct=True))['n']
+    stats['bids'] = Bid.objects.filter(is_valid=True).count()
+    return stats
+
+
+def auction_stats():
+    """
+    {'total', 'active', 'draft', 'closed', 'revenue' (participation fees),
+    'pending_revenue' (unpaid final pledges), 'participants', 'bids'}
+    """
+    return _cached('auctions', _compute_auction_stats)
@@ -0,0 +1,98 @@
+"""
+Batched data for AuctionDetailSerializer.
+
+The detail page is polled heavily during live auctions. Instead of every
+method field running its own queries (current round three times, participant
+count, revenue, highest bid + its user, the viewer's best bid), the
+serializer asks load_auction_detail once per auction and request:
+- active round: cached (auctions/round_cache.py)
+- viewer entitlement: cached (auctions/round_cache.py)
+- participant count, revenue: maintained counters (auctions/counters.py)
+- highest bid + its bidder + viewer's best bid: ONE query of correlated
+  subqueries on the auction row
+
+detail_rounds_prefetch() loads the nested rounds (with their counters,
+participants, users and latest pledges) in a fixed number of queries.
+"""
+from decimal import Decimal
+
+from django.db.models import OuterRef, Prefetch, Subquery
+
+from .models import Auction, Bid, Participation, Round
+from .round_cache import get_active_round, has_entitlement
+
+ZERO = Decimal('0.00')
+
+
+def highest_bids():
+    """Valid bids of the outer auction, highest pledge first"""
+    return Bid.objects.filter(
+        auction=OuterRef('pk'),
+        is_valid=True
+    ).order_by('-pledge_amount', 'submitted_at')
+
+
+def detail_rounds_prefetch():
+    """Prefetch for Auction.rounds feeding RoundSerializer without per-row queries"""
+    latest_pledge = Bid.objects.filter(
+        user=OuterRef('user'),
+        round=OuterRef('round'),
+        is_valid=True
+    ).order_by('-submitted_at').values('pledge_amount')[:1]
+
+    participants = Participation.objects.select_related('user').annotate(
+        latest_pledge=Subquery(latest_pledge)
+    )
+    rounds = Round.objects.select_related('stats').prefetch_related(
+        Prefetch('participations', queryset=participants)
+    )
+    return Prefetch('rounds', queryset=rounds)
+
+
+def load_auction_detail(auction, user=None):
+    """
+    Everything AuctionDetailSerializer's method fields need, for one auction
+    and (optionally) the requesting user
+    """
+    current_round = get_active_round(auction.id)
+    viewer = user if user is not None and user.is_authenticated else None
+
+    top_bid = highest_bids()
+    annotations = {
+        'top_amount': Subquery(top_bid.values('pledge_amount')[:1]),
+        'top_username': Subquery(top_bid.values('user__username')[:1]),
+        'top_submitted_at': Subquery(top_bid.values('submitted_at')[:1]),
+    }
+    if viewer is not None and current_round is not None:
+        annotations['viewer_best'] = Subquery(
+            Bid.objects.filter(
+                user=viewer,
+                round=current_round,
+                is_valid=True
+            ).order_by('-pledge_amount').values('pledge_amount')[:1]
+        )
+
+    row = Auction.objects.filter(pk=auction.pk).order_by().annotate(**annotations).values(
+        *annotations.keys()
+    ).first() or {}
+
+    highest_bid = None
+    if row.get('top_amount') is not None:
+        highest_bid = {
+            'amount': str(Decimal(row['top_amount']).quantize(ZERO)),
+            'user': row['top_username'],
+            'submitted_at': row['top_submitted_at']
+        }
+
+    viewer_best = row.get('viewer_best')
+    return {
+        'current_round': current_round,
+        'participant_count': auction.get_participant_count(),
+        'total_revenue': Decimal(auction.get_total_revenue()).quantize(ZERO),
+        'highest_bid': highest_bid,
+        'user_has_participated': (
+            viewer is not None and current_round is not None
+            and has_entitlement(viewer.id, current_round.id)
+        ),
+        'user_highest_bid': str(Decimal(viewer_best).quantize(ZERO)) if viewer_best is not None else None,
+    }
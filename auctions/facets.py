@@ -0,0 +1,115 @@
+"""
+Faceted counts for browsing auctions / products.
+
+One grouped query counts the searched auctions by (product_type, category,
+status, live-now); every facet is then summed from those few rows in Python.
+Each facet counts what its options would show with all the OTHER current
+filters applied, so switching a tab never lands on an empty page:
+- product_type: buy_now / auction / both tab badges
+- category: per category id
+- status: draft / active / closed / cancelled
+
+Two filter semantics:
+- BROWSE (BrowseAuctionsView): a product_type tab shows active products,
+  auction / both only while their window is open; with no tab, the status
+  filter applies and defaults to active & live
+- API (AuctionViewSet list): plain product_type / status field filters
+
+Results are cached per filter signature (auctions/caching.py) for
+FACETS_CACHE_TIMEOUT seconds and dropped on Auction / Category writes.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.db.models import BooleanField, Case, Count, Q, Value, When
+from django.utils import timezone
+
+from . import caching
+from .models import Auction
+from .search import search_auctions
+
+NAMESPACE = 'facets'
+BROWSE = 'browse'
+API = 'api'
+
+PRODUCT_TYPES = [product_type for product_type, _ in Auction.PRODUCT_TYPE_CHOICES]
+STATUSES = [status for status, _ in Auction.STATUS_CHOICES]
+
+
+def _grouped_rows(search):
+    """[(product_type, category_id, status, live, count)] of the searched auctions, in one query"""
+    now = timezone.now()
+    queryset = search_auctions(Auction.objects.all(), search) if search else Auction.objects.all()
+    rows = queryset.order_by().annotate(
+        live=Case(
+            When(Q(start_time__lte=now) & Q(end_time__gte=now), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField()
+        )
+    ).values('product_type', 'category_id', 'status', 'live').annotate(n=Count('pk'))
+    return [
+        (row['product_type'], row['category_id'], row['status'], row['live'], row['n'])
+        for row in rows
+    ]
+
+
+def _matches_type_and_status(row, mode, product_type, status):
+    row_type, _, row_status, live, _ = row
+    if mode == API:
+        return (not product_type or row_type == product_type) and (not status or row_status == status)
+
+    if product_type in PRODUCT_TYPES:
+        if row_type != product_type or row_status != 'active':
+            return False
+        return live or product_type == 'buy_now'
+    if status:
+        return row_status == status
+    return row_status == 'active' and live
+
+
+def _compute(mode, product_type, category, status, search):
+    rows = _grouped_rows(search)
+
+    def in_category(row):
+        return not category or str(row[1]) == str(category)
+
+    type_counts = dict.fromkeys(PRODUCT_TYPES, 0)
+    category_counts = {}
+    status_counts = dict.fromkeys(STATUSES, 0)
+
+    for row in rows:
+        row_type, category_id, row_status, _, n = row
+
+        # product_type: the other filters are category (and status in API mode)
+        for option in PRODUCT_TYPES:
+            if in_category(row) and _matches_type_and_status(row, mode, option, status if mode == API else None):
+                type_counts[option] += n
+
+        if category_id is not None and _matches_type_and_status(row, mode, product_type, status):
+            key = str(category_id)
+            category_counts[key] = category_counts.get(key, 0) + n
+
+        # status: the other filters are category and product_type
+        if in_category(row) and (not product_type or row_type == product_type) and row_status in status_counts:
+            status_counts[row_status] += n
+
+    return {'product_type': type_counts, 'category': category_counts, 'status': status_counts}
+
+
+def facet_counts(product_type=None, category=None, status=None, search=None, mode=API):
+    """
+    {'product_type': {type: n}, 'category': {category_id: n}, 'status': {status: n}}
+    for the given filters
+    """
+    signature = json.dumps([mode, product_type, category, status, (search or '').strip().lower()])
+    key = caching.make_key(NAMESPACE, hashlib.md5(signature.encode()).hexdigest())
+    return caching.get_or_set(
+        key,
+        lambda: _compute(mode, product_type, category, status, (search or '').strip()),
+        timeout=getattr(settings, 'FACETS_CACHE_TIMEOUT', 60)
+    )
+
+
+def invalidate_facets():
+    caching.invalidate(NAMESPACE)
@@ -6,13 +6,22 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
 from rest_framework import status
-from django.db.models import Sum, Count, Q, Avg
-from django.db.models.functions import TruncDate, TruncMonth
+from django.db.models import Sum, Count, Q, Case, CharField, F, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat, LPad
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
+import csv
+import json
+import uuid
+import zlib
 
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import revenue_rollups
 from .models import Payment, Participation, Auction, Order
+from .pagination import decode_keyset_cursor, encode_keyset_cursor
 from payments.models import MpesaTransaction
 
 
@@ -25,61 +34,48 @@ class FinancialAnalyticsView(APIView):
     def get(self, request):
         # Date range filters
         days = int(request.query_params.get('days', 30))
-        start_date = timezone.now() - timedelta(days=days)
+        now = timezone.now()
+        start_date = now - timedelta(days=days)
+        start_day = timezone.localdate(start_date)
+
+        # Past days come from the daily rollups (auctions/revenue_rollups.py),
+        # only today is aggregated from the payment tables
+        current = revenue_rollups.current_day_buckets()
+        buckets = revenue_rollups.revenue_buckets(start_day, current=current)
 
         # ============ OVERALL REVENUE METRICS ============
 
         # Auction Participation Fees
-        participation_revenue = Payment.objects.filter(
-            payment_type='participation',
-            status='completed',
-            created_at__gte=start_date
-        ).aggregate(
-            total=Sum('amount'),
-            count=Count('id')
+        participation_revenue = revenue_rollups.sum_buckets(
+            buckets, payment_type='participation', status='completed'
         )
 
         # Final Pledge Payments (from completed auctions)
-        pledge_revenue = Payment.objects.filter(
-            payment_type='final_pledge',
-            status='completed',
-            created_at__gte=start_date
-        ).aggregate(
-            total=Sum('amount'),
-            count=Count('id')
-        )
+        pledge_revenue = revenue_rollups.sum_buckets(buckets, payment_type='final_pledge', status='completed')
 
         # Buy Now Orders (from MpesaTransaction)
-        order_revenue = MpesaTransaction.objects.filter(
-            status='completed',
-            created_at__gte=start_date
-        ).aggregate(
-            total=Sum('amount'),
-            count=Count('id')
+        order_revenue = revenue_rollups.sum_buckets(
+            buckets, payment_type=revenue_rollups.ORDER_TYPE, status='completed'
         )
 
         # Total Revenue
-        total_revenue = (
-            (participation_revenue['total'] or Decimal('0')) +
-            (pledge_revenue['total'] or Decimal('0')) +
-            (order_revenue['total'] or Decimal('0'))
-        )
+        total_revenue = participation_revenue['total'] + pledge_revenue['total'] + order_revenue['total']
 
         # ============ TRANSACTION BREAKDOWN ============
 
         transaction_summary = {
             'participation_fees': {
-                'total': float(participation_revenue['total'] or 0),
+                'total': float(participation_revenue['total']),
                 'count': participation_revenue['count'],
                 'label': 'Auction Participation Fees'
             },
             'final_pledges': {
-                'total': float(pledge_revenue['total'] or 0),
+                'total': float(pledge_revenue['total']),
                 'count': pledge_revenue['count'],
                 'label': 'Final Pledge Payments'
             },
             'buy_now_orders': {
-                'total': float(order_revenue['total'] or 0),
+                'total': float(order_revenue['total']),
                 'count': order_revenue['count'],
                 'label': 'Buy Now Orders'
             },
@@ -94,94 +90,59 @@ class FinancialAnalyticsView(APIView):
         # ============ DAILY REVENUE TREND ============
 
         # Last 30 days trend
-        daily_revenue = Payment.objects.filter(
-            status='completed',
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            revenue=Sum('amount'),
-            transactions=Count('id')
-        ).order_by('date')
+        daily_revenue = revenue_rollups.revenue_series(
+            timezone.localdate(now - timedelta(days=30)),
+            current=current
+        )
 
         # ============ PAYMENT METHOD BREAKDOWN ============
 
-        payment_methods = Payment.objects.filter(
-            status='completed',
-            created_at__gte=start_date
-        ).values('method').annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        )
+        payment_methods = {}
+        for bucket in buckets:
+            if bucket['payment_type'] == revenue_rollups.ORDER_TYPE or bucket['status'] != 'completed':
+                continue
+            method = payment_methods.setdefault(bucket['method'], {'method': bucket['method'], 'total': 0, 'count': 0})
+            method['total'] += bucket['total']
+            method['count'] += bucket['count']
 
         # ============ TOP PERFORMING AUCTIONS ============
 
-        top_auctions = Payment.objects.filter(
-            payment_type='participation',
-            status='completed',
-            created_at__gte=start_date
-        ).values(
-            'auction__id',
-            'auction__title'
-        ).annotate(
-            revenue=Sum('amount'),
-            participants=Count('id')
-        ).order_by('-revenue')[:10]
+        top_auctions = revenue_rollups.top_auctions(start_day)
 
         # ============ PENDING & FAILED TRANSACTIONS ============
 
-        pending_payments = Payment.objects.filter(
-            status='pending'
-        ).aggregate(
-            total=Sum('amount'),
-            count=Count('id')
+        pending_payments = revenue_rollups.sum_buckets(
+            revenue_rollups.revenue_buckets(status='pending', current=current),
+            exclude_type=revenue_rollups.ORDER_TYPE
         )
 
-        failed_payments = Payment.objects.filter(
-            status='failed',
-            created_at__gte=start_date
-        ).aggregate(
-            total=Sum('amount'),
-            count=Count('id')
+        failed_payments = revenue_rollups.sum_buckets(
+            buckets, exclude_type=revenue_rollups.ORDER_TYPE, status='failed'
         )
 
         # ============ MONTHLY GROWTH ============
 
-        monthly_revenue = Payment.objects.filter(
-            status='completed',
-            created_at__gte=timezone.now() - timedelta(days=365)
-        ).annotate(
-            month=TruncMonth('created_at')
-        ).values('month').annotate(
-            revenue=Sum('amount'),
-            transactions=Count('id')
-        ).order_by('month')
+        monthly_revenue = revenue_rollups.revenue_series(
+            timezone.localdate(now - timedelta(days=365)),
+            period='month',
+            current=current
+        )
 
         # ============ AVERAGE TRANSACTION VALUE ============
 
-        avg_transaction = Payment.objects.filter(
-            status='completed',
-            created_at__gte=start_date
-        ).aggregate(
-            avg=Avg('amount')
-        )
+        completed = revenue_rollups.sum_buckets(buckets, exclude_type=revenue_rollups.ORDER_TYPE, status='completed')
+        avg_transaction = {'avg': completed['total'] / completed['count'] if completed['count'] else None}
 
         # ============ REFUND METRICS ============
 
-        refunds = Payment.objects.filter(
-            status='refunded',
-            created_at__gte=start_date
-        ).aggregate(
-            total=Sum('amount'),
-            count=Count('id')
-        )
+        refunds = revenue_rollups.sum_buckets(buckets, exclude_type=revenue_rollups.ORDER_TYPE, status='refunded')
 
         # Compile response
         return Response({
             'date_range': {
                 'days': days,
                 'start_date': start_date,
-                'end_date': timezone.now()
+                'end_date': now
             },
             'overview': {
                 'total_revenue': float(total_revenue),
@@ -195,185 +156,367 @@ class FinancialAnalyticsView(APIView):
                 'refunded_count': refunds['count']
             },
             'revenue_breakdown': transaction_summary,
-            'daily_trend': list(daily_revenue),
-            'monthly_trend': list(monthly_revenue),
-            'payment_methods': list(payment_methods),
-            'top_auctions': list(top_auctions)
+            'daily_trend': daily_revenue,
+            'monthly_trend': monthly_revenue,
+            'payment_methods': list(payment_methods.values()),
+            'top_auctions': top_auctions
         })
 
 
+# M-Pesa order transaction status -> standard status
+MPESA_STATUS_MAP = {'completed': 'completed', 'pending': 'pending', 'failed': 'failed', 'cancelled': 'failed'}
+
+# Tie-break order of the two ledgers at an identical created_at (see keyset_filter)
+PAYMENT_SOURCE = 'payment'
+MPESA_SOURCE = 'mpesa'
+
+
+def ledger_keys(queryset, source):
+    """
+    (created_at, source, row_id) of one ledger's rows for the UNION ALL.
+    row_id is text so both ledgers share a column; integer M-Pesa ids are
+    zero-padded so they sort as text the way they sort as numbers.
+    """
+    if source == MPESA_SOURCE:
+        row_id = LPad(Cast('id', CharField()), 20, Value('0'))
+    else:
+        row_id = Cast('id', CharField())
+    return queryset.order_by().annotate(
+        source=Value(source, output_field=CharField()),
+        row_id=row_id
+    ).values('created_at', 'source', 'row_id')
+
+
+def keyset_filter(keys, source, cursor):
+    """Rows strictly after the cursor in (created_at, source, row_id) DESC order"""
+    if cursor is None:
+        return keys
+    created_at, cursor_source, cursor_id = cursor
+    if source < cursor_source:
+        return keys.filter(created_at__lte=created_at)
+    if source > cursor_source:
+        return keys.filter(created_at__lt=created_at)
+    return keys.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, row_id__lt=cursor_id))
+
+
+def unified_transactions(sources, cursor=None):
+    """
+    One UNION ALL query over both ledgers, newest first. Filtering happens in
+    each branch, ordering / counting / slicing on the union, all in the database.
+    Returns None when every ledger is filtered out.
+    """
+    branches = [
+        keyset_filter(ledger_keys(queryset, source), source, cursor)
+        for source, queryset in sources
+        if queryset is not None
+    ]
+    if not branches:
+        return None
+    combined = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+    return combined.order_by('-created_at', '-source', '-row_id')
+
+
+def load_transactions(keys):
+    """Fetch the rows behind a page of union keys (one query per ledger) in page order"""
+    ids = {PAYMENT_SOURCE: [], MPESA_SOURCE: []}
+    for key in keys:
+        ids[key['source']].append(key['row_id'])
+
+    loaded = {
+        PAYMENT_SOURCE: Payment.objects.select_related('user', 'auction').in_bulk(
+            [uuid.UUID(row_id) for row_id in ids[PAYMENT_SOURCE]]
+        ) if ids[PAYMENT_SOURCE] else {},
+        MPESA_SOURCE: MpesaTransaction.objects.select_related('user', 'order').in_bulk(
+            [int(row_id) for row_id in ids[MPESA_SOURCE]]
+        ) if ids[MPESA_SOURCE] else {},
+    }
+
+    rows = []
+    for key in keys:
+        if key['source'] == PAYMENT_SOURCE:
+            rows.append(payment_row(loaded[PAYMENT_SOURCE][uuid.UUID(key['row_id'])]))
+        else:
+            rows.append(mpesa_row(loaded[MPESA_SOURCE][int(key['row_id'])]))
+    return rows
+
+
+def payment_row(t):
+    return {
+        'id': str(t.id),
+        'transaction_id': t.transaction_id,
+        'user': {
+            'id': t.user.id,
+            'username': t.user.username,
+            'email': t.user.email
+        },
+        'auction': {
+            'id': str(t.auction.id),
+            'title': t.auction.title
+        } if t.auction else None,
+        'amount': float(t.amount),
+        'payment_type': t.payment_type,
+        'payment_method': t.method,
+        'status': t.status,
+        'created_at': t.created_at,
+        'updated_at': t.completed_at or t.created_at  # Payment has no updated_at
+    }
+
+
+def mpesa_row(t):
+    return {
+        'id': str(t.id),
+        'transaction_id': t.checkout_request_id or str(t.id)[:12],
+        'user': {
+            'id': t.user.id,
+            'username': t.user.username,
+            'email': t.user.email
+        },
+        'auction': {
+            'id': str(t.order.id) if t.order else None,
+            'title': f"Order {t.order.order_number}" if t.order else 'Buy Now Order'
+        } if t.order else None,
+        'amount': float(t.amount),
+        'payment_type': 'order',
+        'payment_method': 'mpesa',
+        'status': MPESA_STATUS_MAP.get(t.status, t.status),
+        'created_at': t.created_at,
+        'updated_at': t.updated_at
+    }
+
+
+def filter_ledgers(query_params):
+    """
+    The Payment and MpesaTransaction querysets matching the transaction list
+    filters (status, payment_type, payment_method, search, start_date,
+    end_date); the M-Pesa one is None when excluded by payment_type
+    """
+    status_filter = query_params.get('status')
+    payment_type = query_params.get('payment_type')
+    payment_method = query_params.get('payment_method')
+    search = query_params.get('search')
+    start_date = query_params.get('start_date')
+    end_date = query_params.get('end_date')
+
+    # Get auction payments
+    auction_payments = Payment.objects.select_related('user', 'auction').all()
+
+    if status_filter:
+        auction_payments = auction_payments.filter(status=status_filter)
+    if payment_type and payment_type in ['participation', 'final_pledge']:
+        auction_payments = auction_payments.filter(payment_type=payment_type)
+    if payment_method:
+        auction_payments = auction_payments.filter(method=payment_method)
+    if search:
+        auction_payments = auction_payments.filter(
+            Q(transaction_id__icontains=search) |
+            Q(user__username__icontains=search) |
+            Q(auction__title__icontains=search)
+        )
+    if start_date:
+        auction_payments = auction_payments.filter(created_at__gte=start_date)
+    if end_date:
+        auction_payments = auction_payments.filter(created_at__lte=end_date)
+
+    # Get M-Pesa order transactions if not filtering by auction payment types
+    mpesa_txns = None
+    if not payment_type or payment_type == 'order':
+        mpesa_txns = MpesaTransaction.objects.select_related('user', 'order').all()
+
+        if status_filter:
+            mpesa_status = [k for k, v in MPESA_STATUS_MAP.items() if v == status_filter]
+            if mpesa_status:
+                mpesa_txns = mpesa_txns.filter(status__in=mpesa_status)
+        if payment_method and payment_method == 'mpesa':
+            pass  # Already M-Pesa transactions
+        elif payment_method and payment_method != 'mpesa':
+            mpesa_txns = mpesa_txns.none()  # Skip if filtering for other methods
+
+        if search:
+            mpesa_txns = mpesa_txns.filter(
+                Q(checkout_request_id__icontains=search) |
+                Q(user__username__icontains=search) |
+                Q(mpesa_receipt_number__icontains=search) |
+                Q(order__order_number__icontains=search)
+            )
+        if start_date:
+            mpesa_txns = mpesa_txns.filter(created_at__gte=start_date)
+        if end_date:
+            mpesa_txns = mpesa_txns.filter(created_at__lte=end_date)
+
+    return auction_payments, mpesa_txns
+
+
 class TransactionListView(APIView):
     """
     Detailed transaction list with filtering and search
     Includes both auction payments and order payments
+
+    Both ledgers are merged, ordered, counted and paged in the database by
+    one UNION ALL query (unified_transactions); only the page's rows are loaded.
+    - ?cursor=<next cursor>: keyset page (no offset, no count)
+    - ?page=N: numbered page with count/total_pages
+    Both return `next` (a cursor link) for the following page.
     """
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        # Filters
-        status_filter = request.query_params.get('status')
-        payment_type = request.query_params.get('payment_type')
-        payment_method = request.query_params.get('payment_method')
-        search = request.query_params.get('search')
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
+        auction_payments, mpesa_txns = filter_ledgers(request.query_params)
+        sources = [(PAYMENT_SOURCE, auction_payments), (MPESA_SOURCE, mpesa_txns)]
+
+        cursor_param = request.query_params.get('cursor')
+        try:
+            page_size = min(max(int(request.query_params.get('page_size', 50)), 1), 500)
+            page = max(int(request.query_params.get('page', 1)), 1)
+        except ValueError:
+            return Response({'error': 'page and page_size must be whole numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            cursor = decode_keyset_cursor(cursor_param) if cursor_param else None
+        except ValueError:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if cursor:
+            combined = unified_transactions(sources, cursor)
+            keys = list(combined[:page_size + 1]) if combined is not None else []
+            page_keys, has_more = keys[:page_size], len(keys) > page_size
+            response = {'page_size': page_size}
+        else:
+            start = (page - 1) * page_size
+            combined = unified_transactions(sources)
+            keys = list(combined[start:start + page_size + 1]) if combined is not None else []
+            page_keys, has_more = keys[:page_size], len(keys) > page_size
+
+            total_count = combined.count() if combined is not None else 0
+            response = {
+                'count': total_count,
+                'page': page,
+                'page_size': page_size,
+                'total_pages': (total_count + page_size - 1) // page_size,
+            }
+
+        next_link = None
+        if has_more and page_keys:
+            last = page_keys[-1]
+            next_link = replace_query_param(
+                remove_query_param(request.build_absolute_uri(), 'page'),
+                'cursor',
+                encode_keyset_cursor(last['created_at'], last['source'], last['row_id'])
+            )
 
-        # Combine auction payments and order payments
-        all_transactions = []
+        response['next'] = next_link
+        response['results'] = load_transactions(page_keys)
+        return Response(response)
 
-        # Get auction payments
-        auction_payments = Payment.objects.select_related('user', 'auction').all()
 
-        if status_filter:
-            auction_payments = auction_payments.filter(status=status_filter)
-        if payment_type and payment_type in ['participation', 'final_pledge']:
-            auction_payments = auction_payments.filter(payment_type=payment_type)
-        if payment_method:
-            auction_payments = auction_payments.filter(method=payment_method)
-        if search:
-            auction_payments = auction_payments.filter(
-                Q(transaction_id__icontains=search) |
-                Q(user__username__icontains=search) |
-                Q(auction__title__icontains=search)
+class Echo:
+    """Pseudo-buffer for csv.writer: returns each row instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(sources):
+    """
+    Flat export rows of both ledgers, newest first, as one UNION ALL values
+    query (related names joined in SQL, no model instances)
+    """
+    branches = []
+    for source, queryset in sources:
+        if queryset is None:
+            continue
+        if source == MPESA_SOURCE:
+            columns = queryset.order_by().annotate(
+                export_reference=Coalesce('checkout_request_id', Cast('id', CharField())),
+                export_title=Case(
+                    When(order__isnull=True, then=Value('Buy Now Order')),
+                    default=Concat(Value('Order '), 'order__order_number'),
+                    output_field=CharField()
+                ),
+                export_type=Value('order', output_field=CharField()),
+                export_method=Value('mpesa', output_field=CharField()),
             )
-        if start_date:
-            auction_payments = auction_payments.filter(created_at__gte=start_date)
-        if end_date:
-            auction_payments = auction_payments.filter(created_at__lte=end_date)
-
-        # Convert auction payments to common format
-        for t in auction_payments:
-            all_transactions.append({
-                'id': str(t.id),
-                'transaction_id': t.transaction_id,
-                'user': {
-                    'id': t.user.id,
-                    'username': t.user.username,
-                    'email': t.user.email
-                },
-                'auction': {
-                    'id': str(t.auction.id),
-                    'title': t.auction.title
-                } if t.auction else None,
-                'amount': float(t.amount),
-                'payment_type': t.payment_type,
-                'payment_method': t.method,
-                'status': t.status,
-                'created_at': t.created_at,
-                'updated_at': t.updated_at
-            })
-
-        # Get M-Pesa order transactions if not filtering by auction payment types
-        if not payment_type or payment_type == 'order':
-            mpesa_txns = MpesaTransaction.objects.select_related('user', 'order').all()
-
-            # Map M-Pesa status to standard status
-            status_map = {'completed': 'completed', 'pending': 'pending', 'failed': 'failed', 'cancelled': 'failed'}
-
-            if status_filter:
-                mpesa_status = [k for k, v in status_map.items() if v == status_filter]
-                if mpesa_status:
-                    mpesa_txns = mpesa_txns.filter(status__in=mpesa_status)
-            if payment_method and payment_method == 'mpesa':
-                pass  # Already M-Pesa transactions
-            elif payment_method and payment_method != 'mpesa':
-                mpesa_txns = mpesa_txns.none()  # Skip if filtering for other methods
-
-            if search:
-                mpesa_txns = mpesa_txns.filter(
-                    Q(checkout_request_id__icontains=search) |
-                    Q(user__username__icontains=search) |
-                    Q(mpesa_receipt_number__icontains=search) |
-                    Q(order__order_number__icontains=search)
-                )
-            if start_date:
-                mpesa_txns = mpesa_txns.filter(created_at__gte=start_date)
-            if end_date:
-                mpesa_txns = mpesa_txns.filter(created_at__lte=end_date)
-
-            # Convert M-Pesa transactions to common format
-            for t in mpesa_txns:
-                all_transactions.append({
-                    'id': str(t.id),
-                    'transaction_id': t.checkout_request_id or str(t.id)[:12],
-                    'user': {
-                        'id': t.user.id,
-                        'username': t.user.username,
-                        'email': t.user.email
-                    },
-                    'auction': {
-                        'id': str(t.order.id) if t.order else None,
-                        'title': f"Order {t.order.order_number}" if t.order else 'Buy Now Order'
-                    } if t.order else None,
-                    'amount': float(t.amount),
-                    'payment_type': 'order',
-                    'payment_method': 'mpesa',
-                    'status': status_map.get(t.status, t.status),
-                    'created_at': t.created_at,
-                    'updated_at': t.updated_at
-                })
-
-        # Sort by created_at descending
-        all_transactions.sort(key=lambda x: x['created_at'], reverse=True)
-
-        # Paginate
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 50))
-        start = (page - 1) * page_size
-        end = start + page_size
-
-        total_count = len(all_transactions)
-        transactions_page = all_transactions[start:end]
+        else:
+            columns = queryset.order_by().annotate(
+                export_reference=F('transaction_id'),
+                export_title=Coalesce('auction__title', Value('N/A')),
+                export_type=F('payment_type'),
+                export_method=F('method'),
+            )
+        branches.append(columns.values_list(
+            'export_reference', 'created_at', 'user__username', 'user__email', 'export_title',
+            'amount', 'export_type', 'export_method', 'status'
+        ))
 
-        return Response({
-            'count': total_count,
-            'page': page,
-            'page_size': page_size,
-            'total_pages': (total_count + page_size - 1) // page_size,
-            'results': transactions_page
-        })
+    if not branches:
+        return []
+    combined = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+    return combined.order_by('-created_at')
+
+
+def gzip_stream(chunks):
+    """gzip-compress a stream of text chunks on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
 
 
 class ExportTransactionsView(APIView):
     """
-    Export transactions to CSV
+    Export transactions (auction payments + M-Pesa order payments) as a stream.
+
+    Query params:
+    - output: csv (default) or ndjson
+    - gzip=1: gzip-compressed download
+    - status, payment_type, payment_method, search, start_date, end_date:
+      same filters as TransactionListView
+
+    Rows come from one UNION ALL query read with a server-side cursor
+    (.iterator(chunk_size=...)), so memory stays constant however many
+    transactions are exported.
     """
     permission_classes = [IsAdminUser]
+    chunk_size = 2000
+
+    HEADER = ['Transaction ID', 'Date', 'User', 'Email', 'Auction', 'Amount', 'Type', 'Method', 'Status']
+    NDJSON_KEYS = ['transaction_id', 'created_at', 'username', 'email', 'auction', 'amount', 'payment_type',
+                   'payment_method', 'status']
+
+    def iter_rows(self, sources):
+        rows = export_rows(sources)
+        if not isinstance(rows, list):
+            rows = rows.iterator(chunk_size=self.chunk_size)
+        for reference, created_at, username, email, title, amount, payment_type, method, status_value in rows:
+            if payment_type == 'order':
+                status_value = MPESA_STATUS_MAP.get(status_value, status_value)
+            yield [
+                reference, created_at, username, email, title, float(amount), payment_type, method, status_value
+            ]
+
+    def csv_lines(self, sources):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.HEADER)
+        for row in self.iter_rows(sources):
+            row[1] = row[1].strftime('%Y-%m-%d %H:%M:%S')
+            yield writer.writerow(row)
+
+    def ndjson_lines(self, sources):
+        for row in self.iter_rows(sources):
+            row[1] = row[1].isoformat()
+            yield json.dumps(dict(zip(self.NDJSON_KEYS, row))) + '\n'
 
     def get(self, request):
-        import csv
-        from django.http import HttpResponse
+        sources = list(zip((PAYMENT_SOURCE, MPESA_SOURCE), filter_ledgers(request.query_params)))
 
-        # Apply same filters as TransactionListView
-        transactions = Payment.objects.select_related('user', 'auction').all()
+        if request.query_params.get('output') == 'ndjson':
+            lines, content_type, filename = self.ndjson_lines(sources), 'application/x-ndjson', 'transactions.ndjson'
+        else:
+            lines, content_type, filename = self.csv_lines(sources), 'text/csv', 'transactions.csv'
 
-        status_filter = request.query_params.get('status')
-        if status_filter:
-            transactions = transactions.filter(status=status_filter)
-
-        transactions = transactions.order_by('-created_at')
-
-        # Create CSV
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Transaction ID', 'Date', 'User', 'Email', 'Auction',
-            'Amount', 'Type', 'Method', 'Status'
-        ])
-
-        for t in transactions:
-            writer.writerow([
-                t.transaction_id,
-                t.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                t.user.username,
-                t.user.email,
-                t.auction.title if t.auction else 'N/A',
-                float(t.amount),
-                t.payment_type,
-                t.method,
-                t.status
-            ])
+        if request.query_params.get('gzip') in ('1', 'true'):
+            lines, content_type, filename = gzip_stream(lines), 'application/gzip', f'{filename}.gz'
 
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
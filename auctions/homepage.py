@@ -0,0 +1,152 @@
+"""
+Precomputed homepage feed.
+
+HomeView (and the public hero banner API) used to run a query per section
+on every hit. Each section is now built once and served from the cache
+(auctions/caching.py) until either:
+- an Auction / Category / HeroBanner write invalidates its namespace
+  (receivers in auctions/signals.py), or
+- the clock alone would change it: a listed flash sale expires, a listed
+  auction ends or the next scheduled one starts. The section records that
+  moment as valid_until and its cache entry expires then.
+
+HOMEPAGE_FEED_TIMEOUT (default 300s) caps every entry, which also bounds how
+stale the participant counts on product cards can get.
+"""
+import math
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import caching
+from .models import Auction, Category, HeroBanner
+
+AUCTIONS_NAMESPACE = 'homepage:auctions'
+CATEGORIES_NAMESPACE = 'homepage:categories'
+BANNERS_NAMESPACE = 'homepage:banners'
+
+
+def _max_timeout():
+    return getattr(settings, 'HOMEPAGE_FEED_TIMEOUT', 300)
+
+
+def _active_products():
+    return Auction.objects.filter(status='active').select_related('category', 'created_by', 'stats')
+
+
+def _earliest(*moments):
+    moments = [moment for moment in moments if moment is not None]
+    return min(moments) if moments else None
+
+
+def _live_section(now, limit, order, **filters):
+    """Active products whose auction window is open now, and when that set next changes"""
+    products = _active_products().filter(**filters)
+    items = list(products.filter(start_time__lte=now, end_time__gte=now).order_by(order)[:limit])
+    next_start = products.filter(start_time__gt=now).order_by('start_time').values_list(
+        'start_time', flat=True
+    ).first()
+    return items, _earliest(next_start, *(item.end_time for item in items))
+
+
+# -------------------- Sections --------------------
+# Each builder takes "now" and returns (items, valid_until or None)
+
+def build_hero_slides(now):
+    return list(_active_products().filter(is_featured=True).order_by('display_order', '-created_at')[:5]), None
+
+
+def build_flash_sale_products(now):
+    items = list(_active_products().filter(
+        is_flash_sale=True,
+        flash_sale_ends_at__gte=now
+    ).order_by('display_order', '-created_at')[:8])
+    return items, _earliest(*(item.flash_sale_ends_at for item in items))
+
+
+def build_buy_now_products(now):
+    return list(_active_products().filter(product_type='buy_now').order_by('-created_at')[:8]), None
+
+
+def build_auction_products(now):
+    return _live_section(now, 8, 'end_time', product_type='auction')
+
+
+def build_both_products(now):
+    return _live_section(now, 8, '-created_at', product_type='both')
+
+
+def build_featured_auctions(now):
+    return _live_section(now, 12, '-created_at')
+
+
+def build_categories(now):
+    return list(Category.objects.filter(is_active=True)[:8]), None
+
+
+def build_hero_banners(now):
+    return list(HeroBanner.objects.filter(is_active=True).order_by('order', 'created_at')), None
+
+
+SECTIONS = {
+    'hero_slides': (AUCTIONS_NAMESPACE, build_hero_slides),
+    'flash_sale_products': (AUCTIONS_NAMESPACE, build_flash_sale_products),
+    'buy_now_products': (AUCTIONS_NAMESPACE, build_buy_now_products),
+    'auction_products': (AUCTIONS_NAMESPACE, build_auction_products),
+    'both_products': (AUCTIONS_NAMESPACE, build_both_products),
+    'featured_auctions': (AUCTIONS_NAMESPACE, build_featured_auctions),
+    'categories': (CATEGORIES_NAMESPACE, build_categories),
+    'hero_banners': (BANNERS_NAMESPACE, build_hero_banners),
+}
+
+# Context of auctions.views.HomeView
+HOME_SECTIONS = [
+    'hero_slides', 'flash_sale_products', 'buy_now_products', 'auction_products',
+    'both_products', 'featured_auctions', 'categories',
+]
+
+
+# -------------------- Cache --------------------
+
+def _build(builder):
+    items, valid_until = builder(timezone.now())
+    return {'items': items, 'valid_until': valid_until}
+
+
+def _timeout(entry):
+    if entry['valid_until'] is None:
+        return _max_timeout()
+    seconds = math.ceil((entry['valid_until'] - timezone.now()).total_seconds())
+    return max(1, min(_max_timeout(), seconds))
+
+
+def get_section(name):
+    """One homepage section's items, from the cache when it is still valid"""
+    namespace, builder = SECTIONS[name]
+    key = caching.make_key(namespace, name)
+    entry = caching.get_or_set(key, lambda: _build(builder), timeout=_timeout)
+
+    if entry['valid_until'] is not None and entry['valid_until'] <= timezone.now():
+        # Past its expiry moment but not yet evicted (timeouts are whole seconds)
+        caching.cache_delete(key)
+        entry = caching.get_or_set(key, lambda: _build(builder), timeout=_timeout)
+    return entry['items']
+
+
+def get_feed():
+    """HomeView's sections, by context name"""
+    return {name: get_section(name) for name in HOME_SECTIONS}
+
+
+def invalidate_products():
+    caching.invalidate(AUCTIONS_NAMESPACE)
+
+
+def invalidate_categories():
+    caching.invalidate(CATEGORIES_NAMESPACE)
+    # Cached products carry their category
+    caching.invalidate(AUCTIONS_NAMESPACE)
+
+
+def invalidate_banners():
+    caching.invalidate(BANNERS_NAMESPACE)
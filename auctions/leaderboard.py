@@ -0,0 +1,847 @@
+"""
+Leaderboard engine and stores for auction rounds.
+
+Each active round keeps its valid bids in a sorted structure keyed by
+(-pledge_amount, submitted_at), so the bid path can answer top-K,
+rank-of-user and tie-at-top queries in O(log N) instead of re-querying
+every bid in the round.
+
+The store is pluggable via settings.LEADERBOARD_BACKEND:
+- InMemoryLeaderboardStore: per-process boards (single worker / tests)
+- RedisLeaderboardStore: Redis sorted sets shared by every ASGI worker
+
+Stores also keep the last leaderboard published to each auction's
+WebSocket group with a sequence number, so consumers in delta mode can
+be sent compact patches (see build_leaderboard_patch) instead of the
+full top-10 on every bid. The sequence is only shared across workers by
+the Redis store; see delta_protocol_supported.
+"""
+import json
+import threading
+import time
+from decimal import Decimal
+
+from channels.layers import InMemoryChannelLayer
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from sortedcontainers import SortedList
+
+from .models import Bid
+
+TOP_BIDS_LIMIT = 10
+
+
+class RoundLeaderboard:
+    """
+    Sorted view of one round's valid bids.
+    Holds one entry per user (their current bid), mirroring how
+    BidViewSet.create updates a user's existing bid in place.
+    """
+
+    def __init__(self, round_id, round_number, base_price):
+        self.round_id = str(round_id)
+        self.round_number = round_number
+        self.base_price = base_price
+        self.built_at = time.monotonic()
+        self._keys = SortedList()
+        self._entries = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(entry):
+        return (-entry['pledge_amount'], entry['submitted_at'].timestamp(), entry['user_id'])
+
+    def is_stale(self, max_age):
+        """Check if the board is older than max_age seconds"""
+        return max_age is not None and time.monotonic() - self.built_at > max_age
+
+    def upsert(self, bid_id, user_id, username, first_name, pledge_amount, submitted_at):
+        """Insert or move a user's bid - O(log N)"""
+        user_id = str(user_id)
+        entry = {
+            'bid_id': str(bid_id),
+            'user_id': user_id,
+            'username': username,
+            'first_name': first_name or username,
+            'pledge_amount': Decimal(str(pledge_amount)).quantize(Decimal('0.01')),
+            'submitted_at': submitted_at,
+        }
+        with self._lock:
+            previous = self._entries.get(user_id)
+            if previous is not None:
+                self._keys.remove(self._key(previous))
+            self._entries[user_id] = entry
+            self._keys.add(self._key(entry))
+        return entry
+
+    def remove(self, user_id):
+        """Drop a user's bid from the board (e.g. bid invalidated or deleted)"""
+        user_id = str(user_id)
+        with self._lock:
+            previous = self._entries.pop(user_id, None)
+            if previous is not None:
+                self._keys.remove(self._key(previous))
+        return previous
+
+    def entry_for(self, user_id):
+        return self._entries.get(str(user_id))
+
+    def position_of(self, user_id):
+        """(1-based position, pledge amount) of the user's bid, or (None, None)"""
+        with self._lock:
+            entry = self._entries.get(str(user_id))
+            if entry is None:
+                return None, None
+            return self.rank_of(user_id), entry['pledge_amount']
+
+    def rank_of(self, user_id):
+        """1-based position of the user's bid, or None if they have not bid"""
+        with self._lock:
+            entry = self._entries.get(str(user_id))
+            if entry is None:
+                return None
+            return self._keys.index(self._key(entry)) + 1
+
+    def top(self, limit=TOP_BIDS_LIMIT):
+        """Highest bids first, earliest submission wins ties"""
+        with self._lock:
+            return [self._entries[key[2]] for key in self._keys.islice(0, limit)]
+
+    def highest_amount(self):
+        with self._lock:
+            if not self._keys:
+                return 0
+            return -self._keys[0][0]
+
+    def tied_at_top_count(self):
+        """Number of bids sharing the highest pledge amount"""
+        with self._lock:
+            if not self._keys:
+                return 0
+            top_amount = self._keys[0][0]
+            return self._keys.bisect_right((top_amount, float('inf')))
+
+    def snapshot(self, current_user_id=None):
+        """
+        Leaderboard payload in the shape the frontend already consumes
+        (see build_leaderboard_payload)
+        """
+        with self._lock:
+            user_position = None
+            user_pledge = None
+            if current_user_id:
+                user_position = self.rank_of(current_user_id)
+                if user_position is not None:
+                    user_pledge = self._entries[str(current_user_id)]['pledge_amount']
+
+            return build_leaderboard_payload(
+                round_number=self.round_number,
+                base_price=self.base_price,
+                top_entries=self.top(),
+                total=len(self),
+                highest_amount=self.highest_amount(),
+                tied_at_top=self.tied_at_top_count(),
+                current_user_id=current_user_id,
+                user_position=user_position,
+                user_pledge=user_pledge,
+            )
+
+
+def build_leaderboard_payload(round_number, base_price, top_entries, total, highest_amount,
+                              tied_at_top, current_user_id=None, user_position=None, user_pledge=None):
+    """Assemble the leaderboard payload shared by every store"""
+    current_user_id = str(current_user_id) if current_user_id else None
+
+    serialized_bids = []
+    for index, entry in enumerate(top_entries, start=1):
+        submitted_at = entry['submitted_at']
+        serialized_bids.append({
+            'id': entry['bid_id'],
+            'position': index,
+            'is_current_user': entry['user_id'] == current_user_id if current_user_id else False,
+            'user': {
+                'id': entry['user_id'],
+                'username': entry['username'],
+                'first_name': entry['first_name'],
+            },
+            'pledge_amount': str(entry['pledge_amount']),
+            'submitted_at': submitted_at if isinstance(submitted_at, str) else submitted_at.isoformat(),
+        })
+
+    return {
+        'top_bids': serialized_bids,
+        'total_participants': total,
+        'highest_amount': str(highest_amount),
+        'tied_at_top_count': tied_at_top,
+        'round_number': round_number,
+        'round_base_price': str(base_price),
+        **personal_fields(user_position, user_pledge),
+    }
+
+
+def personal_fields(user_position=None, user_pledge=None):
+    """Viewer-specific fields layered on top of the shared leaderboard"""
+    user_in_top_10 = user_position is not None and user_position <= TOP_BIDS_LIMIT
+    user_bid = None
+    if user_position is not None and not user_in_top_10:
+        user_bid = {
+            'pledge_amount': str(user_pledge),
+            'position': user_position
+        }
+    return {
+        'user_position': user_position,
+        'user_bid': user_bid,
+        'user_in_top_10': user_in_top_10,
+    }
+
+
+def top_position_of(payload, user_id):
+    """The user's position if they are in the payload's top bids, else None"""
+    user_id = str(user_id)
+    for bid in payload['top_bids']:
+        if bid['user']['id'] == user_id:
+            return bid['position']
+    return None
+
+
+def personalise_leaderboard(payload, user_id, user_position=None, user_pledge=None):
+    """
+    Copy of a shared (anonymous) leaderboard payload as seen by one viewer:
+    their own entry flagged and their position filled in
+    """
+    if not user_id:
+        return payload
+
+    user_id = str(user_id)
+    return {
+        **payload,
+        'top_bids': [
+            {**bid, 'is_current_user': bid['user']['id'] == user_id}
+            for bid in payload['top_bids']
+        ],
+        **personal_fields(user_position, user_pledge),
+    }
+
+
+# Scalar fields carried in a patch when they change
+PATCH_FIELDS = ('total_participants', 'highest_amount', 'tied_at_top_count', 'round_base_price')
+
+
+def build_leaderboard_patch(previous, current, seq):
+    """
+    Describe how to turn the previously published leaderboard into the
+    current one. Entries are keyed by user id:
+    - remove: user dropped out of the top 10
+    - add: user entered the top 10 (full entry, including position)
+    - update: bid id / amount / submission time changed
+    - move: position changed
+
+    Returns None when the client needs a full snapshot instead (nothing
+    published yet or the round changed).
+    """
+    if previous is None or previous.get('round_number') != current.get('round_number'):
+        return None
+
+    previous_bids = {bid['user']['id']: bid for bid in previous['top_bids']}
+    current_bids = {bid['user']['id']: bid for bid in current['top_bids']}
+
+    ops = []
+    for user_id in previous_bids:
+        if user_id not in current_bids:
+            ops.append({'op': 'remove', 'user_id': user_id})
+
+    for user_id, bid in current_bids.items():
+        before = previous_bids.get(user_id)
+        if before is None:
+            ops.append({'op': 'add', 'bid': bid})
+            continue
+
+        if (before['id'], before['pledge_amount'], before['submitted_at']) != \
+                (bid['id'], bid['pledge_amount'], bid['submitted_at']):
+            ops.append({
+                'op': 'update',
+                'user_id': user_id,
+                'id': bid['id'],
+                'pledge_amount': bid['pledge_amount'],
+                'submitted_at': bid['submitted_at'],
+            })
+        if before['position'] != bid['position']:
+            ops.append({'op': 'move', 'user_id': user_id, 'position': bid['position']})
+
+    fields = {
+        field: current.get(field)
+        for field in PATCH_FIELDS
+        if previous.get(field) != current.get(field)
+    }
+
+    return {
+        'seq': seq,
+        'base_seq': seq - 1,
+        'round_number': current.get('round_number'),
+        'ops': ops,
+        'fields': fields,
+    }
+
+
+# Process-wide registry of round leaderboards, keyed by round id
+_boards = {}
+_boards_lock = threading.Lock()
+
+
+def iter_round_bids(round_obj, user_ids=None):
+    """
+    Yield (bid_id, user_id, username, first_name, pledge_amount, submitted_at)
+    for a round's valid bids (of the given users only, if user_ids is set),
+    oldest first so a user's most recent bid wins if duplicates exist
+    """
+    rows = Bid.objects.filter(
+        round=round_obj,
+        is_valid=True
+    )
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    rows = rows.order_by('submitted_at').values_list(
+        'id', 'user_id', 'user__username', 'user__first_name',
+        'pledge_amount', 'submitted_at'
+    )
+    return rows.iterator()
+
+
+def build_round_leaderboard(round_obj):
+    """Rebuild a round's leaderboard from the Bid table (cold start)"""
+    board = RoundLeaderboard(round_obj.id, round_obj.round_number, round_obj.base_price)
+    for row in iter_round_bids(round_obj):
+        board.upsert(*row)
+    return board
+
+
+def get_round_leaderboard(round_obj):
+    """
+    Return the cached leaderboard for a round, rebuilding it from the DB
+    on a cold start or once it is older than LEADERBOARD_MAX_AGE seconds
+    (other worker processes may have accepted bids in the meantime)
+    """
+    max_age = getattr(settings, 'LEADERBOARD_MAX_AGE', 30)
+    round_id = str(round_obj.id)
+
+    with _boards_lock:
+        board = _boards.get(round_id)
+
+    if board is None or board.is_stale(max_age):
+        board = build_round_leaderboard(round_obj)
+        with _boards_lock:
+            _boards[round_id] = board
+
+    return board
+
+
+def get_cached_leaderboard(round_id):
+    """Return the round's leaderboard only if this process already holds it"""
+    with _boards_lock:
+        return _boards.get(str(round_id))
+
+
+class BaseLeaderboardStore:
+    """Interface every leaderboard backend implements"""
+
+    # Whether every worker process sees the same boards and publish sequence
+    shared = False
+
+    def snapshot(self, round_obj, current_user_id=None):
+        """Full leaderboard payload for a round"""
+        raise NotImplementedError
+
+    def position_of(self, round_id, user_id):
+        """(1-based position, pledge amount) of the user's bid, or (None, None)"""
+        raise NotImplementedError
+
+    def record_bid(self, bid, user=None):
+        """Apply a saved bid (valid bids are upserted, invalid ones removed)"""
+        raise NotImplementedError
+
+    def discard_bid(self, bid):
+        """Remove a deleted bid"""
+        raise NotImplementedError
+
+    def evict_round(self, round_id):
+        """Drop all state held for a round"""
+        raise NotImplementedError
+
+    def rebuild(self, round_obj):
+        """Reload a round from the Bid table, returning the number of entries"""
+        raise NotImplementedError
+
+    def publish(self, auction_id, payload):
+        """
+        Record the leaderboard broadcast to an auction's group.
+        Returns (seq, previous_payload) - previous is None on the first publish
+        """
+        raise NotImplementedError
+
+    def published(self, auction_id):
+        """Last published (seq, payload) for an auction, or (0, None)"""
+        raise NotImplementedError
+
+
+# Last leaderboard published per auction: auction id -> (seq, payload)
+_published = {}
+_published_lock = threading.Lock()
+
+
+class InMemoryLeaderboardStore(BaseLeaderboardStore):
+    """
+    Per-process store backed by RoundLeaderboard.
+    Suitable for a single worker and as an in-process fake in tests.
+    Its publish sequence is per process too, so the delta protocol is only
+    offered with it when the channel layer is in-memory as well
+    (see delta_protocol_supported).
+    """
+
+    def snapshot(self, round_obj, current_user_id=None):
+        return get_round_leaderboard(round_obj).snapshot(current_user_id)
+
+    def position_of(self, round_id, user_id):
+        board = get_cached_leaderboard(round_id)
+        if board is None:
+            return None, None
+        return board.position_of(user_id)
+
+    def record_bid(self, bid, user=None):
+        board = get_cached_leaderboard(bid.round_id)
+        if board is None:
+            return
+
+        if not bid.is_valid:
+            board.remove(bid.user_id)
+            return
+
+        user = user or bid.user
+        board.upsert(
+            bid.id, bid.user_id, user.username, user.first_name,
+            bid.pledge_amount, bid.submitted_at
+        )
+
+    def discard_bid(self, bid):
+        board = get_cached_leaderboard(bid.round_id)
+        if board is not None:
+            entry = board.entry_for(bid.user_id)
+            if entry is not None and entry['bid_id'] == str(bid.id):
+                board.remove(bid.user_id)
+
+    def evict_round(self, round_id):
+        with _boards_lock:
+            _boards.pop(str(round_id), None)
+
+    def rebuild(self, round_obj):
+        board = build_round_leaderboard(round_obj)
+        with _boards_lock:
+            _boards[str(round_obj.id)] = board
+        return len(board)
+
+    def publish(self, auction_id, payload):
+        with _published_lock:
+            seq, previous = _published.get(str(auction_id), (0, None))
+            _published[str(auction_id)] = (seq + 1, payload)
+        return seq + 1, previous
+
+    def published(self, auction_id):
+        with _published_lock:
+            return _published.get(str(auction_id), (0, None))
+
+
+# Ties on amount are broken by submission time: members are prefixed with
+# (ceiling - submitted_at in microseconds), so ZREVRANGE's reverse
+# lexicographic tie order puts the earliest bid first
+_MEMBER_TS_CEILING = 10 ** 17
+
+_REDIS_SNAPSHOT_SCRIPT = """
+if redis.call('EXISTS', KEYS[4]) == 0 then
+  return {-1}
+end
+local top = redis.call('ZREVRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1, 'WITHSCORES')
+local count = redis.call('ZCARD', KEYS[1])
+local tied = 0
+local entries = {}
+if #top > 0 then
+  tied = redis.call('ZCOUNT', KEYS[1], top[2], top[2])
+end
+for i = 1, #top, 2 do
+  local user_id = string.match(top[i], ':(.*)$')
+  entries[#entries + 1] = redis.call('HGET', KEYS[3], user_id)
+end
+local rank = false
+local mine = false
+if ARGV[2] ~= '' then
+  local member = redis.call('HGET', KEYS[2], ARGV[2])
+  if member then
+    rank = redis.call('ZREVRANK', KEYS[1], member)
+    mine = redis.call('HGET', KEYS[3], ARGV[2])
+  end
+end
+return {count, tied, entries, rank, mine}
+"""
+
+# Writes made while a rebuild holds its lock (KEYS[5]) are logged in
+# KEYS[6] so the rebuild can replay them. A user's entry is only replaced
+# by one submitted at the same time or later (member prefixes are
+# ceiling - submitted_at: smaller is newer)
+_REDIS_UPSERT_SCRIPT = """
+if redis.call('EXISTS', KEYS[5]) == 1 then
+  redis.call('SADD', KEYS[6], ARGV[1])
+  redis.call('EXPIRE', KEYS[6], ARGV[5])
+end
+if redis.call('EXISTS', KEYS[4]) == 0 then
+  return 0
+end
+local previous = redis.call('HGET', KEYS[2], ARGV[1])
+if previous then
+  if string.sub(previous, 1, 18) < string.sub(ARGV[2], 1, 18) then
+    return 0
+  end
+  redis.call('ZREM', KEYS[1], previous)
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[4])
+return 1
+"""
+
+_REDIS_REMOVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[5]) == 1 then
+  redis.call('SADD', KEYS[6], ARGV[1])
+  redis.call('EXPIRE', KEYS[6], ARGV[3])
+end
+local previous = redis.call('HGET', KEYS[2], ARGV[1])
+if not previous then
+  return 0
+end
+if ARGV[2] ~= '' then
+  local entry = cjson.decode(redis.call('HGET', KEYS[3], ARGV[1]))
+  if entry['bid_id'] ~= ARGV[2] then
+    return 0
+  end
+end
+redis.call('ZREM', KEYS[1], previous)
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return 1
+"""
+
+_REDIS_POSITION_SCRIPT = """
+local member = redis.call('HGET', KEYS[2], ARGV[1])
+if not member then
+  return {false, false}
+end
+return {redis.call('ZREVRANK', KEYS[1], member), redis.call('HGET', KEYS[3], ARGV[1])}
+"""
+
+_REDIS_PUBLISH_SCRIPT = """
+local previous = redis.call('GET', KEYS[1])
+local seq = redis.call('INCR', KEYS[2])
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return {seq, previous}
+"""
+
+# Published state outlives rounds, but not an idle auction
+_PUBLISHED_TTL = 24 * 60 * 60
+
+# Longest a round rebuild may hold its lock (and wait for another's)
+_REBUILD_LOCK_TIMEOUT = 30
+
+
+class RedisLeaderboardStore(BaseLeaderboardStore):
+    """
+    Leaderboard shared by every worker through Redis.
+
+    Per round it keeps a sorted set of members scored by pledge (in cents),
+    a hash of user id -> member and a hash of user id -> entry JSON. Reads
+    run as one Lua script, so rank, top-10 and participant count cost a
+    single round-trip. A round is (re)loaded from the Bid table when its
+    ready marker is missing; the marker expires after
+    LEADERBOARD_REDIS_MAX_AGE seconds, so writes that bypassed the store
+    (bulk updates) are picked up eventually.
+
+    Rebuilds of a round are serialised by a lock. Bids recorded while a
+    rebuild runs are noted and replayed from the Bid table once the new
+    board is in place, so they are not wiped by it.
+    """
+
+    shared = True
+
+    def __init__(self, url=None, key_prefix=None):
+        import redis
+
+        self.client = redis.Redis.from_url(
+            url or settings.LEADERBOARD_REDIS_URL,
+            decode_responses=True
+        )
+        self.key_prefix = key_prefix or getattr(settings, 'LEADERBOARD_REDIS_PREFIX', 'leaderboard')
+        self._snapshot_script = self.client.register_script(_REDIS_SNAPSHOT_SCRIPT)
+        self._upsert_script = self.client.register_script(_REDIS_UPSERT_SCRIPT)
+        self._remove_script = self.client.register_script(_REDIS_REMOVE_SCRIPT)
+        self._position_script = self.client.register_script(_REDIS_POSITION_SCRIPT)
+        self._publish_script = self.client.register_script(_REDIS_PUBLISH_SCRIPT)
+
+    def _keys(self, round_id):
+        base = f'{self.key_prefix}:{round_id}'
+        return [f'{base}:bids', f'{base}:members', f'{base}:entries', f'{base}:ready']
+
+    def _rebuild_keys(self, round_id):
+        base = f'{self.key_prefix}:{round_id}'
+        return [f'{base}:rebuild_lock', f'{base}:touched']
+
+    @staticmethod
+    def _max_age():
+        return getattr(settings, 'LEADERBOARD_REDIS_MAX_AGE', 300)
+
+    def _published_keys(self, auction_id):
+        base = f'{self.key_prefix}:auction:{auction_id}'
+        return [f'{base}:published', f'{base}:seq']
+
+    @staticmethod
+    def _score(pledge_amount):
+        return int(Decimal(str(pledge_amount)).quantize(Decimal('0.01')) * 100)
+
+    @staticmethod
+    def _member(user_id, submitted_at):
+        micros = int(submitted_at.timestamp() * 1_000_000)
+        return f'{_MEMBER_TS_CEILING - micros:018d}:{user_id}'
+
+    @staticmethod
+    def _entry_json(bid_id, user_id, username, first_name, pledge_amount, submitted_at):
+        return json.dumps({
+            'bid_id': str(bid_id),
+            'user_id': str(user_id),
+            'username': username,
+            'first_name': first_name or username,
+            'pledge_amount': str(Decimal(str(pledge_amount)).quantize(Decimal('0.01'))),
+            'submitted_at': submitted_at.isoformat(),
+        })
+
+    def _read(self, round_obj, current_user_id=None):
+        keys = self._keys(round_obj.id)
+        args = [TOP_BIDS_LIMIT, str(current_user_id) if current_user_id else '']
+        result = self._snapshot_script(keys=keys, args=args)
+        if result[0] == -1:
+            self.rebuild(round_obj)
+            result = self._snapshot_script(keys=keys, args=args)
+        return result
+
+    def snapshot(self, round_obj, current_user_id=None):
+        count, tied, raw_entries, rank, mine = self._read(round_obj, current_user_id)
+        top_entries = [json.loads(raw) for raw in raw_entries]
+
+        user_position = rank + 1 if rank is not None else None
+        user_pledge = json.loads(mine)['pledge_amount'] if mine else None
+
+        return build_leaderboard_payload(
+            round_number=round_obj.round_number,
+            base_price=round_obj.base_price,
+            top_entries=top_entries,
+            total=count,
+            highest_amount=top_entries[0]['pledge_amount'] if top_entries else 0,
+            tied_at_top=tied,
+            current_user_id=current_user_id,
+            user_position=user_position,
+            user_pledge=user_pledge,
+        )
+
+    def position_of(self, round_id, user_id):
+        rank, entry = self._position_script(keys=self._keys(round_id)[:3], args=[str(user_id)])
+        if rank is None or entry is None:
+            return None, None
+        return rank + 1, json.loads(entry)['pledge_amount']
+
+    def _write_keys(self, round_id):
+        return self._keys(round_id) + self._rebuild_keys(round_id)
+
+    def _upsert(self, round_id, bid_id, user_id, username, first_name, pledge_amount, submitted_at):
+        self._upsert_script(keys=self._write_keys(round_id), args=[
+            str(user_id),
+            self._member(user_id, submitted_at),
+            self._score(pledge_amount),
+            self._entry_json(bid_id, user_id, username, first_name, pledge_amount, submitted_at),
+            _REBUILD_LOCK_TIMEOUT,
+        ])
+
+    def _remove(self, round_id, user_id, bid_id=''):
+        self._remove_script(
+            keys=self._write_keys(round_id),
+            args=[str(user_id), str(bid_id), _REBUILD_LOCK_TIMEOUT]
+        )
+
+    def record_bid(self, bid, user=None):
+        if not bid.is_valid:
+            self._remove(bid.round_id, bid.user_id)
+            return
+
+        user = user or bid.user
+        self._upsert(
+            bid.round_id, bid.id, bid.user_id, user.username, user.first_name,
+            bid.pledge_amount, bid.submitted_at
+        )
+
+    def discard_bid(self, bid):
+        self._remove(bid.round_id, bid.user_id, bid.id)
+
+    def evict_round(self, round_id):
+        self.client.delete(*self._keys(round_id))
+
+    @staticmethod
+    def _latest_by_user(rows):
+        # Collapse to one entry per user (latest bid wins)
+        return {str(row[1]): row for row in rows}
+
+    def rebuild(self, round_obj):
+        zset_key, members_key, entries_key, ready_key = self._keys(round_obj.id)
+        lock_key, touched_key = self._rebuild_keys(round_obj.id)
+
+        with self.client.lock(lock_key, timeout=_REBUILD_LOCK_TIMEOUT,
+                              blocking_timeout=_REBUILD_LOCK_TIMEOUT):
+            self.client.delete(touched_key)
+            latest = self._latest_by_user(iter_round_bids(round_obj))
+
+            pipe = self.client.pipeline(transaction=True)
+            pipe.delete(zset_key, members_key, entries_key)
+            for user_id, row in latest.items():
+                bid_id, _, username, first_name, pledge_amount, submitted_at = row
+                member = self._member(user_id, submitted_at)
+                pipe.zadd(zset_key, {member: self._score(pledge_amount)})
+                pipe.hset(members_key, user_id, member)
+                pipe.hset(entries_key, user_id, self._entry_json(
+                    bid_id, user_id, username, first_name, pledge_amount, submitted_at
+                ))
+            pipe.set(ready_key, timezone.now().isoformat(), ex=self._max_age())
+            pipe.smembers(touched_key)
+            pipe.delete(touched_key)
+            touched = pipe.execute()[-2]
+
+            if touched:
+                self._replay(round_obj, touched)
+
+        return len(latest)
+
+    def _replay(self, round_obj, user_ids):
+        """
+        Re-apply users whose bids changed while the round was being rebuilt,
+        from the Bid table (the DB read above may predate their writes)
+        """
+        entries = dict(zip(user_ids, self.client.hmget(self._keys(round_obj.id)[2], list(user_ids))))
+        current = self._latest_by_user(iter_round_bids(round_obj, user_ids=list(user_ids)))
+
+        for user_id, row in current.items():
+            self._upsert(round_obj.id, *row)
+
+        # Drop entries whose bid has since been invalidated or deleted; the
+        # bid id guard keeps any newer bid recorded after our read
+        stale = {
+            user_id: json.loads(raw)['bid_id']
+            for user_id, raw in entries.items()
+            if raw and user_id not in current
+        }
+        for user_id, bid_id in stale.items():
+            self._remove(round_obj.id, user_id, bid_id)
+
+    def publish(self, auction_id, payload):
+        seq, previous = self._publish_script(
+            keys=self._published_keys(auction_id),
+            args=[json.dumps(payload), _PUBLISHED_TTL]
+        )
+        return seq, json.loads(previous) if previous else None
+
+    def published(self, auction_id):
+        payload, seq = self.client.mget(self._published_keys(auction_id))
+        if payload is None or seq is None:
+            return 0, None
+        return int(seq), json.loads(payload)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_leaderboard_store():
+    """Return the configured leaderboard store (settings.LEADERBOARD_BACKEND)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = getattr(settings, 'LEADERBOARD_BACKEND', 'auctions.leaderboard.InMemoryLeaderboardStore')
+                _store = import_string(backend)()
+    return _store
+
+
+@receiver(setting_changed)
+def reset_leaderboard_store(setting, **kwargs):
+    """Pick up LEADERBOARD_* overrides (e.g. override_settings in tests)"""
+    global _store
+    if setting.startswith('LEADERBOARD_'):
+        _store = None
+
+
+def record_bid(bid, user=None):
+    """
+    Apply a saved bid to its round's leaderboard once the current
+    transaction commits (immediately when not in one), so a rolled-back
+    bid never reaches a shared store
+    """
+    transaction.on_commit(lambda: get_leaderboard_store().record_bid(bid, user))
+
+
+def discard_bid(bid):
+    """Remove a deleted bid from its round's leaderboard once the transaction commits"""
+    transaction.on_commit(lambda: get_leaderboard_store().discard_bid(bid))
+
+
+def evict_round(round_id):
+    """Forget a round's leaderboard (round closed or bids bulk-invalidated)"""
+    get_leaderboard_store().evict_round(round_id)
+
+
+def publish_leaderboard(round_obj):
+    """
+    Publish the round's shared (anonymous) leaderboard for its auction.
+    Returns (seq, payload, patch); patch is None when clients need a full snapshot
+    """
+    store = get_leaderboard_store()
+    payload = store.snapshot(round_obj)
+    seq, previous = store.publish(round_obj.auction_id, payload)
+    return seq, payload, build_leaderboard_patch(previous, payload, seq)
+
+
+def delta_protocol_supported(channel_layer):
+    """
+    Delta patches are numbered by the store's publish sequence. A per-process
+    store behind a channel layer shared by several workers would number each
+    worker's broadcasts independently (colliding seqs), so delta needs a
+    shared store unless the channel layer is in-memory too (one process)
+    """
+    return get_leaderboard_store().shared or isinstance(channel_layer, InMemoryChannelLayer)
+
+
+def latest_published(round_obj):
+    """
+    Last (seq, payload) published for the round's auction, publishing a
+    fresh one if nothing has been sent for this round yet
+    """
+    seq, payload = get_leaderboard_store().published(round_obj.auction_id)
+    if payload is None or payload.get('round_number') != round_obj.round_number:
+        seq, payload, _ = publish_leaderboard(round_obj)
+    return seq, payload
+
+
+def evict_auction(auction_id):
+    """Forget every leaderboard belonging to an auction"""
+    from .models import Round
+
+    store = get_leaderboard_store()
+    for round_id in Round.objects.filter(auction_id=auction_id).values_list('id', flat=True):
+        store.evict_round(round_id)
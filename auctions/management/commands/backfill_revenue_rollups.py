@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.revenue_rollups import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily revenue rollups used by the financial analytics dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=str, help='First day to rebuild (YYYY-MM-DD), default: all history')
+        parser.add_argument('--end', type=str, help='Last day to rebuild (YYYY-MM-DD), default: today')
+
+    def parse_day(self, value, option):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'❌ {option} must be a date (YYYY-MM-DD), got {value!r}')
+
+    def handle(self, *args, **kwargs):
+        start_day = self.parse_day(kwargs.get('start'), '--start')
+        end_day = self.parse_day(kwargs.get('end'), '--end')
+        if start_day and end_day and start_day > end_day:
+            raise CommandError('❌ --start is after --end')
+
+        rows = backfill_rollups(start_day=start_day, end_day=end_day)
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt revenue rollups ({rows} row(s) written)'))
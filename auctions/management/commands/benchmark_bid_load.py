@@ -0,0 +1,198 @@
+import asyncio
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from auctions.models import Participation
+
+BID = 'bid'
+READ = 'leaderboard'
+PERCENTILES = [50, 90, 95, 99]
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive concurrent bid placement (POST /api/bids/) and leaderboard reads '
+        '(GET /api/auctions/<id>/leaderboard/) through the in-process test client and '
+        'report throughput and latency percentiles. Bids are real writes: run it against '
+        'data from `manage.py seed_load`, never production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', type=str, help='Only use bidders of this seed_load run (username prefix)')
+        parser.add_argument('--requests', type=int, default=2000, help='Total requests (default 2000)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients (default 8)')
+        parser.add_argument('--read-ratio', type=float, default=0.7,
+                            help='Share of requests that are leaderboard reads (default 0.7)')
+        parser.add_argument('--auctions', type=int, default=10, help='Hot auctions to target (default 10)')
+        parser.add_argument('--bidders', type=int, default=200, help='Bidders per auction (default 200)')
+        parser.add_argument('--asgi', action='store_true',
+                            help='Go through the ASGI app with AsyncClient instead of threaded WSGI clients')
+        parser.add_argument('--seed', type=int, help='Random seed for the request mix')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['requests'] < 1 or kwargs['concurrency'] < 1:
+            raise CommandError('❌ --requests and --concurrency must be positive')
+        if not 0 <= kwargs['read_ratio'] <= 1:
+            raise CommandError('❌ --read-ratio must be between 0 and 1')
+
+        rng = random.Random(kwargs.get('seed'))
+        bidders = self.load_bidders(kwargs.get('prefix'), kwargs['auctions'], kwargs['bidders'], rng)
+        if not bidders:
+            raise CommandError('❌ No paid participants in active rounds found - run `manage.py seed_load` first')
+
+        tokens = self.issue_tokens({bidder['user_id'] for bidder in bidders})
+        operations = self.plan(bidders, tokens, kwargs['requests'], kwargs['read_ratio'], rng)
+        auctions = len({bidder['auction_id'] for bidder in bidders})
+        mode = 'ASGI' if kwargs['asgi'] else 'WSGI'
+        self.stdout.write(
+            f"🚀 {len(operations)} requests, {kwargs['concurrency']} concurrent clients ({mode}), "
+            f"{auctions} auction(s), {len(tokens)} bidder(s)"
+        )
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING('⚠️ DEBUG is on - query logging slows every request'))
+
+        # The test clients always send Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            started = time.perf_counter()
+            if kwargs['asgi']:
+                results = asyncio.run(self.run_asgi(operations, kwargs['concurrency']))
+            else:
+                results = self.run_wsgi(operations, kwargs['concurrency'])
+            elapsed = time.perf_counter() - started
+
+        self.report(results, elapsed)
+
+    # -------------------- Setup --------------------
+
+    def load_bidders(self, prefix, auction_count, bidders_per_auction, rng):
+        """Paid participants of active rounds, grouped into a random sample of auctions"""
+        participations = Participation.objects.filter(
+            payment_status='completed',
+            round__is_active=True,
+            auction__status='active',
+        )
+        if prefix:
+            participations = participations.filter(user__username__startswith=prefix)
+
+        auction_ids = list(participations.order_by().values_list('auction_id', flat=True).distinct())
+        auction_ids = rng.sample(auction_ids, min(auction_count, len(auction_ids)))
+
+        bidders = []
+        for auction_id in auction_ids:
+            rows = participations.filter(auction_id=auction_id).values(
+                'user_id', 'auction_id', 'round__base_price', 'round__min_pledge', 'round__max_pledge'
+            ).order_by('?')[:bidders_per_auction]
+            bidders.extend(rows)
+        return bidders
+
+    def issue_tokens(self, user_ids):
+        return {user.pk: str(AccessToken.for_user(user)) for user in User.objects.filter(pk__in=user_ids)}
+
+    def plan(self, bidders, tokens, count, read_ratio, rng):
+        """(kind, path, body, token) per request, mixed up front so both modes replay the same load"""
+        operations = []
+        for _ in range(count):
+            bidder = rng.choice(bidders)
+            token = tokens[bidder['user_id']]
+            auction_id = str(bidder['auction_id'])
+            if rng.random() < read_ratio:
+                operations.append((READ, f'/api/auctions/{auction_id}/leaderboard/', None, token))
+                continue
+
+            low = max(bidder['round__base_price'], bidder['round__min_pledge'] or 0)
+            high = bidder['round__max_pledge'] or low + 10000
+            amount = Decimal(rng.uniform(float(low), float(high))).quantize(Decimal('0.01'))
+            operations.append((BID, '/api/bids/', {'auction': auction_id, 'pledge_amount': str(max(amount, low))}, token))
+        return operations
+
+    def headers(self, token):
+        return {'authorization': f'Bearer {token}'}
+
+    # -------------------- Drivers --------------------
+
+    def run_wsgi(self, operations, concurrency):
+        """Threads with their own test client and database connection"""
+        results = []
+        lock = threading.Lock()
+
+        def worker(chunk):
+            client = Client(raise_request_exception=False)
+            timings = []
+            try:
+                for kind, path, body, token in chunk:
+                    started = time.perf_counter()
+                    if body is None:
+                        response = client.get(path, headers=self.headers(token))
+                    else:
+                        response = client.post(path, body, content_type='application/json', headers=self.headers(token))
+                    timings.append((kind, response.status_code, (time.perf_counter() - started) * 1000))
+            finally:
+                connection.close()
+                with lock:
+                    results.extend(timings)
+
+        threads = [threading.Thread(target=worker, args=(operations[i::concurrency],)) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    async def run_asgi(self, operations, concurrency):
+        """Concurrent requests through Django's ASGI handler"""
+        client = AsyncClient(raise_request_exception=False)
+        slots = asyncio.Semaphore(concurrency)
+        results = []
+
+        async def send(kind, path, body, token):
+            async with slots:
+                started = time.perf_counter()
+                if body is None:
+                    response = await client.get(path, headers=self.headers(token))
+                else:
+                    response = await client.post(path, body, content_type='application/json', headers=self.headers(token))
+                results.append((kind, response.status_code, (time.perf_counter() - started) * 1000))
+
+        await asyncio.gather(*(send(*operation) for operation in operations))
+        return results
+
+    # -------------------- Report --------------------
+
+    def report(self, results, elapsed):
+        self.stdout.write(
+            f'\n📊 {len(results)} requests in {elapsed:.2f}s - {len(results) / elapsed:.1f} req/s overall'
+        )
+        for kind in (BID, READ):
+            rows = [row for row in results if row[0] == kind]
+            if not rows:
+                continue
+
+            failures = {}
+            for _, status_code, _ in rows:
+                if status_code >= 400:
+                    failures[status_code] = failures.get(status_code, 0) + 1
+            latencies = sorted(latency for _, _, latency in rows)
+            spread = ', '.join(f'p{pct} {percentile(latencies, pct):.1f}' for pct in PERCENTILES)
+
+            self.stdout.write(f'\n▶ {kind}: {len(rows)} requests, {len(rows) / elapsed:.1f} req/s')
+            self.stdout.write(f'  latency ms: {spread}, max {latencies[-1]:.1f}')
+            if failures:
+                codes = ', '.join(f'{code} x{count}' for code, count in sorted(failures.items()))
+                self.stdout.write(self.style.WARNING(f'  ⚠️ {sum(failures.values())} failed ({codes})'))
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Load benchmark complete'))
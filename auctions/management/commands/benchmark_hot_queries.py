@@ -0,0 +1,160 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from auctions.models import Bid, Participation, Payment, Round
+from auctions.seeding import seed_bidding_data
+
+# Indexes from migration 0024 serving the queries below
+HOT_PATH_INDEXES = [
+    (Bid, 'bid_round_valid_pledge_idx'),
+    (Participation, 'participation_user_round_idx'),
+    (Round, 'round_active_auction_idx'),
+    (Payment, 'payment_status_type_idx'),
+]
+
+# (label, queryset builder taking a sample {'user', 'auction', 'round', 'since'})
+HOT_QUERIES = [
+    ('Round leaderboard (top 10 valid bids)', lambda s: Bid.objects.filter(
+        round_id=s['round'], is_valid=True
+    ).order_by('-pledge_amount', 'submitted_at')[:10]),
+    ('Paid participation check', lambda s: Participation.objects.filter(
+        user_id=s['user'], round_id=s['round'], payment_status='completed'
+    ).order_by().values('pk')[:1]),
+    ('Active round of an auction', lambda s: Round.objects.filter(
+        auction_id=s['auction'], is_active=True
+    ).order_by('-round_number')[:1]),
+    ('Completed participation revenue, last 7 days', lambda s: Payment.objects.filter(
+        status='completed', payment_type='participation', created_at__gte=s['since']
+    ).order_by().values('payment_type').annotate(total=Sum('amount'))),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large synthetic dataset and compare EXPLAIN plans and timings of the hot '
+        'queries without and with the hot-path indexes. Runs in one transaction that is '
+        'rolled back (unless --keep); dropping the indexes locks their tables meanwhile, '
+        'so never run it against production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help='Users to create (default 2000)')
+        parser.add_argument('--auctions', type=int, default=200, help='Auctions to create (default 200)')
+        parser.add_argument('--rounds', type=int, default=3, help='Rounds per auction (default 3)')
+        parser.add_argument('--participants', type=int, default=200, help='Participants per round (default 200)')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per query (default 50)')
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded data instead of rolling back')
+
+    def handle(self, *args, **kwargs):
+        if min(kwargs['users'], kwargs['auctions'], kwargs['rounds'], kwargs['participants'], kwargs['repeat']) < 1:
+            raise CommandError('❌ --users, --auctions, --rounds, --participants and --repeat must be positive')
+
+        with transaction.atomic():
+            self.stdout.write('🌱 Seeding benchmark data...')
+            summary = seed_bidding_data(
+                users=kwargs['users'],
+                auctions=kwargs['auctions'],
+                rounds_per_auction=kwargs['rounds'],
+                participants_per_round=kwargs['participants'],
+            )
+            self.stdout.write(', '.join(f'{name}: {value}' for name, value in summary.items() if name != 'prefix'))
+
+            samples = self.pick_samples(kwargs['repeat'])
+            if not samples:
+                raise CommandError('❌ No completed participations were seeded - raise --participants')
+
+            self.drop_indexes()
+            self.analyze()
+            before = self.run_queries(samples, 'WITHOUT hot-path indexes')
+
+            self.create_indexes()
+            self.analyze()
+            after = self.run_queries(samples, 'WITH hot-path indexes')
+
+            self.report(before, after)
+
+            if not kwargs['keep']:
+                transaction.set_rollback(True)
+                self.stdout.write('🧹 Rolled back the seeded data')
+            else:
+                self.stdout.write(f"💾 Kept the seeded data (usernames start with {summary['prefix']})")
+
+    def pick_samples(self, count):
+        """Random (user, round, auction) triples of completed participations in active rounds"""
+        rows = list(Participation.objects.filter(
+            payment_status='completed', round__is_active=True
+        ).order_by('?').values_list('user_id', 'round_id', 'auction_id')[:count])
+        since = timezone.now() - timedelta(days=7)
+        return [
+            {'user': user_id, 'round': round_id, 'auction': auction_id, 'since': since}
+            for user_id, round_id, auction_id in rows
+        ]
+
+    def indexes(self):
+        for model, name in HOT_PATH_INDEXES:
+            yield model, next(index for index in model._meta.indexes if index.name == name)
+
+    def drop_indexes(self):
+        # Plain DDL: the schema editor can't be entered inside an atomic block on SQLite
+        with connection.cursor() as cursor:
+            for _, index in self.indexes():
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+
+    def create_indexes(self):
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model, index in self.indexes():
+                cursor.execute(str(index.create_sql(model, editor)))
+
+    def analyze(self):
+        """Refresh planner statistics so plans reflect the seeded volume"""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for model, _ in HOT_PATH_INDEXES:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            return queryset.explain(analyze=True)
+        return queryset.explain()
+
+    def run_queries(self, samples, heading):
+        self.stdout.write(f'\n📊 {heading}')
+        timings = {}
+        for label, build in HOT_QUERIES:
+            self.stdout.write(f'\n▶ {label}')
+            self.stdout.write(self.explain(build(samples[0])))
+
+            durations = []
+            for sample in samples:
+                queryset = build(sample)
+                started = time.perf_counter()
+                list(queryset)
+                durations.append((time.perf_counter() - started) * 1000)
+            timings[label] = durations
+        return timings
+
+    def report(self, before, after):
+        self.stdout.write('\n⏱️ Timings (ms, median / p95 / max)')
+        for label, _ in HOT_QUERIES:
+            old, new = self.summary(before[label]), self.summary(after[label])
+            speedup = old[0] / new[0] if new[0] else float('inf')
+            self.stdout.write(
+                f'{label}\n'
+                f'  before: {old[0]:.3f} / {old[1]:.3f} / {old[2]:.3f}\n'
+                f'  after:  {new[0]:.3f} / {new[1]:.3f} / {new[2]:.3f}  ({speedup:.1f}x)'
+            )
+        self.stdout.write(self.style.SUCCESS('\n✅ Benchmark complete'))
+
+    def summary(self, durations):
+        ordered = sorted(durations)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return statistics.median(ordered), p95, ordered[-1]
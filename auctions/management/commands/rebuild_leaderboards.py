@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from auctions.leaderboard import get_leaderboard_store
+from auctions.models import Round
+
+
+class Command(BaseCommand):
+    help = 'Rebuild round leaderboards in the leaderboard store from the Bid table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--auction', type=str, help='Only rebuild rounds of this auction ID')
+        parser.add_argument(
+            '--all-rounds',
+            action='store_true',
+            help='Include closed rounds (default: active rounds only)'
+        )
+
+    def handle(self, *args, **kwargs):
+        store = get_leaderboard_store()
+
+        rounds = Round.objects.select_related('auction').order_by('auction_id', 'round_number')
+        if kwargs.get('auction'):
+            rounds = rounds.filter(auction_id=kwargs['auction'])
+        if not kwargs.get('all_rounds'):
+            rounds = rounds.filter(is_active=True)
+
+        rebuilt = 0
+        for round_obj in rounds:
+            entries = store.rebuild(round_obj)
+            rebuilt += 1
+            self.stdout.write(
+                f'{round_obj.auction.title} - Round {round_obj.round_number}: {entries} bids'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Rebuilt {rebuilt} round leaderboard(s) using {store.__class__.__name__}')
+        )
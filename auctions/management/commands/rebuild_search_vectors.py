@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from auctions.search import full_text_enabled, rebuild_vectors
+
+
+class Command(BaseCommand):
+    help = 'Recompute the full-text search vectors of all auctions (PostgreSQL only)'
+
+    def handle(self, *args, **kwargs):
+        if not full_text_enabled():
+            self.stdout.write(self.style.WARNING('⚠️ Not on PostgreSQL - search uses LIKE, nothing to rebuild'))
+            return
+
+        updated = rebuild_vectors()
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt search vectors for {updated} auction(s)'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.counters import recompute_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalised auction/round/category counters from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--auction', type=str, help='Only recompute this auction ID (and its rounds)')
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report counters that differ from the source tables (no writes); fails if any do'
+        )
+
+    def handle(self, *args, **kwargs):
+        verify_only = kwargs.get('verify')
+        mismatches = recompute_counters(auction_id=kwargs.get('auction'), verify_only=verify_only)
+
+        total = 0
+        for kind, rows in mismatches.items():
+            total += len(rows)
+            for row in rows:
+                self.stdout.write(f"{kind[:-1]} {row['id']}: stored {row['actual']} expected {row['expected']}")
+
+        if verify_only:
+            if total:
+                raise CommandError(f'❌ {total} counter row(s) out of date - run recompute_counters to fix')
+            self.stdout.write(self.style.SUCCESS('✅ All counters match the source tables'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Recomputed counters ({total} row(s) corrected)'))
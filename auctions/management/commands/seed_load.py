@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from auctions.seeding import SEED_PASSWORD, rebuild_derived_data, seed_marketplace
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic marketplace for local load testing: users, auctions with rounds, '
+        'participations, payments and bids, buy-now products with orders and M-Pesa transactions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to create (default 1000)')
+        parser.add_argument('--auctions', type=int, default=50, help='Auctions to create (default 50)')
+        parser.add_argument('--buy-now', type=int, default=50, help='Buy-now products to create (default 50)')
+        parser.add_argument('--rounds', type=int, default=3, help='Rounds per auction, the last one active (default 3)')
+        parser.add_argument('--participants', type=int, default=100, help='Participants per round (default 100)')
+        parser.add_argument('--orders', type=int, default=1000, help='Buy-now orders to create (default 1000)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT (default 2000)')
+        parser.add_argument('--seed', type=int, help='Random seed, for reproducible volumes and amounts')
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help="Don't rebuild counters, standings, leaderboards, rollups, search vectors and caches"
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs['users'] < 1 or kwargs['rounds'] < 1 or kwargs['batch_size'] < 1:
+            raise CommandError('❌ --users, --rounds and --batch-size must be positive')
+        if min(kwargs['auctions'], kwargs['buy_now'], kwargs['participants'], kwargs['orders']) < 0:
+            raise CommandError('❌ Volumes cannot be negative')
+
+        self.stdout.write('🌱 Seeding synthetic marketplace data...')
+        with transaction.atomic():
+            summary = seed_marketplace(
+                users=kwargs['users'],
+                auctions=kwargs['auctions'],
+                buy_now_products=kwargs['buy_now'],
+                rounds_per_auction=kwargs['rounds'],
+                participants_per_round=kwargs['participants'],
+                orders=kwargs['orders'],
+                batch_size=kwargs['batch_size'],
+                seed=kwargs.get('seed'),
+            )
+
+        for name, value in summary.items():
+            if name != 'prefix':
+                self.stdout.write(f"  {name.replace('_', ' ')}: {value}")
+
+        if not kwargs['skip_derived']:
+            self.stdout.write('🔄 Rebuilding counters, standings, leaderboards, rollups and caches...')
+            rebuild_derived_data(prefix=summary['prefix'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Seeded run {summary['prefix']} (users {summary['prefix']}0.., password '{SEED_PASSWORD}')"
+        ))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def invalidate_duplicate_bids(apps, schema_editor):
+    """Keep only each user's latest valid bid per round before adding the constraint"""
+    Bid = apps.get_model('auctions', 'Bid')
+
+    duplicates = (
+        Bid.objects.filter(is_valid=True)
+        .values('user_id', 'round_id')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for row in duplicates.iterator():
+        bids = Bid.objects.filter(
+            user_id=row['user_id'],
+            round_id=row['round_id'],
+            is_valid=True
+        ).order_by('-submitted_at')
+        latest_id = bids.values_list('id', flat=True).first()
+        bids.exclude(id=latest_id).update(is_valid=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0016_specialofferbanner'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(invalidate_duplicate_bids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bid',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_valid', True)), fields=('user', 'round'), name='unique_valid_bid_per_user_round'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:35
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_standings(apps, schema_editor):
+    """Build standings from each user's latest valid bid per round"""
+    Round = apps.get_model('auctions', 'Round')
+    Bid = apps.get_model('auctions', 'Bid')
+    Participation = apps.get_model('auctions', 'Participation')
+    AuctionStanding = apps.get_model('auctions', 'AuctionStanding')
+
+    round_counts = dict(
+        Round.objects.values('auction_id').annotate(count=models.Count('id')).values_list('auction_id', 'count')
+    )
+
+    # Oldest first, so the latest bid per (auction, user, round) wins
+    latest = {}
+    rows = Bid.objects.filter(is_valid=True).order_by('submitted_at').values_list(
+        'auction_id', 'user_id', 'round__round_number', 'pledge_amount'
+    )
+    for auction_id, user_id, round_number, pledge_amount in rows.iterator():
+        latest.setdefault((auction_id, user_id), {})[str(round_number)] = pledge_amount
+
+    participants = Participation.objects.filter(payment_status='completed').values_list('auction_id', 'user_id')
+    for key in participants.iterator():
+        latest.setdefault(key, {})
+
+    standings = []
+    for (auction_id, user_id), pledges in latest.items():
+        total_rounds = round_counts.get(auction_id, 0)
+        total_pledge = sum(pledges.values(), Decimal('0.00'))
+        standings.append(AuctionStanding(
+            auction_id=auction_id,
+            user_id=user_id,
+            round_pledges={key: str(amount) for key, amount in pledges.items()},
+            total_pledge=total_pledge,
+            rounds_participated=len(pledges),
+            total_rounds=total_rounds,
+            average_pledge=(total_pledge / total_rounds).quantize(Decimal('0.01')) if total_rounds else Decimal('0.00'),
+        ))
+    AuctionStanding.objects.bulk_create(standings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0017_bid_unique_valid_per_round'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuctionStanding',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('round_pledges', models.JSONField(blank=True, default=dict)),
+                ('total_pledge', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('rounds_participated', models.PositiveIntegerField(default=0)),
+                ('total_rounds', models.PositiveIntegerField(default=0)),
+                ('average_pledge', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('auction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='auctions.auction')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auction_standings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-total_pledge'],
+                'indexes': [models.Index(fields=['auction', '-total_pledge'], name='auctions_au_auction_94f914_idx')],
+                'unique_together': {('auction', 'user')},
+            },
+        ),
+        migrations.RunPython(backfill_standings, migrations.RunPython.noop),
+    ]
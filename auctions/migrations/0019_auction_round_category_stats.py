@@ -0,0 +1,115 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:45
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, field):
+    return Coalesce(
+        models.Subquery(
+            queryset.order_by().values(field).annotate(n=models.Count('pk')).values('n'),
+            output_field=models.IntegerField()
+        ),
+        models.Value(0)
+    )
+
+
+def backfill_stats(apps, schema_editor):
+    """Populate the counters from existing bids, participations and payments"""
+    Auction = apps.get_model('auctions', 'Auction')
+    Round = apps.get_model('auctions', 'Round')
+    Category = apps.get_model('auctions', 'Category')
+    Bid = apps.get_model('auctions', 'Bid')
+    Participation = apps.get_model('auctions', 'Participation')
+    Payment = apps.get_model('auctions', 'Payment')
+    AuctionStats = apps.get_model('auctions', 'AuctionStats')
+    RoundStats = apps.get_model('auctions', 'RoundStats')
+    CategoryStats = apps.get_model('auctions', 'CategoryStats')
+    OuterRef = models.OuterRef
+
+    participants = Participation.objects.filter(auction=OuterRef('pk')).order_by().values('auction').annotate(
+        n=models.Count('user', distinct=True)
+    ).values('n')
+    revenue = Payment.objects.filter(
+        auction=OuterRef('pk'), payment_type='participation', status='completed'
+    ).order_by().values('auction').annotate(total=models.Sum('amount')).values('total')
+    highest = Bid.objects.filter(auction=OuterRef('pk'), is_valid=True).order_by('-pledge_amount').values('pledge_amount')[:1]
+
+    auctions = Auction.objects.order_by().annotate(
+        n_participants=Coalesce(models.Subquery(participants, output_field=models.IntegerField()), models.Value(0)),
+        n_bids=_count(Bid.objects.filter(auction=OuterRef('pk'), is_valid=True), 'auction'),
+        top_pledge=models.Subquery(highest),
+        revenue=models.Subquery(revenue, output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+    ).values_list('pk', 'n_participants', 'n_bids', 'top_pledge', 'revenue')
+    AuctionStats.objects.bulk_create([
+        AuctionStats(auction_id=pk, participant_count=n_participants, bid_count=n_bids,
+                     highest_pledge=top_pledge, total_revenue=revenue or Decimal('0.00'))
+        for pk, n_participants, n_bids, top_pledge, revenue in auctions.iterator()
+    ], batch_size=1000)
+
+    rounds = Round.objects.order_by().annotate(
+        n_participants=_count(Participation.objects.filter(round=OuterRef('pk'), payment_status='completed'), 'round'),
+        n_bids=_count(Bid.objects.filter(round=OuterRef('pk'), is_valid=True), 'round'),
+    ).values_list('pk', 'n_participants', 'n_bids')
+    RoundStats.objects.bulk_create([
+        RoundStats(round_id=pk, participant_count=n_participants, bid_count=n_bids)
+        for pk, n_participants, n_bids in rounds.iterator()
+    ], batch_size=1000)
+
+    categories = Category.objects.order_by().annotate(
+        n_auctions=_count(Auction.objects.filter(category=OuterRef('pk'), status='active'), 'category'),
+    ).values_list('pk', 'n_auctions')
+    CategoryStats.objects.bulk_create([
+        CategoryStats(category_id=pk, auction_count=n_auctions)
+        for pk, n_auctions in categories.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0018_auctionstanding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuctionStats',
+            fields=[
+                ('auction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='auctions.auction')),
+                ('participant_count', models.IntegerField(default=0, help_text='Unique participants across all rounds')),
+                ('bid_count', models.IntegerField(default=0, help_text='Valid bids')),
+                ('highest_pledge', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Completed participation fee payments', max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Auction stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='auctions.category')),
+                ('auction_count', models.IntegerField(default=0, help_text='Active auctions')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Category stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='RoundStats',
+            fields=[
+                ('round', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='auctions.round')),
+                ('participant_count', models.IntegerField(default=0, help_text='Completed participations')),
+                ('bid_count', models.IntegerField(default=0, help_text='Valid bids')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Round stats',
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
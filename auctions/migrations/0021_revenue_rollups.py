@@ -0,0 +1,74 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:55
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    """Populate the rollups from existing payments and M-Pesa order transactions"""
+    Payment = apps.get_model('auctions', 'Payment')
+    MpesaTransaction = apps.get_model('payments', 'MpesaTransaction')
+    DailyRevenue = apps.get_model('auctions', 'DailyRevenue')
+    DailyAuctionRevenue = apps.get_model('auctions', 'DailyAuctionRevenue')
+
+    def grouped(queryset, *fields):
+        return queryset.order_by().annotate(day=TruncDate('created_at')).values('day', *fields).annotate(
+            total=models.Sum('amount'), count=models.Count('pk')
+        )
+
+    DailyRevenue.objects.bulk_create(
+        [DailyRevenue(**row) for row in grouped(Payment.objects.all(), 'payment_type', 'method', 'status')] +
+        [DailyRevenue(payment_type='order', method='mpesa', **row)
+         for row in grouped(MpesaTransaction.objects.all(), 'status')],
+        batch_size=1000
+    )
+    DailyAuctionRevenue.objects.bulk_create([
+        DailyAuctionRevenue(**row)
+        for row in grouped(Payment.objects.filter(payment_type='participation', status='completed'), 'auction_id')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0020_cursor_pagination_indexes'),
+        ('payments', '0002_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_type', models.CharField(help_text="participation / final_pledge, or 'order' for M-Pesa order transactions", max_length=20)),
+                ('method', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily revenue',
+                'constraints': [models.UniqueConstraint(fields=('day', 'payment_type', 'method', 'status'), name='unique_daily_revenue_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyAuctionRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('auction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to='auctions.auction')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily auction revenue',
+                'constraints': [models.UniqueConstraint(fields=('day', 'auction'), name='unique_daily_auction_revenue')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
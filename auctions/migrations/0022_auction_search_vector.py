@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:04
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+INDEX_NAME = 'auctions_auction_search_gin'
+
+
+def _vector(title, category_name, description):
+    return (
+        SearchVector(title, weight='A', config='english') +
+        SearchVector(category_name, weight='B', config='english') +
+        SearchVector(description, weight='C', config='english')
+    )
+
+
+def add_search_index(apps, schema_editor):
+    """GIN index + initial vectors; PostgreSQL only (other backends search with LIKE)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Auction = apps.get_model('auctions', 'Auction')
+    Category = apps.get_model('auctions', 'Category')
+
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {Auction._meta.db_table} USING gin (search_vector)'
+    )
+
+    empty = models.Value('', output_field=models.TextField())
+    Auction.objects.filter(category__isnull=True).update(
+        search_vector=_vector(models.F('title'), empty, models.F('description'))
+    )
+    for category in Category.objects.only('pk', 'name').iterator():
+        Auction.objects.filter(category=category).update(search_vector=_vector(
+            models.F('title'),
+            models.Value(category.name, output_field=models.TextField()),
+            models.F('description')
+        ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0021_revenue_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(add_search_index, drop_search_index),
+    ]
@@ -0,0 +1,38 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# UPPER(col::text) is what icontains / istartswith compile to on PostgreSQL,
+# so these trigram indexes serve the autocomplete LIKE '%...%' filters
+INDEXES = [
+    ('auctions_auction_title_trgm', 'auctions_auction', 'title'),
+    ('auctions_category_name_trgm', 'auctions_category', 'name'),
+]
+
+
+def add_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0022_auction_search_vector'),
+    ]
+
+    operations = [
+        # No-op on other databases
+        TrigramExtension(),
+        migrations.RunPython(add_trigram_indexes, drop_trigram_indexes),
+    ]
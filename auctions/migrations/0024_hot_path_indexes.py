@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0023_trigram_autocomplete_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(condition=models.Q(('is_valid', True)), fields=['round', '-pledge_amount', 'submitted_at'], name='bid_round_valid_pledge_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participation',
+            index=models.Index(fields=['user', 'round', 'payment_status'], name='participation_user_round_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'payment_type', 'created_at'], name='payment_status_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='round',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['auction'], name='round_active_auction_idx'),
+        ),
+    ]
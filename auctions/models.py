@@ -1,11 +1,56 @@
 import uuid
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import MinValueValidator,  MaxValueValidator
 from decimal import Decimal
 
 
+class LoadedValuesMixin:
+    """
+    Remembers each field's value as last read from or written to the
+    database, so post_save receivers (counters, revenue rollups) can diff
+    against it without re-reading the row.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_loaded_values()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_loaded_values(kwargs.get('fields'))
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_loaded_values(kwargs.get('update_fields'))
+
+    def _snapshot_loaded_values(self, fields=None):
+        loaded = getattr(self, '_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if fields is not None and field.name not in fields and field.attname not in fields:
+                continue
+            if field.attname in self.__dict__:  # skip deferred fields
+                loaded[field.attname] = self.__dict__[field.attname]
+        self._loaded_values = loaded
+
+    def loaded_values(self, fields):
+        """
+        The fields' values as stored in the database before this save (None
+        for a new row); reads the row only if the instance wasn't loaded with them
+        """
+        if self._state.adding:
+            return None
+        loaded = getattr(self, '_loaded_values', {})
+        if all(field in loaded for field in fields):
+            return {field: loaded[field] for field in fields}
+        return type(self)._base_manager.filter(pk=self.pk).values(*fields).first()
+
+
 class Category(models.Model):
     """Product categories for organizing auctions"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -67,7 +112,7 @@ class HeroBanner(models.Model):
         return f"{self.title} (Order: {self.order})"
 
 
-class Auction(models.Model):
+class Auction(LoadedValuesMixin, models.Model):
     """Main auction model - represents an item being auctioned"""
 
     STATUS_CHOICES = [
@@ -230,6 +275,11 @@ class Auction(models.Model):
         blank=True
     )
 
+    # Full-text search (title A, category B, description C), maintained by
+    # auctions/search.py; its GIN index is created by migration 0022 on
+    # PostgreSQL only
+    search_vector = SearchVectorField(null=True, editable=False)
+
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -239,6 +289,8 @@ class Auction(models.Model):
         indexes = [
             models.Index(fields=['status', '-created_at']),
             models.Index(fields=['created_by', '-created_at']),
+            # Cursor pagination key (auctions/pagination.py)
+            models.Index(fields=['-created_at', '-id']),
         ]
 
     def __str__(self):
@@ -268,16 +320,37 @@ class Auction(models.Model):
             return 0
         return max(0, (self.end_time - timezone.now()).total_seconds())
 
+    def get_stats(self):
+        """Maintained counters (AuctionStats), or None if not created yet"""
+        try:
+            return self.stats
+        except ObjectDoesNotExist:
+            return None
+
     def get_participant_count(self):
         """Get total unique participants across all rounds"""
+        stats = self.get_stats()
+        if stats is not None:
+            return stats.participant_count
         return self.participations.values('user').distinct().count()
 
     def get_highest_bid(self):
-        """Get the highest valid bid"""
-        return self.bids.filter(is_valid=True).order_by('-pledge_amount').first()
+        """Get the highest valid bid (earliest on a tie), located via the maintained highest pledge"""
+        valid_bids = self.bids.filter(is_valid=True)
+        stats = self.get_stats()
+        if stats is not None:
+            if stats.highest_pledge is None:
+                return None
+            highest = valid_bids.filter(pledge_amount=stats.highest_pledge).order_by('submitted_at').first()
+            if highest is not None:
+                return highest
+        return valid_bids.order_by('-pledge_amount', 'submitted_at').first()
 
     def get_total_revenue(self):
         """Calculate total revenue from participation fees"""
+        stats = self.get_stats()
+        if stats is not None:
+            return stats.total_revenue
         return self.payments.filter(
             payment_type='participation',
             status='completed'
@@ -287,7 +360,8 @@ class Auction(models.Model):
 
     def get_current_round(self):
         """Get the active round if any"""
-        return self.rounds.filter(is_active=True).first()
+        # Explicit order: the default ('auction', ...) joins Auction and bypasses round_active_auction_idx
+        return self.rounds.filter(is_active=True).order_by('-round_number').first()
 
 
 class Round(models.Model):
@@ -338,6 +412,10 @@ class Round(models.Model):
     class Meta:
         ordering = ['auction', '-round_number']
         unique_together = ['auction', 'round_number']
+        indexes = [
+            # Active round lookup (auctions/round_cache.py, Auction.get_current_round)
+            models.Index(fields=['auction'], condition=models.Q(is_active=True), name='round_active_auction_idx'),
+        ]
 
     def __str__(self):
         return f"{self.auction.title} - Round {self.round_number}"
@@ -349,7 +427,7 @@ class Round(models.Model):
         return self.is_active and self.start_time <= now <= self.end_time
 
 
-class Participation(models.Model):
+class Participation(LoadedValuesMixin, models.Model):
     """
     Tracks users who paid the participation fee to join a bidding round
     Users must have valid participation to submit bids
@@ -380,12 +458,16 @@ class Participation(models.Model):
     class Meta:
         unique_together = ['user', 'auction', 'round']
         ordering = ['-created_at']
+        indexes = [
+            # Paid-participation check before every bid
+            models.Index(fields=['user', 'round', 'payment_status'], name='participation_user_round_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.auction.title} (Round {self.round.round_number})"
 
 
-class Bid(models.Model):
+class Bid(LoadedValuesMixin, models.Model):
     """
     Stores pledge amounts (NOT actual payments)
     Users commit to pay this amount IF they win
@@ -420,6 +502,22 @@ class Bid(models.Model):
         ordering = ['-submitted_at']
         indexes = [
             models.Index(fields=['auction', '-pledge_amount']),
+            # Round leaderboard: valid bids, highest pledge then earliest
+            models.Index(
+                fields=['round', '-pledge_amount', 'submitted_at'],
+                condition=models.Q(is_valid=True),
+                name='bid_round_valid_pledge_idx',
+            ),
+            # Cursor pagination of a user's bids (auctions/pagination.py)
+            models.Index(fields=['user', '-submitted_at', '-id']),
+        ]
+        constraints = [
+            # One live bid per user per round (see auctions/bidding.py upsert)
+            models.UniqueConstraint(
+                fields=['user', 'round'],
+                condition=models.Q(is_valid=True),
+                name='unique_valid_bid_per_user_round',
+            ),
         ]
 
     def __str__(self):
@@ -432,7 +530,165 @@ class Bid(models.Model):
         super().save(*args, **kwargs)
 
 
-class Payment(models.Model):
+class AuctionStanding(models.Model):
+    """
+    Materialised cross-round standing of one user in a multi-round auction.
+    Holds the user's latest valid pledge per round, their running total and
+    the average over ALL of the auction's rounds (skipped rounds count as 0).
+    Maintained by auctions/standings.py on bid placement and round changes.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name='standings')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='auction_standings'
+    )
+
+    # {"<round_number>": "<pledge_amount>"} for rounds the user has a valid bid in
+    round_pledges = models.JSONField(default=dict, blank=True)
+    total_pledge = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    rounds_participated = models.PositiveIntegerField(default=0)
+    total_rounds = models.PositiveIntegerField(default=0)
+    average_pledge = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['auction', 'user']
+        ordering = ['-total_pledge']
+        indexes = [
+            models.Index(fields=['auction', '-total_pledge']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.auction.title}: avg KES {self.average_pledge}"
+
+    def apply_pledge(self, round_number, pledge_amount):
+        """Set the user's pledge for a round and update the running totals"""
+        key = str(round_number)
+        previous = self.round_pledges.get(key)
+        if previous is None:
+            self.rounds_participated += 1
+        else:
+            self.total_pledge -= Decimal(previous)
+
+        pledge_amount = Decimal(str(pledge_amount)).quantize(Decimal('0.01'))
+        self.round_pledges[key] = str(pledge_amount)
+        self.total_pledge += pledge_amount
+        self.update_average()
+
+    def update_average(self):
+        if self.total_rounds:
+            self.average_pledge = (Decimal(self.total_pledge) / self.total_rounds).quantize(Decimal('0.01'))
+        else:
+            self.average_pledge = Decimal('0.00')
+
+
+# ============ DENORMALISED COUNTERS ============
+# Sidecar rows so F() counter updates never race with (or get overwritten by)
+# ordinary saves of Auction/Round/Category. Maintained by auctions/counters.py;
+# `manage.py recompute_counters` rebuilds and verifies them.
+
+class AuctionStats(models.Model):
+    """Maintained counters for an auction"""
+    auction = models.OneToOneField(Auction, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    participant_count = models.IntegerField(default=0, help_text="Unique participants across all rounds")
+    bid_count = models.IntegerField(default=0, help_text="Valid bids")
+    highest_pledge = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    total_revenue = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Completed participation fee payments"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Auction stats"
+
+    def __str__(self):
+        return f"Stats: {self.auction.title}"
+
+
+class RoundStats(models.Model):
+    """Maintained counters for a round"""
+    round = models.OneToOneField(Round, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    participant_count = models.IntegerField(default=0, help_text="Completed participations")
+    bid_count = models.IntegerField(default=0, help_text="Valid bids")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Round stats"
+
+    def __str__(self):
+        return f"Stats: {self.round}"
+
+
+class CategoryStats(models.Model):
+    """Maintained counters for a category"""
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    auction_count = models.IntegerField(default=0, help_text="Active auctions")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Category stats"
+
+    def __str__(self):
+        return f"Stats: {self.category.name}"
+
+
+# ============ REVENUE ROLLUPS ============
+# Per-day payment totals for the financial dashboard, so it sums a few
+# hundred rollup rows instead of scanning Payment / MpesaTransaction.
+# Maintained by auctions/revenue_rollups.py; `manage.py backfill_revenue_rollups`
+# rebuilds them.
+
+class DailyRevenue(models.Model):
+    """Payments of one day, grouped by (payment_type, method, status)"""
+    day = models.DateField()
+    payment_type = models.CharField(
+        max_length=20,
+        help_text="participation / final_pledge, or 'order' for M-Pesa order transactions"
+    )
+    method = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Daily revenue"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'payment_type', 'method', 'status'],
+                name='unique_daily_revenue_bucket'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.payment_type}/{self.method}/{self.status}: KES {self.total}"
+
+
+class DailyAuctionRevenue(models.Model):
+    """Completed participation fees of one auction on one day"""
+    day = models.DateField()
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name='daily_revenue')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Daily auction revenue"
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'auction'], name='unique_daily_auction_revenue'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.auction.title}: KES {self.total}"
+
+
+class Payment(LoadedValuesMixin, models.Model):
     """
     Tracks ALL financial transactions in the system
     Two types: PARTICIPATION fees (paid upfront) and FINAL_PLEDGE (paid on delivery)
@@ -479,6 +735,13 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Cursor pagination keys (auctions/pagination.py, TransactionListView)
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['user', '-created_at', '-id']),
+            # Revenue by status / type over a date range (auctions/revenue_rollups.py)
+            models.Index(fields=['status', 'payment_type', 'created_at'], name='payment_status_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.payment_type} - KES {self.amount}"
@@ -650,6 +913,11 @@ class Order(models.Model):
         verbose_name = 'Order'
         verbose_name_plural = 'Orders'
         ordering = ['-created_at']
+        indexes = [
+            # Cursor pagination keys (auctions/pagination.py)
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['user', 'payment_status', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"Order {self.order_number} - {self.user.username}"
@@ -0,0 +1,90 @@
+"""
+Keyset (cursor) pagination.
+
+Offset pagination re-reads and discards every earlier row, so deep pages
+slow down as Bid / Payment / MpesaTransaction grow. These paginators seek
+straight to the next page on the (created_at, id) / (submitted_at, id)
+composite indexes instead. Responses keep the `count` / `results` shape of
+the page-number lists they replace, with `next` / `previous` cursor links.
+The count is one COUNT(*) of the filtered list; no rows are skipped over.
+
+Existing clients that still send ?page=N (without a cursor) get the
+numbered page they asked for, in the same order, so the switch is not an
+API break; only cursor requests get the keyset behaviour.
+"""
+import base64
+import json
+
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+class NumberedPageFallback(PageNumberPagination):
+    """?page=N on a cursor-paginated list (clients written before the cursors)"""
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Newest first, for models with created_at"""
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    page_query_param = 'page'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_fallback = None
+        if self.page_query_param in request.query_params and self.cursor_query_param not in request.query_params:
+            self.page_fallback = NumberedPageFallback()
+            return self.page_fallback.paginate_queryset(queryset.order_by(*self.ordering), request, view)
+
+        self.count = queryset.order_by().count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.page_fallback is not None:
+            return self.page_fallback.get_paginated_response(data)
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def to_html(self):
+        if self.page_fallback is not None:
+            return self.page_fallback.to_html()
+        return super().to_html()
+
+
+class SubmittedAtCursorPagination(CreatedAtCursorPagination):
+    """Newest first, for bids"""
+    ordering = ('-submitted_at', '-id')
+
+
+class RelevancePagination(PageNumberPagination):
+    """Relevance-ranked search results (no stable key to seek on, so numbered pages)"""
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+# -------------------- Multi-source keyset --------------------
+
+def encode_keyset_cursor(created_at, source, pk):
+    """Opaque cursor for the last row of a page of a merged (multi-table) list"""
+    raw = json.dumps({'t': created_at.isoformat(), 's': source, 'id': str(pk)})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_keyset_cursor(cursor):
+    """Returns (created_at, source, id) or raises ValueError for a bad cursor"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        created_at = parse_datetime(data['t'])
+        source, pk = data['s'], data['id']
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+    if created_at is None or not isinstance(source, str) or not isinstance(pk, str):
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+    return created_at, source, pk
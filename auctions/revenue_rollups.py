@@ -0,0 +1,265 @@
+"""
+Daily revenue rollups for FinancialAnalyticsView.
+
+DailyRevenue holds, per local day, the total and count of payments in each
+(payment_type, method, status) bucket: auction Payments plus M-Pesa order
+transactions (payment_type 'order', method 'mpesa'). DailyAuctionRevenue
+holds completed participation fees per auction per day (top auctions).
+
+Saves move a payment between buckets with F() updates: pre_save remembers
+the bucket it was in, post_save takes it out of that one and adds it to the
+current one (e.g. pending -> completed). Bulk queryset updates skip signals:
+run `manage.py backfill_revenue_rollups` after them.
+
+The read helpers take complete days from the rollups and only the current,
+partial day from the payment tables.
+"""
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from payments.models import MpesaTransaction
+
+from .models import DailyAuctionRevenue, DailyRevenue, Payment
+
+ZERO = Decimal('0.00')
+ORDER_TYPE = 'order'
+
+TRACKED_FIELDS = {
+    Payment: ('created_at', 'payment_type', 'method', 'status', 'amount', 'auction_id'),
+    MpesaTransaction: ('created_at', 'status', 'amount'),
+}
+
+
+def day_start(day):
+    """Aware midnight (current timezone) at the start of a local day"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+# -------------------- Incremental maintenance --------------------
+
+def _buckets(model, values):
+    """Rollup rows a payment (as a dict of TRACKED_FIELDS) counts in: [(rollup model, key)]"""
+    day = timezone.localdate(values['created_at'])
+    if model is MpesaTransaction:
+        return [(DailyRevenue, {'day': day, 'payment_type': ORDER_TYPE, 'method': 'mpesa', 'status': values['status']})]
+
+    buckets = [(DailyRevenue, {
+        'day': day,
+        'payment_type': values['payment_type'],
+        'method': values['method'],
+        'status': values['status'],
+    })]
+    if values['payment_type'] == 'participation' and values['status'] == 'completed' and values['auction_id']:
+        buckets.append((DailyAuctionRevenue, {'day': day, 'auction_id': values['auction_id']}))
+    return buckets
+
+
+def _add(rollup, key, amount, count, create=True):
+    rows = rollup.objects.filter(**key)
+    updates = {'total': F('total') + amount, 'count': F('count') + count}
+    if not rows.update(**updates) and create:
+        rollup.objects.get_or_create(**key)
+        rows.update(**updates)
+
+
+def _apply(model, values, sign, create=True):
+    amount = Decimal(str(values['amount'] or 0)) * sign
+    for rollup, key in _buckets(model, values):
+        _add(rollup, key, amount, sign, create=create)
+
+
+def _values(instance):
+    return {field: getattr(instance, field) for field in TRACKED_FIELDS[type(instance)]}
+
+
+def remember(instance):
+    """pre_save: keep the row's stored bucket fields (as loaded) to move it out of in post_save"""
+    instance._rollup_previous = instance.loaded_values(TRACKED_FIELDS[type(instance)])
+
+
+def payment_saved(instance):
+    model = type(instance)
+    previous = getattr(instance, '_rollup_previous', None)
+    current = _values(instance)
+    if previous is not None:
+        if _buckets(model, previous) == _buckets(model, current) and \
+                Decimal(str(previous['amount'])) == Decimal(str(current['amount'])):
+            return
+        _apply(model, previous, -1)
+    _apply(model, current, 1)
+
+
+def payment_deleted(instance):
+    _apply(type(instance), _values(instance), -1, create=False)
+
+
+# -------------------- Backfill --------------------
+
+def backfill_rollups(start_day=None, end_day=None):
+    """
+    Rebuild the rollups from Payment / MpesaTransaction for days in
+    [start_day, end_day] (both optional). Returns the number of rows written.
+    """
+    def in_range(queryset, field):
+        if start_day is not None:
+            queryset = queryset.filter(**{f'{field}__gte': start_day})
+        if end_day is not None:
+            queryset = queryset.filter(**{f'{field}__lte': end_day})
+        return queryset
+
+    def grouped(queryset, *fields):
+        return in_range(queryset.order_by().annotate(day=TruncDate('created_at')), 'day').values(
+            'day', *fields
+        ).annotate(total=Sum('amount'), count=Count('pk'))
+
+    revenue = [
+        DailyRevenue(**row) for row in grouped(Payment.objects.all(), 'payment_type', 'method', 'status')
+    ] + [
+        DailyRevenue(payment_type=ORDER_TYPE, method='mpesa', **row)
+        for row in grouped(MpesaTransaction.objects.all(), 'status')
+    ]
+    auction_revenue = [
+        DailyAuctionRevenue(**row)
+        for row in grouped(Payment.objects.filter(payment_type='participation', status='completed'), 'auction_id')
+    ]
+
+    with transaction.atomic():
+        in_range(DailyRevenue.objects.all(), 'day').delete()
+        in_range(DailyAuctionRevenue.objects.all(), 'day').delete()
+        DailyRevenue.objects.bulk_create(revenue, batch_size=1000)
+        DailyAuctionRevenue.objects.bulk_create(auction_revenue, batch_size=1000)
+    return len(revenue) + len(auction_revenue)
+
+
+# -------------------- Reads --------------------
+
+def _merge(rows):
+    merged = {}
+    for row in rows:
+        key = (row['payment_type'], row['method'], row['status'])
+        bucket = merged.setdefault(key, {'total': ZERO, 'count': 0})
+        bucket['total'] += row['total'] or ZERO
+        bucket['count'] += row['count'] or 0
+
+    return [
+        {'payment_type': payment_type, 'method': method, 'status': status, **bucket}
+        for (payment_type, method, status), bucket in merged.items()
+    ]
+
+
+def current_day_buckets():
+    """Today's totals per (payment_type, method, status), straight from the payment tables"""
+    since = day_start(timezone.localdate())
+    rows = list(Payment.objects.filter(created_at__gte=since).order_by().values(
+        'payment_type', 'method', 'status'
+    ).annotate(total=Sum('amount'), count=Count('pk')))
+    rows += [
+        {'payment_type': ORDER_TYPE, 'method': 'mpesa', **row}
+        for row in MpesaTransaction.objects.filter(created_at__gte=since).order_by().values('status').annotate(
+            total=Sum('amount'), count=Count('pk')
+        )
+    ]
+    return _merge(rows)
+
+
+def revenue_buckets(start_day=None, status=None, current=None):
+    """
+    Totals per (payment_type, method, status) from start_day (None: all time)
+    through now, optionally for one status:
+    [{'payment_type', 'method', 'status', 'total', 'count'}]
+    current: current_day_buckets(), when the caller already has them
+    """
+    if current is None:
+        current = current_day_buckets()
+
+    rollups = DailyRevenue.objects.filter(day__lt=timezone.localdate())
+    if start_day is not None:
+        rollups = rollups.filter(day__gte=start_day)
+    if status is not None:
+        rollups = rollups.filter(status=status)
+        current = [bucket for bucket in current if bucket['status'] == status]
+
+    return _merge([
+        {'payment_type': row['payment_type'], 'method': row['method'], 'status': row['status'],
+         'total': row['day_total'], 'count': row['day_count']}
+        for row in rollups.order_by().values('payment_type', 'method', 'status').annotate(
+            day_total=Sum('total'), day_count=Sum('count')
+        )
+    ] + current)
+
+
+def sum_buckets(buckets, exclude_type=None, **match):
+    """{'total', 'count'} of the buckets whose fields equal match"""
+    total, count = ZERO, 0
+    for bucket in buckets:
+        if bucket['payment_type'] == exclude_type:
+            continue
+        if all(bucket[field] == value for field, value in match.items()):
+            total += bucket['total']
+            count += bucket['count']
+    return {'total': total, 'count': count}
+
+
+def revenue_series(start_day, period='day', current=None):
+    """
+    Completed auction payment revenue per day (or per month), oldest first:
+    [{'date' / 'month', 'revenue', 'transactions'}]
+    """
+    today = timezone.localdate()
+    if current is None:
+        current = current_day_buckets()
+    label = 'date' if period == 'day' else 'month'
+
+    rollups = DailyRevenue.objects.filter(day__gte=start_day, day__lt=today, status='completed').exclude(
+        payment_type=ORDER_TYPE
+    ).order_by()
+    if period == 'day':
+        rollups = rollups.annotate(bucket=F('day'))
+    else:
+        rollups = rollups.annotate(bucket=TruncMonth('day'))
+
+    series = {}
+    for row in rollups.values('bucket').annotate(revenue=Sum('total'), transactions=Sum('count')):
+        series[row['bucket']] = {label: row['bucket'], 'revenue': row['revenue'], 'transactions': row['transactions']}
+
+    today_totals = sum_buckets(current, exclude_type=ORDER_TYPE, status='completed')
+    if today_totals['count']:
+        bucket = today if period == 'day' else today.replace(day=1)
+        entry = series.setdefault(bucket, {label: bucket, 'revenue': ZERO, 'transactions': 0})
+        entry['revenue'] += today_totals['total']
+        entry['transactions'] += today_totals['count']
+
+    return [series[key] for key in sorted(series)]
+
+
+def top_auctions(start_day, limit=10):
+    """Auctions with the most completed participation fees since start_day"""
+    today = timezone.localdate()
+    current = list(Payment.objects.filter(
+        created_at__gte=day_start(today),
+        payment_type='participation',
+        status='completed'
+    ).order_by().values('auction__id', 'auction__title').annotate(revenue=Sum('amount'), participants=Count('pk')))
+
+    # Any auction in the final top `limit` ranks within limit + len(current) on the rollups alone
+    rollups = DailyAuctionRevenue.objects.filter(day__gte=start_day, day__lt=today).order_by().values(
+        'auction__id', 'auction__title'
+    ).annotate(revenue=Sum('total'), participants=Sum('count')).order_by('-revenue')[:limit + len(current)]
+
+    merged = {}
+    for row in list(rollups) + current:
+        entry = merged.setdefault(row['auction__id'], {
+            'auction__id': row['auction__id'],
+            'auction__title': row['auction__title'],
+            'revenue': ZERO,
+            'participants': 0,
+        })
+        entry['revenue'] += row['revenue']
+        entry['participants'] += row['participants']
+
+    return sorted(merged.values(), key=lambda entry: entry['revenue'], reverse=True)[:limit]
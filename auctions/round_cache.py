@@ -0,0 +1,78 @@
+"""
+Cached active-round and participation entitlement lookups.
+
+The bid path, AuctionDetailSerializer and AuctionConsumer all need "the
+auction's active round" (its pricing window: base/min/max pledge, fee,
+times) and "has this user paid for this round". Both are cached here:
+- active round: per auction, the Round instance with its auction loaded
+- entitlement: per (user, round), True/False
+
+Entries are dropped by the Round/Auction/Participation signals in
+auctions/signals.py (after commit) and explicitly wherever rounds are
+closed with bulk updates. Cache errors are tolerated (auctions/caching.py):
+lookups then go to the database.
+"""
+from django.conf import settings
+
+from .caching import cache_delete, cache_get, cache_set
+from .models import Participation, Round
+
+
+def _round_timeout():
+    return getattr(settings, 'ACTIVE_ROUND_CACHE_TIMEOUT', 300)
+
+
+def _entitlement_timeout():
+    return getattr(settings, 'ENTITLEMENT_CACHE_TIMEOUT', 300)
+
+
+def active_round_key(auction_id):
+    return f'auctions:active_round:{auction_id}'
+
+
+def entitlement_key(user_id, round_id):
+    return f'auctions:entitlement:{round_id}:{user_id}'
+
+
+def get_active_round(auction_id):
+    """The auction's active round (auction preloaded), or None"""
+    key = active_round_key(auction_id)
+    current_round = cache_get(key)
+    if current_round is not None:
+        return current_round
+
+    current_round = Round.objects.filter(
+        auction_id=auction_id,
+        is_active=True
+    ).select_related('auction').order_by('-round_number').first()
+
+    if current_round is not None:
+        cache_set(key, current_round, _round_timeout())
+    return current_round
+
+
+def has_entitlement(user_id, round_id):
+    """Whether the user has a completed participation for the round"""
+    if not user_id or not round_id:
+        return False
+
+    key = entitlement_key(user_id, round_id)
+    entitled = cache_get(key)
+    if entitled is not None:
+        return entitled
+
+    entitled = Participation.objects.filter(
+        user_id=user_id,
+        round_id=round_id,
+        payment_status='completed'
+    ).exists()
+    cache_set(key, entitled, _entitlement_timeout())
+    return entitled
+
+
+def invalidate_active_round(auction_id):
+    cache_delete(active_round_key(auction_id))
+
+
+def invalidate_entitlement(user_id, round_id):
+    cache_delete(entitlement_key(user_id, round_id))
@@ -0,0 +1,187 @@
+"""
+Full-text search over auctions / products.
+
+On PostgreSQL every Auction carries a maintained search_vector:
+title (weight A), category name (B) and description (C), GIN-indexed by
+migration 0022. Queries use websearch syntax ("red phone", -case, "or")
+and can be ranked with ts_rank.
+
+Other databases (SQLite in tests / local dev) fall back to the old
+case-insensitive LIKE search over the same fields, unranked.
+
+The vectors are kept current by receivers in auctions/signals.py. An
+Auction save whose title, description or category changed (or an insert)
+writes the new vector in the same INSERT/UPDATE; other saves leave it
+alone, so there is no extra query per save. A Category rename updates its
+auctions in one UPDATE. `manage.py rebuild_search_vectors` rebuilds them
+after bulk updates.
+
+autocomplete() serves the search box typeahead: substring matches on
+Auction.title / Category.name (pg_trgm GIN indexes from migration 0023 on
+PostgreSQL), ordered by trigram word similarity, cached per typed prefix
+for AUTOCOMPLETE_CACHE_TIMEOUT seconds.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, TextField, Value, When
+
+from . import caching
+from .models import Auction, Category
+
+SEARCH_CONFIG = 'english'
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_LIMIT = 8
+
+
+def full_text_enabled():
+    return connection.vendor == 'postgresql'
+
+
+def _vector(title, category_name, description):
+    return (
+        SearchVector(title, weight='A', config=SEARCH_CONFIG) +
+        SearchVector(category_name, weight='B', config=SEARCH_CONFIG) +
+        SearchVector(description, weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def _text(value):
+    return Value(value or '', output_field=TextField())
+
+
+VECTOR_SOURCE_FIELDS = ('title', 'description', 'category_id')
+
+
+def _auction_vector(auction):
+    category_name = auction.category.name if auction.category_id else ''
+    return _vector(_text(auction.title), _text(category_name), _text(auction.description))
+
+
+def prepare_auction_vector(auction, update_fields=None, raw=False):
+    """
+    pre_save: if the searchable fields changed, put the new search_vector into
+    the save itself. Saves limited by update_fields (and fixture loads) are
+    caught up in finish_auction_vector instead.
+    """
+    auction._search_vector_stale = False
+    if not full_text_enabled():
+        return
+    previous = auction.loaded_values(VECTOR_SOURCE_FIELDS)
+    if previous is not None and all(previous[field] == getattr(auction, field) for field in VECTOR_SOURCE_FIELDS):
+        return
+
+    if update_fields is None and not raw:
+        auction.search_vector = _auction_vector(auction)
+    else:
+        auction._search_vector_stale = True
+
+
+def finish_auction_vector(auction):
+    """post_save: complete prepare_auction_vector"""
+    if auction._search_vector_stale:
+        update_auction_vector(auction)
+    if hasattr(auction.__dict__.get('search_vector'), 'resolve_expression'):
+        # The saved expression is not a value: defer the field so it is reloaded if read
+        del auction.__dict__['search_vector']
+
+
+def update_auction_vector(auction):
+    """Refresh one auction's search_vector from its in-memory values"""
+    if not full_text_enabled():
+        return
+    Auction.objects.filter(pk=auction.pk).update(search_vector=_auction_vector(auction))
+
+
+def update_category_vectors(category):
+    """Refresh the vectors of a category's auctions (e.g. after a rename)"""
+    if not full_text_enabled():
+        return
+    Auction.objects.filter(category=category).update(
+        search_vector=_vector(F('title'), _text(category.name), F('description'))
+    )
+
+
+def rebuild_vectors():
+    """Recompute every auction's search_vector. Returns the number of auctions updated."""
+    if not full_text_enabled():
+        return 0
+    updated = Auction.objects.filter(category__isnull=True).update(
+        search_vector=_vector(F('title'), _text(''), F('description'))
+    )
+    for category in Category.objects.only('pk', 'name').iterator():
+        updated += Auction.objects.filter(category=category).update(
+            search_vector=_vector(F('title'), _text(category.name), F('description'))
+        )
+    return updated
+
+
+def search_auctions(queryset, query, ranked=False):
+    """
+    Filter an Auction queryset by a search string. ranked=True orders the
+    matches by relevance (then newest), annotated as search_rank.
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    if not full_text_enabled():
+        matches = queryset.filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(category__name__icontains=query)
+        )
+        return matches.order_by('-created_at') if ranked else matches
+
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    matches = queryset.filter(search_vector=search_query)
+    if ranked:
+        matches = matches.annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', '-created_at')
+    return matches
+
+
+# -------------------- Autocomplete --------------------
+
+def _ranked_matches(queryset, field, query):
+    """Substring matches, most similar first (prefix matches first without pg_trgm)"""
+    matches = queryset.filter(**{f'{field}__icontains': query})
+    if full_text_enabled():
+        return matches.annotate(
+            similarity=TrigramWordSimilarity(query, field)
+        ).order_by('-similarity', field)
+    return matches.annotate(
+        is_prefix=Case(When(**{f'{field}__istartswith': query}, then=0), default=1, output_field=IntegerField())
+    ).order_by('is_prefix', field)
+
+
+def _suggest(query):
+    auctions = _ranked_matches(Auction.objects.filter(status='active'), 'title', query)
+    categories = _ranked_matches(Category.objects.filter(is_active=True), 'name', query)
+    return {
+        'auctions': [
+            {'id': str(row['id']), 'title': row['title'], 'category_slug': row['category__slug']}
+            for row in auctions.values('id', 'title', 'category__slug')[:AUTOCOMPLETE_LIMIT]
+        ],
+        'categories': [
+            {'id': str(row['id']), 'name': row['name'], 'slug': row['slug']}
+            for row in categories.values('id', 'name', 'slug')[:AUTOCOMPLETE_LIMIT]
+        ],
+    }
+
+
+def autocomplete(query):
+    """Typeahead suggestions: {'auctions': [{id, title, category_slug}], 'categories': [{id, name, slug}]}"""
+    query = ' '.join((query or '').split()).lower()
+    if len(query) < AUTOCOMPLETE_MIN_LENGTH:
+        return {'auctions': [], 'categories': []}
+
+    key = caching.make_key('autocomplete', hashlib.md5(query.encode()).hexdigest())
+    return caching.get_or_set(
+        key,
+        lambda: _suggest(query),
+        timeout=getattr(settings, 'AUTOCOMPLETE_CACHE_TIMEOUT', 30)
+    )
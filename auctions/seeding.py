@@ -0,0 +1,306 @@
+"""
+Synthetic marketplace data for benchmarks and local load testing.
+
+Rows are written with bulk_create in batches, so model save() and signals
+are skipped: counters, standings, leaderboards, revenue rollups, search
+vectors and cached pages are NOT maintained while seeding.
+rebuild_derived_data() brings them up to date afterwards.
+
+Every seeded username starts with a per-run prefix ('load_<hex>_'), so runs
+never collide with each other or with real accounts.
+
+    summary = seed_marketplace(users=2000, auctions=100, orders=5000)
+    summary['bids']   # rows created
+    rebuild_derived_data()
+"""
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from payments.models import MpesaTransaction
+
+from . import counters, dashboard_stats, facets, homepage, revenue_rollups, search
+from .leaderboard import get_leaderboard_store
+from .models import Auction, Bid, Order, OrderItem, Participation, Payment, Round
+from .standings import rebuild_standings
+
+SEED_PASSWORD = 'load-test-password'
+PAYMENT_DAYS = 90
+
+
+def _batches(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _insert(model, rows, batch_size):
+    for batch in _batches(rows, batch_size):
+        model.objects.bulk_create(batch, batch_size=batch_size)
+    return len(rows)
+
+
+def seed_users(count, prefix, batch_size=2000):
+    """Create buyer accounts '<prefix><n>' (password SEED_PASSWORD); returns their ids"""
+    password = make_password(SEED_PASSWORD)
+    User = get_user_model()
+    users = [
+        User(
+            username=f'{prefix}{n}',
+            email=f'{prefix}{n}@example.com',
+            password=password,
+            phone_number=f'2547{n % 100000000:08d}',
+        )
+        for n in range(count)
+    ]
+    _insert(User, users, batch_size)
+    return list(User.objects.filter(username__startswith=prefix).values_list('id', flat=True))
+
+
+def _new_prefix():
+    return f'load_{uuid.uuid4().hex[:6]}_'
+
+
+def seed_auctions(count, creator_id, rng, batch_size=2000, title_prefix='Load test', product_type='auction'):
+    """Active, currently open auctions (or buy_now products); returns the created Auction objects"""
+    now = timezone.now()
+    auctions = [
+        Auction(
+            title=f'{title_prefix} {product_type} product {n}',
+            description='Synthetic product for load testing',
+            base_price=Decimal(rng.randrange(500, 50000)),
+            participation_fee=Decimal(rng.choice([50, 100, 200])),
+            product_type=product_type,
+            buy_now_price=Decimal(rng.randrange(500, 50000)) if product_type == 'buy_now' else None,
+            stock_quantity=rng.randrange(10, 1000),
+            status='active',
+            start_time=now - timedelta(hours=rng.randrange(1, 48)),
+            end_time=now + timedelta(hours=rng.randrange(1, 72)),
+            created_by_id=creator_id,
+        )
+        for n in range(count)
+    ]
+    _insert(Auction, auctions, batch_size)
+    return auctions
+
+
+def _spread_created_at(model, ids, rng, days, batch_size):
+    """auto_now_add stamps every bulk row with now: move rows onto random past days"""
+    if not ids:
+        return
+    by_day = {}
+    for pk in ids:
+        by_day.setdefault(rng.randrange(days), []).append(pk)
+    now = timezone.now()
+    for day, day_ids in by_day.items():
+        for batch in _batches(day_ids, batch_size):
+            model.objects.filter(pk__in=batch).update(created_at=now - timedelta(days=day))
+
+
+def seed_rounds_and_bids(auction_objs, user_ids, rng, rounds_per_auction=3, participants_per_round=100,
+                         completed_ratio=0.9, batch_size=2000):
+    """
+    Rounds of the given auctions with participations, participation-fee
+    payments and bids. The last round of each auction is active; bids of
+    earlier rounds are invalid, as after an admin starts a new round.
+    Returns {'rounds', 'participations', 'payments', 'bids'}.
+    """
+    now = timezone.now()
+
+    rounds = []
+    for auction in auction_objs:
+        for number in range(1, rounds_per_auction + 1):
+            rounds.append(Round(
+                auction=auction,
+                round_number=number,
+                base_price=auction.base_price,
+                participation_fee=auction.participation_fee,
+                start_time=auction.start_time,
+                end_time=auction.end_time,
+                is_active=number == rounds_per_auction,
+            ))
+    _insert(Round, rounds, batch_size)
+
+    participations, payments, bids = [], [], []
+    per_round = min(participants_per_round, len(user_ids))
+    for round_obj in rounds:
+        for user_id in rng.sample(user_ids, per_round):
+            completed = rng.random() < completed_ratio
+            participations.append(Participation(
+                user_id=user_id,
+                auction_id=round_obj.auction_id,
+                round=round_obj,
+                fee_paid=round_obj.participation_fee,
+                payment_status='completed' if completed else 'pending',
+                paid_at=now if completed else None,
+            ))
+            payments.append(Payment(
+                user_id=user_id,
+                auction_id=round_obj.auction_id,
+                payment_type='participation',
+                amount=round_obj.participation_fee,
+                method='mpesa',
+                status='completed' if completed else rng.choice(['pending', 'failed']),
+                completed_at=now if completed else None,
+            ))
+            if completed:
+                bids.append(Bid(
+                    user_id=user_id,
+                    auction_id=round_obj.auction_id,
+                    round=round_obj,
+                    pledge_amount=round_obj.base_price + Decimal(rng.randrange(0, 10000)),
+                    is_valid=round_obj.is_active,
+                ))
+
+    _insert(Participation, participations, batch_size)
+    _insert(Payment, payments, batch_size)
+    _spread_created_at(Payment, [payment.pk for payment in payments], rng, PAYMENT_DAYS, batch_size)
+    _insert(Bid, bids, batch_size)
+
+    return {
+        'rounds': len(rounds),
+        'participations': len(participations),
+        'payments': len(payments),
+        'bids': len(bids),
+    }
+
+
+def seed_bidding_data(users=1000, auctions=50, rounds_per_auction=3, participants_per_round=100,
+                      completed_ratio=0.9, batch_size=2000, seed=None):
+    """
+    New users and auctions, with rounds, participations, payments and bids
+    (see seed_rounds_and_bids).
+    Returns {'prefix', 'users', 'auctions', 'rounds', 'participations', 'payments', 'bids'}.
+    """
+    rng = random.Random(seed)
+    prefix = _new_prefix()
+    user_ids = seed_users(users, prefix, batch_size=batch_size)
+    auction_objs = seed_auctions(auctions, user_ids[0], rng, batch_size=batch_size)
+    summary = seed_rounds_and_bids(
+        auction_objs, user_ids, rng,
+        rounds_per_auction=rounds_per_auction,
+        participants_per_round=participants_per_round,
+        completed_ratio=completed_ratio,
+        batch_size=batch_size,
+    )
+    return {'prefix': prefix, 'users': len(user_ids), 'auctions': len(auction_objs), **summary}
+
+
+def seed_orders(count, user_ids, products, prefix, rng, paid_ratio=0.7, batch_size=2000):
+    """
+    Buy-now orders of 1-3 products each, with one M-Pesa STK transaction per
+    order (completed for paid orders, pending / failed / cancelled otherwise).
+    Returns {'orders', 'order_items', 'mpesa_transactions'}.
+    """
+    if not count or not products:
+        return {'orders': 0, 'order_items': 0, 'mpesa_transactions': 0}
+
+    now = timezone.now()
+    # order_number is max 20 chars: 'LD<hex>-<n>'
+    run = prefix.split('_')[1]
+    orders, items, transactions = [], [], []
+    for n in range(count):
+        user_id = rng.choice(user_ids)
+        picked = rng.sample(products, min(len(products), rng.randrange(1, 4)))
+        lines = [(product, rng.randrange(1, 4)) for product in picked]
+        subtotal = sum(product.buy_now_price * quantity for product, quantity in lines)
+        shipping_fee = Decimal(rng.choice([0, 200, 350]))
+        paid = rng.random() < paid_ratio
+        phone = f'2547{rng.randrange(10 ** 8):08d}'
+
+        order = Order(
+            user_id=user_id,
+            order_number=f'LD{run}-{n}',
+            status=rng.choice(['paid', 'processing', 'shipped', 'delivered'] if paid else ['pending', 'cancelled']),
+            subtotal=subtotal,
+            shipping_fee=shipping_fee,
+            total_amount=subtotal + shipping_fee,
+            shipping_name=f'Load Tester {n}',
+            shipping_phone=phone,
+            shipping_address='1 Synthetic Lane',
+            shipping_city=rng.choice(['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru']),
+            payment_status='completed' if paid else 'pending',
+            paid_at=now if paid else None,
+        )
+        orders.append(order)
+        items.extend(
+            OrderItem(order=order, product=product, product_title=product.title,
+                      product_price=product.buy_now_price, quantity=quantity)
+            for product, quantity in lines
+        )
+        transactions.append(MpesaTransaction(
+            user_id=user_id,
+            order=order,
+            phone_number=phone,
+            amount=order.total_amount,
+            account_reference=order.order_number,
+            transaction_desc=f'Payment for {order.order_number}',
+            checkout_request_id=f'ws_CO_LD{run}_{n}',
+            mpesa_receipt_number=f'LD{run.upper()}{n}' if paid else None,
+            transaction_date=now if paid else None,
+            result_code=0 if paid else 1032,
+            status='completed' if paid else rng.choice(['pending', 'failed', 'cancelled']),
+        ))
+
+    _insert(Order, orders, batch_size)
+    _insert(OrderItem, items, batch_size)
+    _insert(MpesaTransaction, transactions, batch_size)
+    _spread_created_at(Order, [order.pk for order in orders], rng, PAYMENT_DAYS, batch_size)
+    _spread_created_at(MpesaTransaction, [transaction.pk for transaction in transactions], rng, PAYMENT_DAYS, batch_size)
+
+    return {'orders': len(orders), 'order_items': len(items), 'mpesa_transactions': len(transactions)}
+
+
+def seed_marketplace(users=1000, auctions=50, buy_now_products=50, rounds_per_auction=3,
+                     participants_per_round=100, orders=1000, batch_size=2000, seed=None):
+    """
+    A full synthetic marketplace: users, auctions with rounds / participations /
+    payments / bids, buy-now products with orders and M-Pesa transactions.
+    Returns the prefix and the number of rows created per kind.
+    """
+    rng = random.Random(seed)
+    prefix = _new_prefix()
+    user_ids = seed_users(users, prefix, batch_size=batch_size)
+    auction_objs = seed_auctions(auctions, user_ids[0], rng, batch_size=batch_size)
+    products = seed_auctions(buy_now_products, user_ids[0], rng, batch_size=batch_size, product_type='buy_now')
+
+    summary = {'prefix': prefix, 'users': len(user_ids), 'auctions': len(auction_objs), 'buy_now_products': len(products)}
+    summary.update(seed_rounds_and_bids(
+        auction_objs, user_ids, rng,
+        rounds_per_auction=rounds_per_auction,
+        participants_per_round=participants_per_round,
+        batch_size=batch_size,
+    ))
+    summary.update(seed_orders(orders, user_ids, products, prefix, rng, batch_size=batch_size))
+    return summary
+
+
+def rebuild_derived_data(prefix=None):
+    """
+    Bring everything seeding skipped up to date: counters, standings and
+    leaderboards (of the auctions created by the run with this prefix, or
+    all), revenue rollups, search vectors and the cached pages / stats.
+    """
+    counters.recompute_counters()
+
+    auctions = Auction.objects.filter(product_type__in=['auction', 'both'])
+    if prefix:
+        auctions = auctions.filter(created_by__username__startswith=prefix)
+    store = get_leaderboard_store()
+    for auction_id in auctions.values_list('id', flat=True).iterator():
+        rebuild_standings(auction_id)
+    for round_obj in Round.objects.filter(auction__in=auctions, is_active=True).select_related('auction').iterator():
+        store.rebuild(round_obj)
+
+    revenue_rollups.backfill_rollups()
+    search.rebuild_vectors()
+
+    for name in ('orders', 'users', 'auctions'):
+        dashboard_stats.invalidate_stats(name)
+    homepage.invalidate_products()
+    homepage.invalidate_categories()
+    facets.invalidate_facets()
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.utils import timezone
 from .models import Category, Auction, Round, Participation, Bid, Payment, Cart, CartItem, Order, OrderItem, ProductImage, HeroBanner, SpecialOfferBanner
 from accounts.models import User
+from .detail_loader import load_auction_detail, detail_rounds_prefetch
 
 
 
@@ -19,6 +20,9 @@ class CategorySerializer(serializers.ModelSerializer):
 
     def get_auction_count(self, obj):
         """Count active auctions in this category"""
+        stats = getattr(obj, 'stats', None)
+        if stats is not None:
+            return stats.auction_count
         return obj.auctions.filter(status='active').count()
 
 
@@ -175,6 +179,8 @@ class ParticipantDetailSerializer(serializers.ModelSerializer):
 
     def get_pledge_amount(self, obj):
         """Return latest valid pledge for this participant in the round"""
+        if hasattr(obj, 'latest_pledge'):
+            return obj.latest_pledge if obj.latest_pledge is not None else 0
         latest_bid = obj.round.bids.filter(user=obj.user, is_valid=True).order_by('-submitted_at').first()
         return latest_bid.pledge_amount if latest_bid else 0
 
@@ -199,9 +205,15 @@ class RoundSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
     def get_participant_count(self, obj):
+        stats = getattr(obj, 'stats', None)
+        if stats is not None:
+            return stats.participant_count
         return obj.participations.filter(payment_status='completed').count()
 
     def get_bid_count(self, obj):
+        stats = getattr(obj, 'stats', None)
+        if stats is not None:
+            return stats.bid_count
         return obj.bids.filter(is_valid=True).count()
 
 
@@ -242,10 +254,22 @@ class AuctionListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Join the maintained counters (AuctionStats, see auctions/counters.py)
+        so a page renders in a constant number of queries instead of two per
+        auction
+        """
+        return queryset.select_related('category', 'created_by', 'stats')
+
     def get_participant_count(self, obj):
         return obj.get_participant_count()
 
     def get_highest_bid(self, obj):
+        stats = obj.get_stats()
+        if stats is not None:
+            return stats.highest_pledge
         highest = obj.get_highest_bid()
         return highest.pledge_amount if highest else None
 
@@ -326,27 +350,38 @@ class AuctionDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_by', 'winner', 'winning_amount', 'created_at', 'updated_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Prefetch images and nested rounds (see auctions/detail_loader.py)"""
+        return queryset.select_related('category', 'created_by', 'winner', 'stats').prefetch_related(
+            'images', detail_rounds_prefetch()
+        )
+
+    def get_detail(self, obj):
+        """Batched per-request data for the method fields (see auctions/detail_loader.py)"""
+        loaded = self.context.setdefault('auction_detail', {})
+        if obj.pk not in loaded:
+            request = self.context.get('request')
+            loaded[obj.pk] = load_auction_detail(obj, request.user if request else None)
+        return loaded[obj.pk]
+
     def get_current_round(self, obj):
-        current = obj.get_current_round()
+        current = self.get_detail(obj)['current_round']
         if current:
+            # Reuse the prefetched (annotated) round when the rounds were eager loaded
+            if 'rounds' in getattr(obj, '_prefetched_objects_cache', {}):
+                current = next((r for r in obj.rounds.all() if r.pk == current.pk), current)
             return RoundSerializer(current).data
         return None
 
     def get_participant_count(self, obj):
-        return obj.get_participant_count()
+        return self.get_detail(obj)['participant_count']
 
     def get_total_revenue(self, obj):
-        return str(obj.get_total_revenue())
+        return str(self.get_detail(obj)['total_revenue'])
 
     def get_highest_bid(self, obj):
-        highest = obj.get_highest_bid()
-        if highest:
-            return {
-                'amount': str(highest.pledge_amount),
-                'user': highest.user.username,
-                'submitted_at': highest.submitted_at
-            }
-        return None
+        return self.get_detail(obj)['highest_bid']
 
     def get_background_music_url(self, obj):
         """Get full URL for background music file"""
@@ -367,37 +402,11 @@ class AuctionDetailSerializer(serializers.ModelSerializer):
 
     def get_user_has_participated(self, obj):
         """Check if current user has participated in current round"""
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-
-        current_round = obj.get_current_round()
-        if not current_round:
-            return False
-
-        return Participation.objects.filter(
-            user=request.user,
-            round=current_round,
-            payment_status='completed'
-        ).exists()
+        return self.get_detail(obj)['user_has_participated']
 
     def get_user_highest_bid(self, obj):
         """Get current user's highest bid in current round"""
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return None
-
-        current_round = obj.get_current_round()
-        if not current_round:
-            return None
-
-        user_bid = Bid.objects.filter(
-            user=request.user,
-            round=current_round,
-            is_valid=True
-        ).order_by('-pledge_amount').first()
-
-        return str(user_bid.pledge_amount) if user_bid else None
+        return self.get_detail(obj)['user_highest_bid']
 
 
 class AuctionCreateSerializer(serializers.ModelSerializer):
@@ -1,8 +1,14 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from decimal import Decimal
-from .models import Auction, Round
+from .models import (
+    Auction, Round, Bid, Participation, Payment, Category, Order, HeroBanner, RoundStats, CategoryStats,
+)
+from django.contrib.auth import get_user_model
+from payments.models import MpesaTransaction
+from . import counters, dashboard_stats, facets, homepage, leaderboard, revenue_rollups, round_cache, search, standings
 
 
 @receiver(post_save, sender=Auction)
@@ -20,3 +26,249 @@ def create_first_round(sender, instance, created, **kwargs):
             end_time=timezone.now() + timezone.timedelta(hours=2),  # You can change this duration
             is_active=True,
         )
+
+
+def deleted_with_auction(origin):
+    """
+    True when a row is being deleted because its auction is (cascade).
+    Having post_delete receivers at all stops Django from fast-deleting bids,
+    participations, payments and rounds, so they come through one by one; their
+    stats, standings and leaderboards go with the auction, so skip the per-row
+    bookkeeping queries for them.
+    """
+    return isinstance(origin, Auction) or getattr(origin, 'model', None) is Auction
+
+
+@receiver(post_save, sender=Bid)
+def update_leaderboard_on_bid_save(sender, instance, **kwargs):
+    """Keep the round leaderboard in step with saved bids (applied on commit)"""
+    leaderboard.record_bid(instance)
+
+
+@receiver(post_delete, sender=Bid)
+def update_leaderboard_on_bid_delete(sender, instance, origin=None, **kwargs):
+    """Drop deleted bids from the round leaderboard (applied on commit)"""
+    if not deleted_with_auction(origin):
+        leaderboard.discard_bid(instance)
+
+
+@receiver([post_save, post_delete], sender=Round)
+def evict_leaderboard_on_round_close(sender, instance, **kwargs):
+    """A closed (or deleted) round no longer needs its leaderboard kept in memory"""
+    if not instance.is_active or kwargs.get('signal') is post_delete:
+        leaderboard.evict_round(instance.id)
+
+
+def invalidate_now_and_on_commit(invalidate):
+    """
+    Drop a cache entry immediately and again once the transaction commits,
+    so a concurrent read can't re-cache the pre-commit value
+    """
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+@receiver([post_save, post_delete], sender=Round)
+def invalidate_active_round_on_round_change(sender, instance, **kwargs):
+    """Drop the auction's cached active round"""
+    invalidate_now_and_on_commit(lambda: round_cache.invalidate_active_round(instance.auction_id))
+
+
+@receiver(post_save, sender=Auction)
+def invalidate_active_round_on_auction_change(sender, instance, created, **kwargs):
+    """The cached round carries its auction (status, title), so refresh it too"""
+    if not created:
+        invalidate_now_and_on_commit(lambda: round_cache.invalidate_active_round(instance.id))
+
+
+@receiver([post_save, post_delete], sender=Participation)
+def invalidate_entitlement_on_participation_change(sender, instance, **kwargs):
+    """
+    Payment status changes (including the M-Pesa callbacks, which save the
+    Participation inside their own transaction) refresh the user's entitlement
+    """
+    invalidate_now_and_on_commit(
+        lambda: round_cache.invalidate_entitlement(instance.user_id, instance.round_id)
+    )
+
+
+@receiver(post_save, sender=Bid)
+def refresh_standing_on_bid_save(sender, instance, **kwargs):
+    """Bids saved through the ORM (admin, scripts) refresh the user's standing"""
+    standings.refresh_user_standing(instance.auction_id, instance.user_id)
+
+
+@receiver(post_delete, sender=Bid)
+def refresh_standing_on_bid_delete(sender, instance, origin=None, **kwargs):
+    if not deleted_with_auction(origin):
+        standings.refresh_user_standing(instance.auction_id, instance.user_id, create=False)
+
+
+@receiver([post_save, post_delete], sender=Round)
+def rebuild_standings_on_round_change(sender, instance, created=False, origin=None, **kwargs):
+    """
+    A new (or removed) round changes every user's average, and new rounds
+    usually come with bulk bid invalidation, so rebuild the auction's standings
+    """
+    if deleted_with_auction(origin):
+        return
+    if created or kwargs.get('signal') is post_delete:
+        auction_id = instance.auction_id
+        transaction.on_commit(lambda: standings.rebuild_standings(auction_id))
+
+
+@receiver(post_save, sender=Participation)
+def add_standing_on_participation(sender, instance, **kwargs):
+    """Paid participants are listed in the standings even before they bid"""
+    if instance.payment_status == 'completed':
+        standings.ensure_standing(instance.auction_id, instance.user_id)
+
+
+# ============ DENORMALISED COUNTERS (auctions/counters.py) ============
+
+@receiver(pre_save, sender=Bid)
+@receiver(pre_save, sender=Participation)
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=Auction)
+def remember_counter_fields(sender, instance, **kwargs):
+    """Keep the previous values so post_save can apply the difference"""
+    counters.remember(instance)
+
+
+@receiver(post_save, sender=Bid)
+def update_counters_on_bid_save(sender, instance, **kwargs):
+    counters.bid_saved(instance)
+
+
+@receiver(post_delete, sender=Bid)
+def update_counters_on_bid_delete(sender, instance, origin=None, **kwargs):
+    if not deleted_with_auction(origin):
+        counters.bid_deleted(instance)
+
+
+@receiver(post_save, sender=Participation)
+def update_counters_on_participation_save(sender, instance, created, **kwargs):
+    counters.participation_saved(instance, created)
+
+
+@receiver(post_delete, sender=Participation)
+def update_counters_on_participation_delete(sender, instance, origin=None, **kwargs):
+    if not deleted_with_auction(origin):
+        counters.participation_deleted(instance)
+
+
+@receiver(post_save, sender=Payment)
+def update_counters_on_payment_save(sender, instance, **kwargs):
+    counters.payment_saved(instance)
+
+
+@receiver(post_delete, sender=Payment)
+def update_counters_on_payment_delete(sender, instance, origin=None, **kwargs):
+    if not deleted_with_auction(origin):
+        counters.payment_deleted(instance)
+
+
+@receiver(post_save, sender=Auction)
+def update_counters_on_auction_save(sender, instance, created, **kwargs):
+    counters.auction_saved(instance, created)
+
+
+@receiver(post_delete, sender=Auction)
+def update_counters_on_auction_delete(sender, instance, **kwargs):
+    counters.auction_deleted(instance)
+
+
+@receiver(post_save, sender=Round)
+def create_round_stats(sender, instance, created, **kwargs):
+    if created:
+        RoundStats.objects.get_or_create(round=instance)
+
+
+@receiver(post_save, sender=Category)
+def create_category_stats(sender, instance, created, **kwargs):
+    if created:
+        CategoryStats.objects.get_or_create(category=instance)
+
+
+# ============ REVENUE ROLLUPS (auctions/revenue_rollups.py) ============
+
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=MpesaTransaction)
+def remember_rollup_bucket(sender, instance, **kwargs):
+    """Keep the bucket the payment was in so post_save can move it"""
+    revenue_rollups.remember(instance)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=MpesaTransaction)
+def update_rollups_on_payment_save(sender, instance, **kwargs):
+    revenue_rollups.payment_saved(instance)
+
+
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=MpesaTransaction)
+def update_rollups_on_payment_delete(sender, instance, **kwargs):
+    revenue_rollups.payment_deleted(instance)
+
+
+# ============ DASHBOARD STATS (auctions/dashboard_stats.py) ============
+
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_order_stats(sender, instance, **kwargs):
+    invalidate_now_and_on_commit(lambda: dashboard_stats.invalidate_stats('orders'))
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_user_stats(sender, instance, **kwargs):
+    invalidate_now_and_on_commit(lambda: dashboard_stats.invalidate_stats('users'))
+
+
+@receiver([post_save, post_delete], sender=Auction)
+@receiver([post_save, post_delete], sender=Payment)
+@receiver([post_save, post_delete], sender=Participation)
+def invalidate_auction_stats(sender, instance, **kwargs):
+    invalidate_now_and_on_commit(lambda: dashboard_stats.invalidate_stats('auctions'))
+
+
+# ============ HOMEPAGE FEED (auctions/homepage.py) ============
+
+@receiver([post_save, post_delete], sender=Auction)
+def invalidate_homepage_products(sender, instance, **kwargs):
+    invalidate_now_and_on_commit(homepage.invalidate_products)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_homepage_categories(sender, instance, **kwargs):
+    invalidate_now_and_on_commit(homepage.invalidate_categories)
+
+
+@receiver([post_save, post_delete], sender=HeroBanner)
+def invalidate_homepage_banners(sender, instance, **kwargs):
+    invalidate_now_and_on_commit(homepage.invalidate_banners)
+
+
+# ============ SEARCH VECTORS (auctions/search.py) ============
+
+@receiver(pre_save, sender=Auction)
+def prepare_search_vector_on_auction_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Write a changed auction's search_vector as part of its own INSERT/UPDATE"""
+    search.prepare_auction_vector(instance, update_fields, raw)
+
+
+@receiver(post_save, sender=Auction)
+def update_search_vector_on_auction_save(sender, instance, **kwargs):
+    search.finish_auction_vector(instance)
+
+
+@receiver(post_save, sender=Category)
+def update_search_vectors_on_category_save(sender, instance, created, **kwargs):
+    if not created:
+        search.update_category_vectors(instance)
+
+
+# ============ BROWSE FACETS (auctions/facets.py) ============
+
+@receiver([post_save, post_delete], sender=Auction)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_browse_facets(sender, instance, **kwargs):
+    invalidate_now_and_on_commit(facets.invalidate_facets)
@@ -0,0 +1,199 @@
+"""
+Cross-round standings for multi-round auctions.
+
+A user's standing is their latest valid pledge in each round; the winner
+has the highest average over ALL rounds (rounds they skipped count as 0),
+which ranks the same as the highest total.
+
+Standings are materialised in AuctionStanding so round close and winner
+queries are index reads:
+- record_pledge: incremental update on bid placement (row-locked)
+- refresh_user_standing: one user's row from the Bid table (ORM bid saves)
+- rebuild_standings: the whole auction, set-based (round created, bulk
+  bid invalidation, backfill)
+
+The set-based rebuild picks the latest bid per (user, round) with a
+NOT EXISTS (newer valid bid) filter, so it costs a fixed number of
+queries however many users and rounds the auction has.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import AuctionStanding, Bid, Participation, Round
+
+ZERO = Decimal('0.00')
+
+
+def latest_round_bids(auction_id):
+    """Each user's latest valid bid in every round of the auction"""
+    newer_bid = Bid.objects.filter(
+        user=OuterRef('user'),
+        round=OuterRef('round'),
+        is_valid=True,
+        submitted_at__gt=OuterRef('submitted_at')
+    )
+    return Bid.objects.filter(auction_id=auction_id, is_valid=True).exclude(Exists(newer_bid))
+
+
+def _new_standing(auction_id, user_id, total_rounds, round_pledges=None):
+    standing = AuctionStanding(
+        auction_id=auction_id,
+        user_id=user_id,
+        total_rounds=total_rounds,
+        round_pledges={},
+    )
+    for round_number, pledge_amount in (round_pledges or {}).items():
+        standing.apply_pledge(round_number, pledge_amount)
+    standing.update_average()
+    return standing
+
+
+def rebuild_standings(auction_id):
+    """Recompute every standing of an auction from the Bid table"""
+    total_rounds = Round.objects.filter(auction_id=auction_id).count()
+
+    pledges = {}
+    rows = latest_round_bids(auction_id).order_by().values_list(
+        'user_id', 'round__round_number', 'pledge_amount'
+    )
+    for user_id, round_number, pledge_amount in rows.iterator():
+        pledges.setdefault(user_id, {})[round_number] = pledge_amount
+
+    participants = Participation.objects.filter(
+        auction_id=auction_id,
+        payment_status='completed'
+    ).values_list('user_id', flat=True).distinct()
+    for user_id in participants.iterator():
+        pledges.setdefault(user_id, {})
+
+    with transaction.atomic():
+        AuctionStanding.objects.filter(auction_id=auction_id).delete()
+        AuctionStanding.objects.bulk_create([
+            _new_standing(auction_id, user_id, total_rounds, round_pledges)
+            for user_id, round_pledges in pledges.items()
+        ], batch_size=1000)
+
+    return len(pledges)
+
+
+def refresh_user_standing(auction_id, user_id, create=True):
+    """
+    Recompute one user's standing (after a bid was saved/invalidated via the
+    ORM). With create=False only an existing row is updated; a row left with
+    no valid bids and no paid participation is removed.
+    """
+    round_pledges = dict(
+        latest_round_bids(auction_id).filter(user_id=user_id).order_by().values_list(
+            'round__round_number', 'pledge_amount'
+        )
+    )
+
+    with transaction.atomic():
+        standing = AuctionStanding.objects.select_for_update().filter(
+            auction_id=auction_id,
+            user_id=user_id
+        ).first()
+        total_rounds = standing.total_rounds if standing else Round.objects.filter(auction_id=auction_id).count()
+        fresh = _new_standing(auction_id, user_id, total_rounds, round_pledges)
+
+        if standing is None:
+            if create:
+                fresh.save()
+            return fresh
+
+        if not round_pledges and not Participation.objects.filter(
+            auction_id=auction_id,
+            user_id=user_id,
+            payment_status='completed'
+        ).exists():
+            # No valid bids left and never paid: drop out of the standings
+            standing.delete()
+            return None
+
+        standing.round_pledges = fresh.round_pledges
+        standing.total_pledge = fresh.total_pledge
+        standing.rounds_participated = fresh.rounds_participated
+        standing.average_pledge = fresh.average_pledge
+        standing.save()
+        return standing
+
+
+def ensure_standing(auction_id, user_id):
+    """Make sure a paid participant appears in the standings (with 0 pledges)"""
+    standing, _ = AuctionStanding.objects.get_or_create(
+        auction_id=auction_id,
+        user_id=user_id,
+        defaults={'total_rounds': lambda: Round.objects.filter(auction_id=auction_id).count()}
+    )
+    return standing
+
+
+def record_pledge(auction_id, user_id, round_number, pledge_amount):
+    """
+    Apply a user's new latest pledge for a round. Call inside the bid's
+    transaction: the standing row stays locked until it commits.
+    """
+    standing, _ = AuctionStanding.objects.select_for_update().get_or_create(
+        auction_id=auction_id,
+        user_id=user_id,
+        defaults={'total_rounds': lambda: Round.objects.filter(auction_id=auction_id).count()}
+    )
+    standing.apply_pledge(round_number, pledge_amount)
+    standing.save(update_fields=[
+        'round_pledges', 'total_pledge', 'rounds_participated', 'average_pledge', 'updated_at'
+    ])
+    return standing
+
+
+def ranked_standings(auction):
+    """The auction's standings, best first (index read on auction, -total_pledge)"""
+    return AuctionStanding.objects.filter(auction=auction).select_related('user').order_by(
+        '-total_pledge', 'user_id'
+    )
+
+
+def participant_standing(standing, round_numbers):
+    """One participant's row in the winner calculation response"""
+    total_rounds = len(round_numbers)
+    total_pledge = Decimal(standing.total_pledge).quantize(ZERO)
+
+    round_details = []
+    for round_number in round_numbers:
+        pledge_amount = standing.round_pledges.get(str(round_number))
+        round_details.append({
+            'round_number': round_number,
+            'pledge_amount': pledge_amount if pledge_amount is not None else str(ZERO),
+            'participated': pledge_amount is not None
+        })
+
+    # Average over ALL rounds (not just rounds_participated)
+    average_pledge = total_pledge / total_rounds if total_rounds > 0 else ZERO
+
+    user = standing.user
+    return {
+        'user': {
+            'id': str(user.id),
+            'username': user.username,
+            'full_name': f"{user.first_name} {user.last_name}".strip(),
+            'email': user.email,
+            'phone_number': getattr(user, 'phone_number', None),
+        },
+        'total_pledge': str(total_pledge),
+        'rounds_participated': standing.rounds_participated,
+        'total_rounds': total_rounds,
+        'average_pledge': str(average_pledge),
+        'round_details': round_details
+    }
+
+
+def build_standings(standings, round_numbers):
+    """Winner calculation rows for a batch of standings"""
+    return [participant_standing(standing, round_numbers) for standing in standings]
+
+
+def iter_standings(auction, round_numbers, chunk_size=2000):
+    """Yield every participant's standing, best first, without loading them all"""
+    for standing in ranked_standings(auction).iterator(chunk_size=chunk_size):
+        yield participant_standing(standing, round_numbers)
@@ -1,3 +1,1533 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import importlib
+import io
+import json
+import threading
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import TextField, Value
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from payments.models import MpesaTransaction
+from . import broadcast, caching, dashboard_stats, facets, leaderboard, round_cache, search
+from .bidding import BidRejected, place_bid
+from .counters import recompute_counters
+from .financial_views import ExportTransactionsView, filter_ledgers
+from .leaderboard import InMemoryLeaderboardStore, RedisLeaderboardStore, get_leaderboard_store
+from .models import (
+    Auction, AuctionStats, Bid, Category, CategoryStats, DailyAuctionRevenue, DailyRevenue, HeroBanner, Order,
+    Participation, Payment, Round, RoundStats,
+)
+from .revenue_rollups import backfill_rollups
+from .routing import websocket_urlpatterns
+from .standings import ranked_standings, rebuild_standings
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - fakeredis is a test requirement
+    fakeredis = None
+
+# In-process cache, channel layer, leaderboard store and broadcast queue,
+# so the tests don't need Redis
+LOCAL_BACKENDS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'CHANNEL_LAYERS': {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    'LEADERBOARD_BACKEND': 'auctions.leaderboard.InMemoryLeaderboardStore',
+    'LEADERBOARD_BROADCAST_QUEUE': 'auctions.broadcast.InlineBroadcastQueue',
+}
+
+
+class AuctionFixtureMixin:
+    """An active auction whose first round accepts pledges of 100-500"""
+
+    def create_auction(self, seller, title='Auction'):
+        auction = Auction.objects.create(
+            title=title,
+            description='Test auction',
+            base_price=Decimal('100.00'),
+            participation_fee=Decimal('10.00'),
+            created_by=seller,
+            status='active'
+        )
+        current_round = auction.rounds.get()
+        current_round.min_pledge = Decimal('100.00')
+        current_round.max_pledge = Decimal('500.00')
+        current_round.save()
+        return auction, current_round
+
+    def join(self, user, auction, current_round, payment_status='completed'):
+        return Participation.objects.create(
+            user=user, auction=auction, round=current_round,
+            fee_paid=Decimal('10.00'), payment_status=payment_status
+        )
+
+
+@override_settings(**LOCAL_BACKENDS)
+class AuctionListQueryCountTest(TestCase):
+    """The auction list must not issue per-row queries (N+1)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.seller = User.objects.create_user('seller', password='x')
+        self.bidders = [User.objects.create_user(f'bidder{i}', password='x') for i in range(3)]
+
+    def create_auctions(self, count):
+        for i in range(count):
+            auction = Auction.objects.create(
+                title=f'Auction {i}',
+                description='Test auction',
+                base_price=Decimal('100.00'),
+                participation_fee=Decimal('10.00'),
+                created_by=self.seller,
+                status='active'
+            )
+            current_round = auction.rounds.get()
+            for j, bidder in enumerate(self.bidders):
+                Participation.objects.create(
+                    user=bidder, auction=auction, round=current_round,
+                    fee_paid=Decimal('10.00'), payment_status='completed'
+                )
+                Bid.objects.create(
+                    user=bidder, auction=auction, round=current_round,
+                    pledge_amount=Decimal('100.00') + j
+                )
+
+    def list_query_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/auctions/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_is_constant_per_page(self):
+        self.create_auctions(2)
+        small_page, _ = self.list_query_count()
+
+        self.create_auctions(8)
+        large_page, response = self.list_query_count()
+
+        self.assertEqual(small_page, large_page)
+        self.assertLessEqual(large_page, 3)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_annotated_values(self):
+        self.create_auctions(1)
+        Bid.objects.filter(pledge_amount=Decimal('102.00')).update(is_valid=False)
+        recompute_counters()  # queryset updates skip the counter signals
+
+        _, response = self.list_query_count()
+        auction = response.data['results'][0]
+
+        self.assertEqual(auction['participant_count'], 3)
+        self.assertEqual(auction['highest_bid'], Decimal('101.00'))
+
+
+@override_settings(**LOCAL_BACKENDS)
+class CursorPaginationTest(TestCase):
+    """Cursor lists must visit every row exactly once, even when created_at ties"""
+
+    def test_walks_tied_timestamps_without_gaps(self):
+        seller = User.objects.create_user('seller', password='x')
+        for i in range(7):
+            Auction.objects.create(
+                title=f'Auction {i}',
+                description='Test auction',
+                base_price=Decimal('100.00'),
+                participation_fee=Decimal('10.00'),
+                created_by=seller,
+                status='active'
+            )
+        # Two groups of identical timestamps, one of them straddling page boundaries
+        now = timezone.now()
+        ids = list(Auction.objects.order_by('id').values_list('id', flat=True))
+        Auction.objects.filter(id__in=ids[:5]).update(created_at=now)
+        Auction.objects.filter(id__in=ids[5:]).update(created_at=now - timedelta(hours=1))
+
+        client = APIClient()
+        seen = []
+        url = '/api/auctions/?page_size=2'
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 7)
+            seen.extend(auction['id'] for auction in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(sorted(seen), sorted(str(pk) for pk in ids))
+
+    def test_page_number_still_works(self):
+        seller = User.objects.create_user('seller', password='x')
+        now = timezone.now()
+        for i in range(5):
+            auction = Auction.objects.create(
+                title=f'Auction {i}',
+                description='Test auction',
+                base_price=Decimal('100.00'),
+                participation_fee=Decimal('10.00'),
+                created_by=seller,
+                status='active'
+            )
+            Auction.objects.filter(id=auction.id).update(created_at=now - timedelta(minutes=i))
+
+        response = APIClient().get('/api/auctions/?page=2&page_size=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual([auction['title'] for auction in response.data['results']], ['Auction 2', 'Auction 3'])
+        self.assertIn('page=3', response.data['next'])
+        self.assertIn('page_size=2', response.data['previous'])
+
+
+class LedgerFixtureMixin:
+    """An admin client plus helpers adding auction payments and M-Pesa order payments"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', email='admin@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.auction = Auction.objects.create(
+            title='Auction',
+            description='Test auction',
+            base_price=Decimal('100.00'),
+            participation_fee=Decimal('10.00'),
+            created_by=self.admin
+        )
+        self.now = timezone.now()
+
+    def payment(self, minutes_ago, status='completed'):
+        payment = Payment.objects.create(
+            user=self.admin, auction=self.auction, payment_type='participation',
+            amount=Decimal('10.00'), method='mpesa', status=status
+        )
+        Payment.objects.filter(pk=payment.pk).update(created_at=self.now - timedelta(minutes=minutes_ago))
+        return ('participation', str(payment.pk))
+
+    def mpesa(self, minutes_ago, status='completed'):
+        transaction = MpesaTransaction.objects.create(
+            user=self.admin, phone_number='254700000000', amount=Decimal('50.00'),
+            account_reference='ref', transaction_desc='Order payment', status=status
+        )
+        MpesaTransaction.objects.filter(pk=transaction.pk).update(created_at=self.now - timedelta(minutes=minutes_ago))
+        return ('order', str(transaction.pk))
+
+
+@override_settings(**LOCAL_BACKENDS)
+class TransactionListCursorTest(LedgerFixtureMixin, TestCase):
+    """The transaction list pages both ledgers (UNION ALL) on one keyset cursor"""
+
+    url = '/api/auctions/analytics/transactions/'
+
+    def walk(self, page_size):
+        pages = []
+        url = f'{self.url}?page_size={page_size}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([(row['payment_type'], row['id']) for row in response.data['results']])
+            url = response.data['next']
+        return pages
+
+    def test_pages_span_both_ledgers(self):
+        expected = [self.payment(1), self.mpesa(2), self.payment(3), self.mpesa(4), self.mpesa(5), self.payment(6)]
+
+        pages = self.walk(page_size=4)
+        self.assertEqual(pages, [expected[:4], expected[4:]])
+        self.assertEqual({row_type for row_type, _ in pages[0]}, {'participation', 'order'})
+
+    def test_equal_created_at_across_ledgers(self):
+        # Five rows at one instant, split over both tables and over page boundaries
+        rows = [self.payment(1), self.payment(1), self.mpesa(1), self.mpesa(1), self.mpesa(1), self.payment(2)]
+
+        pages = self.walk(page_size=2)
+        seen = [row for page in pages for row in page]
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(sorted(seen), sorted(rows))
+        self.assertEqual(seen[-1], rows[-1])
+
+    def test_malformed_cursor_is_a_bad_request(self):
+        def encode(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+        for cursor in ('not-a-cursor', encode([1, 2]), encode({'t': 'yesterday', 's': 'payment', 'id': '1'}),
+                       encode({'t': self.now.isoformat(), 's': 'payment'}),
+                       encode({'t': self.now.isoformat(), 's': 'payment', 'id': {'a': 1}})):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.data, {'error': 'Invalid cursor'})
+
+        self.assertEqual(self.client.get(self.url, {'page_size': 'ten'}).status_code, 400)
+
+
+@override_settings(**LOCAL_BACKENDS)
+class ExportTransactionsTest(LedgerFixtureMixin, TestCase):
+    """The streaming export writes one row per filtered transaction, plain or gzipped"""
+
+    url = '/api/auctions/analytics/transactions/export/'
+
+    def setUp(self):
+        super().setUp()
+        for minutes_ago in range(3):
+            self.payment(minutes_ago)
+            self.mpesa(minutes_ago)
+        self.payment(5, status='pending')
+        self.mpesa(5, status='failed')
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def expected_rows(self, **params):
+        return sum(queryset.count() for queryset in filter_ledgers(params) if queryset is not None)
+
+    def csv_rows(self, body):
+        return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+
+    def test_csv(self):
+        response, body = self.export(status='completed')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="transactions.csv"')
+
+        rows = self.csv_rows(body)
+        self.assertEqual(rows[0], ExportTransactionsView.HEADER)
+        self.assertEqual(len(rows) - 1, self.expected_rows(status='completed'))
+        self.assertEqual(len(rows) - 1, 6)
+        self.assertEqual({row[-1] for row in rows[1:]}, {'completed'})
+
+    def test_gzip_csv(self):
+        response, body = self.export(gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="transactions.csv.gz"')
+
+        rows = self.csv_rows(gzip.decompress(body))
+        self.assertEqual(rows[0], ExportTransactionsView.HEADER)
+        self.assertEqual(len(rows) - 1, self.expected_rows())
+        self.assertEqual(len(rows) - 1, 8)
+
+        # Filters apply to the gzipped variant too
+        _, body = self.export(gzip='1', payment_type='order')
+        self.assertEqual(len(self.csv_rows(gzip.decompress(body))) - 1, self.expected_rows(payment_type='order'))
+
+
+@override_settings(**LOCAL_BACKENDS)
+class RevenueRollupTest(LedgerFixtureMixin, TestCase):
+    """Payment saves / deletes keep the daily rollups equal to a full backfill"""
+
+    def revenue(self):
+        return {
+            (row.day, row.payment_type, row.method, row.status): (row.total, row.count)
+            for row in DailyRevenue.objects.exclude(count=0)
+        }
+
+    def auction_revenue(self):
+        return {
+            (row.day, row.auction_id): (row.total, row.count)
+            for row in DailyAuctionRevenue.objects.exclude(count=0)
+        }
+
+    def test_status_change_moves_the_amount(self):
+        today = timezone.localdate()
+        payment = Payment.objects.create(
+            user=self.admin, auction=self.auction, payment_type='participation',
+            amount=Decimal('10.00'), method='mpesa', status='pending'
+        )
+        self.assertEqual(self.revenue(), {(today, 'participation', 'mpesa', 'pending'): (Decimal('10.00'), 1)})
+        self.assertEqual(self.auction_revenue(), {})
+
+        payment.status = 'completed'
+        payment.save()
+        self.assertEqual(self.revenue(), {(today, 'participation', 'mpesa', 'completed'): (Decimal('10.00'), 1)})
+        self.assertEqual(self.auction_revenue(), {(today, self.auction.id): (Decimal('10.00'), 1)})
+
+        payment.delete()
+        self.assertEqual(self.revenue(), {})
+        self.assertEqual(self.auction_revenue(), {})
+
+    def test_mpesa_order_payments(self):
+        today = timezone.localdate()
+        transaction = MpesaTransaction.objects.create(
+            user=self.admin, phone_number='254700000000', amount=Decimal('50.00'),
+            account_reference='ref', transaction_desc='Order payment'
+        )
+        transaction.status = 'completed'
+        transaction.save()
+        self.assertEqual(self.revenue(), {(today, 'order', 'mpesa', 'completed'): (Decimal('50.00'), 1)})
+
+        transaction.delete()
+        self.assertEqual(self.revenue(), {})
+
+    def test_backfill_matches_incremental(self):
+        payments = [
+            Payment.objects.create(
+                user=self.admin, auction=self.auction, payment_type=payment_type,
+                amount=Decimal(amount), method=method, status='pending'
+            )
+            for payment_type, amount, method in [
+                ('participation', '10.00', 'mpesa'), ('participation', '10.00', 'card'),
+                ('final_pledge', '250.00', 'mpesa'), ('participation', '10.00', 'mpesa'),
+            ]
+        ]
+        for payment, status in zip(payments, ['completed', 'completed', 'failed']):
+            payment.status = status
+            payment.save()
+        payments[1].delete()
+        for status in ('pending', 'completed'):
+            self.mpesa(0, status=status)
+
+        incremental = self.revenue(), self.auction_revenue()
+        backfill_rollups()
+        self.assertEqual((self.revenue(), self.auction_revenue()), incremental)
+
+
+@override_settings(**LOCAL_BACKENDS)
+class AuctionDetailTest(AuctionFixtureMixin, TestCase):
+    """AuctionDetailSerializer reads its method fields from one batched load (auctions/detail_loader.py)"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user('seller', password='x')
+        self.auction, self.round = self.create_auction(self.seller)
+        self.bidders = []
+        self.add_bidders(4)
+        self.client = APIClient()
+        self.client.force_authenticate(self.bidders[1])
+
+    def add_bidders(self, count):
+        for _ in range(count):
+            n = len(self.bidders)
+            bidder = User.objects.create_user(f'bidder{n}', password='x')
+            self.join(bidder, self.auction, self.round)
+            Payment.objects.create(
+                user=bidder, auction=self.auction, payment_type='participation',
+                amount=Decimal('10.50'), method='mpesa', status='completed'
+            )
+            Bid.objects.create(user=bidder, auction=self.auction, round=self.round, pledge_amount=Decimal(200 + n * 10))
+            self.bidders.append(bidder)
+
+    def detail(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/auctions/{self.auction.id}/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_query_count_is_constant(self):
+        self.detail()  # warm the active round / entitlement cache
+        queries, _ = self.detail()
+        self.assertEqual(queries, 5)
+
+        self.add_bidders(4)
+        self.detail()
+        self.assertEqual(self.detail()[0], queries)
+
+    def test_matches_the_per_field_queries_it_replaced(self):
+        _, data = self.detail()
+        viewer = self.bidders[1]
+
+        # What the method fields used to compute one query at a time
+        highest = self.auction.bids.filter(is_valid=True).order_by('-pledge_amount').first()
+        revenue = sum(
+            payment.amount for payment in
+            Payment.objects.filter(auction=self.auction, payment_type='participation', status='completed')
+        )
+        self.assertEqual(data['participant_count'], self.auction.participations.values('user').distinct().count())
+        self.assertEqual(data['total_revenue'], str(revenue))
+        self.assertEqual(data['highest_bid'], {
+            'amount': str(highest.pledge_amount),
+            'user': highest.user.username,
+            'submitted_at': highest.submitted_at,
+        })
+        self.assertTrue(data['user_has_participated'])
+        self.assertEqual(data['user_highest_bid'], str(
+            Bid.objects.filter(user=viewer, round=self.round, is_valid=True).order_by('-pledge_amount').first().pledge_amount
+        ))
+
+        current = data['current_round']
+        self.assertEqual(current['participant_count'], self.round.participations.filter(payment_status='completed').count())
+        self.assertEqual(current['bid_count'], self.round.bids.filter(is_valid=True).count())
+        self.assertEqual(len(data['rounds'][0]['participants']), 4)
+        for participant in data['rounds'][0]['participants']:
+            latest = self.round.bids.filter(user_id=participant['user']['id'], is_valid=True).order_by('-submitted_at').first()
+            self.assertEqual(Decimal(str(participant['pledge_amount'])), latest.pledge_amount)
+
+        anonymous = APIClient().get(f'/api/auctions/{self.auction.id}/').data
+        self.assertFalse(anonymous['user_has_participated'])
+        self.assertIsNone(anonymous['user_highest_bid'])
+
+
+@override_settings(**LOCAL_BACKENDS)
+class RoundCacheTest(AuctionFixtureMixin, TestCase):
+    """auctions/round_cache.py: cached active round / entitlement are dropped on writes"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user('seller', password='x')
+        self.bidder = User.objects.create_user('bidder', password='x')
+        self.auction, self.round = self.create_auction(self.seller)
+
+    def cached_round(self):
+        current_round = round_cache.get_active_round(self.auction.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(round_cache.get_active_round(self.auction.id), current_round)
+        return current_round
+
+    def cached_entitlement(self):
+        entitled = round_cache.has_entitlement(self.bidder.id, self.round.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(round_cache.has_entitlement(self.bidder.id, self.round.id), entitled)
+        return entitled
+
+    def test_round_and_auction_saves_drop_the_active_round(self):
+        self.assertEqual(self.cached_round().max_pledge, Decimal('500.00'))
+        self.round.max_pledge = Decimal('800.00')
+        self.round.save()
+        self.assertEqual(self.cached_round().max_pledge, Decimal('800.00'))
+
+        self.auction.title = 'Renamed'
+        self.auction.save()
+        self.assertEqual(self.cached_round().auction.title, 'Renamed')
+
+        self.round.is_active = False
+        self.round.save()
+        self.assertIsNone(round_cache.get_active_round(self.auction.id))
+
+    def test_participation_save_drops_the_entitlement(self):
+        participation = self.join(self.bidder, self.auction, self.round, payment_status='pending')
+        self.assertFalse(self.cached_entitlement())
+
+        participation.payment_status = 'completed'
+        participation.save()
+        self.assertTrue(self.cached_entitlement())
+
+        participation.delete()
+        self.assertFalse(round_cache.has_entitlement(self.bidder.id, self.round.id))
+
+    def test_mpesa_callback_drops_the_entitlement(self):
+        self.join(self.bidder, self.auction, self.round, payment_status='pending')
+        Payment.objects.create(
+            user=self.bidder, auction=self.auction, payment_type='participation', amount=Decimal('10.00'),
+            method='mpesa', status='pending', transaction_id='ws_CO_TEST'
+        )
+        self.assertFalse(self.cached_entitlement())
+
+        callback = {'Body': {'stkCallback': {
+            'CheckoutRequestID': 'ws_CO_TEST', 'ResultCode': 0, 'ResultDesc': 'Processed',
+            'CallbackMetadata': {'Item': [{'Name': 'MpesaReceiptNumber', 'Value': 'RCPT1'}]},
+        }}}
+        with self.captureOnCommitCallbacks(execute=True), mock.patch('builtins.print'):
+            response = APIClient().post(
+                '/api/payments/mpesa/callback/', callback, format='json', REMOTE_ADDR='196.201.214.10'
+            )
+        self.assertEqual(response.data['ResultCode'], 0)
+        self.assertTrue(round_cache.has_entitlement(self.bidder.id, self.round.id))
+
+
+@override_settings(**LOCAL_BACKENDS)
+class HeroBannerListTest(TestCase):
+    """Public (cached) and superuser banner lists share one paginated shape"""
+
+    def setUp(self):
+        cache.clear()
+        for order, is_active in enumerate((True, True, False)):
+            HeroBanner.objects.create(
+                title=f'Banner {order}', image=f'hero_banners/{order}.jpg', order=order, is_active=is_active
+            )
+
+    def test_public_and_admin_lists_match_in_shape(self):
+        client = APIClient()
+        client.get('/api/hero-banners/')
+        with self.assertNumQueries(0):
+            public = client.get('/api/hero-banners/')
+
+        client.force_authenticate(User.objects.create_superuser('admin', email='admin@example.com', password='x'))
+        admin = client.get('/api/hero-banners/')
+
+        for response in (public, admin):
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(response.data), {'count', 'next', 'previous', 'results'})
+        self.assertEqual([banner['title'] for banner in public.data['results']], ['Banner 0', 'Banner 1'])
+        self.assertEqual(admin.data['count'], 3)
+
+
+@override_settings(**LOCAL_BACKENDS)
+class DashboardStatsTest(TestCase):
+    """auctions/dashboard_stats.py: one aggregate per table, cached until a write"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', email='admin@example.com', password='x')
+        self.seller = User.objects.create_user('seller', password='x', user_type='seller')
+        for order_status, payment_status in [
+            ('pending', 'pending'), ('paid', 'completed'), ('delivered', 'completed'),
+            ('shipped', 'completed'), ('cancelled', 'pending'),
+        ]:
+            self.order(order_status, payment_status)
+        self.auction = Auction.objects.create(
+            title='Auction', description='Test auction', base_price=Decimal('100.00'),
+            participation_fee=Decimal('10.00'), created_by=self.seller, status='active'
+        )
+
+    def order(self, order_status, payment_status='pending', amount='100.00'):
+        return Order.objects.create(
+            user=self.seller, status=order_status, payment_status=payment_status,
+            subtotal=Decimal(amount), total_amount=Decimal(amount),
+            shipping_name='Buyer', shipping_phone='254700000000',
+            shipping_address='Street', shipping_city='Nairobi'
+        )
+
+    def test_aggregates_match_per_status_counts(self):
+        with self.assertNumQueries(1):
+            stats = dashboard_stats.order_stats()
+        self.assertEqual(stats['total'], Order.objects.count())
+        for order_status in dashboard_stats.ORDER_STATUSES:
+            self.assertEqual(stats[order_status], Order.objects.filter(status=order_status).count())
+        self.assertEqual(stats['revenue'], sum(
+            order.total_amount for order in Order.objects.filter(status__in=dashboard_stats.REVENUE_ORDER_STATUSES)
+        ))
+        self.assertEqual(stats['paid_revenue'], Decimal('300.00'))
+
+        users = dashboard_stats.user_stats()
+        for user_type in dashboard_stats.USER_TYPES:
+            self.assertEqual(users[user_type], User.objects.filter(user_type=user_type).count())
+        self.assertEqual(users['total'], User.objects.count())
+
+        auctions = dashboard_stats.auction_stats()
+        for auction_status in dashboard_stats.AUCTION_STATUSES:
+            self.assertEqual(auctions[auction_status], Auction.objects.filter(status=auction_status).count())
+
+    def test_writes_invalidate_the_cached_stats(self):
+        self.assertEqual(dashboard_stats.order_stats()['shipped'], 1)
+        with self.assertNumQueries(0):
+            dashboard_stats.order_stats()
+        self.order('shipped')
+        self.assertEqual(dashboard_stats.order_stats()['shipped'], 2)
+
+        self.assertEqual(dashboard_stats.user_stats()['seller'], 1)
+        User.objects.create_user('seller2', password='x', user_type='seller')
+        self.assertEqual(dashboard_stats.user_stats()['seller'], 2)
+
+        stats = dashboard_stats.auction_stats()
+        self.assertEqual((stats['active'], stats['revenue'], stats['participants']), (1, Decimal('0.00'), 0))
+        Participation.objects.create(
+            user=self.seller, auction=self.auction, round=self.auction.rounds.get(),
+            fee_paid=Decimal('10.00'), payment_status='completed'
+        )
+        Payment.objects.create(
+            user=self.seller, auction=self.auction, payment_type='participation',
+            amount=Decimal('10.00'), method='mpesa', status='completed'
+        )
+        self.auction.status = 'closed'
+        self.auction.save()
+        stats = dashboard_stats.auction_stats()
+        self.assertEqual((stats['active'], stats['closed']), (0, 1))
+        self.assertEqual((stats['revenue'], stats['participants']), (Decimal('10.00'), 1))
+
+
+@override_settings(**LOCAL_BACKENDS)
+class SearchTest(TestCase):
+    """auctions/search.py: full-text search on PostgreSQL, LIKE search elsewhere"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user('seller', password='x')
+        self.phones = Category.objects.create(name='Phones', slug='phones')
+        now = timezone.now()
+        for minutes_ago, (title, description, category) in enumerate([
+            ('Red phone', 'Barely used', None),
+            ('Laptop', 'Comes with a phone stand', None),
+            ('Leather case', 'Blue', self.phones),
+            ('Chair', 'Oak', None),
+        ]):
+            auction = self.create(title, description, category)
+            Auction.objects.filter(id=auction.id).update(created_at=now - timedelta(minutes=minutes_ago))
+
+    def create(self, title, description='', category=None):
+        return Auction.objects.create(
+            title=title, description=description, base_price=Decimal('100.00'),
+            participation_fee=Decimal('10.00'), created_by=self.seller, category=category, status='active'
+        )
+
+    def titles(self, queryset):
+        return sorted(auction.title for auction in queryset)
+
+    def auction_updates(self, queries):
+        return len([query for query in queries if query['sql'].startswith('UPDATE "auctions_auction"')])
+
+    def test_search_auctions(self):
+        auctions = Auction.objects.all()
+        self.assertEqual(self.titles(search.search_auctions(auctions, 'phone')), ['Laptop', 'Leather case', 'Red phone'])
+        self.assertEqual(self.titles(search.search_auctions(auctions, 'chair')), ['Chair'])
+        self.assertEqual(search.search_auctions(auctions, '  ').count(), 4)
+
+        ranked = search.search_auctions(auctions, 'phone', ranked=True)
+        self.assertEqual(ranked.first().title, 'Red phone')
+
+        response = APIClient().get('/api/auctions/?search=phone&ordering=relevance&page_size=2')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 2)
+
+    @skipUnless(connection.vendor != 'postgresql', 'LIKE fallback is only used off PostgreSQL')
+    def test_icontains_fallback(self):
+        self.assertFalse(search.full_text_enabled())
+        queryset = search.search_auctions(Auction.objects.all(), 'PHON')
+        self.assertIn('LIKE', str(queryset.query))
+        self.assertEqual(self.titles(queryset), ['Laptop', 'Leather case', 'Red phone'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'search_vector is only maintained on PostgreSQL')
+    def test_vector_follows_auction_and_category_saves(self):
+        auction = Auction.objects.get(title='Chair')
+        auction.title = 'Rocking chair'
+        auction.description = 'Walnut'
+        auction.save()
+        self.assertEqual(self.titles(search.search_auctions(Auction.objects.all(), 'walnut')), ['Rocking chair'])
+
+        self.phones.name = 'Accessories'
+        self.phones.save()
+        self.assertEqual(self.titles(search.search_auctions(Auction.objects.all(), 'accessories')), ['Leather case'])
+
+        self.create('Tablet')
+        self.assertEqual(self.titles(search.search_auctions(Auction.objects.all(), 'tablet')), ['Tablet'])
+
+    def test_vector_is_written_by_the_save_itself(self):
+        vector = mock.Mock(side_effect=lambda auction: Value('', output_field=TextField()))
+        with mock.patch.object(search, 'full_text_enabled', return_value=True), \
+                mock.patch.object(search, '_auction_vector', vector):
+            auction = self.create('Stool')
+            self.assertEqual(vector.call_count, 1)
+
+            auction = Auction.objects.get(id=auction.id)
+            auction.status = 'closed'
+            with CaptureQueriesContext(connection) as queries:
+                auction.save()
+            self.assertEqual(vector.call_count, 1)  # searchable fields unchanged
+            self.assertEqual(self.auction_updates(queries), 1)
+
+            auction.title = 'Bar stool'
+            with CaptureQueriesContext(connection) as queries:
+                auction.save()
+            self.assertEqual(vector.call_count, 2)
+            self.assertEqual(self.auction_updates(queries), 1)
+
+            auction.title = 'Tall bar stool'
+            auction.save(update_fields=['title'])
+            self.assertEqual(vector.call_count, 3)  # caught up by a separate UPDATE
+
+
+@override_settings(**LOCAL_BACKENDS)
+class AutocompleteTest(TestCase):
+    """/api/auctions/autocomplete/: typeahead over active auction titles and category names"""
+
+    def setUp(self):
+        cache.clear()
+        seller = User.objects.create_user('seller', password='x')
+        self.category = Category.objects.create(name='iPhones', slug='iphones')
+        for title, auction_status in [
+            ('Old iPhone 11', 'active'), ('iPhone 15', 'active'), ('Phone case', 'active'), ('Draft iPhone', 'draft'),
+        ]:
+            Auction.objects.create(
+                title=title, description='Test auction', base_price=Decimal('100.00'),
+                participation_fee=Decimal('10.00'), created_by=seller, category=self.category, status=auction_status
+            )
+        self.client = APIClient()
+
+    def suggest(self, query):
+        response = self.client.get('/api/auctions/autocomplete/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_needs_two_characters(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest('i'), {'auctions': [], 'categories': []})
+            self.assertEqual(self.suggest('  i  '), {'auctions': [], 'categories': []})
+
+    @skipUnless(connection.vendor != 'postgresql', 'Prefix ordering is the fallback without pg_trgm')
+    def test_prefix_matches_first_without_trigram_similarity(self):
+        suggestions = self.suggest('iPho')
+        self.assertEqual([auction['title'] for auction in suggestions['auctions']], ['iPhone 15', 'Old iPhone 11'])
+        self.assertEqual(suggestions['auctions'][0]['category_slug'], 'iphones')
+        self.assertEqual(suggestions['categories'], [{'id': str(self.category.id), 'name': 'iPhones', 'slug': 'iphones'}])
+
+    def test_cached_per_normalised_query(self):
+        with self.assertNumQueries(2):
+            first = self.suggest(' IPHONE ')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest('iphone'), first)
+            self.assertEqual(self.suggest('iPhone'), first)
+        with self.assertNumQueries(2):
+            self.suggest('iphone 1')
+
+
+@override_settings(**LOCAL_BACKENDS)
+class FacetsTest(TestCase):
+    """auctions/facets.py: each facet counts what its options would list with the other filters"""
+
+    def setUp(self):
+        cache.clear()
+        seller = User.objects.create_user('seller', password='x')
+        self.phones = Category.objects.create(name='Phones', slug='phones')
+        self.tvs = Category.objects.create(name='TVs', slug='tvs')
+        for title, product_type, category, auction_status in [
+            ('Phone A', 'buy_now', self.phones, 'active'),
+            ('Phone B', 'auction', self.phones, 'active'),
+            ('Phone C', 'auction', self.phones, 'draft'),
+            ('Phone D', 'both', self.phones, 'closed'),
+            ('TV A', 'auction', self.tvs, 'active'),
+            ('TV B', 'buy_now', self.tvs, 'draft'),
+            ('Phone stand', 'buy_now', None, 'active'),
+        ]:
+            Auction.objects.create(
+                title=title, description='Test auction', base_price=Decimal('100.00'),
+                participation_fee=Decimal('10.00'), created_by=seller, category=category,
+                product_type=product_type, status=auction_status
+            )
+        self.client = APIClient()
+
+    def listed(self, **filters):
+        response = self.client.get('/api/auctions/', {**filters, 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return response.data['count']
+
+    def test_counts_match_the_filtered_list(self):
+        for filters in [{}, {'category': str(self.phones.id)}, {'status': 'active', 'search': 'phone'},
+                        {'product_type': 'auction', 'category': str(self.tvs.id)}]:
+            response = self.client.get('/api/auctions/', {**filters, 'facets': '1'})
+            counts = response.data['facets']
+            self.assertEqual(response.data['count'], self.listed(**filters))
+
+            for product_type, count in counts['product_type'].items():
+                self.assertEqual(count, self.listed(**{**filters, 'product_type': product_type}), (filters, product_type))
+            for auction_status, count in counts['status'].items():
+                self.assertEqual(count, self.listed(**{**filters, 'status': auction_status}), (filters, auction_status))
+            for category in (self.phones, self.tvs):
+                self.assertEqual(counts['category'].get(str(category.id), 0),
+                                 self.listed(**{**filters, 'category': str(category.id)}), (filters, category.name))
+
+    def test_cache_signature_follows_the_filters(self):
+        with self.assertNumQueries(1):
+            active = facets.facet_counts(status='active', search=' Phone ')
+        with self.assertNumQueries(0):
+            self.assertEqual(facets.facet_counts(status='active', search='phone'), active)
+
+        with self.assertNumQueries(1):
+            draft = facets.facet_counts(status='draft', search='phone')
+        self.assertNotEqual(draft['product_type'], active['product_type'])
+        with self.assertNumQueries(1):
+            facets.facet_counts(status='active', search='phone', category=str(self.phones.id))
+        with self.assertNumQueries(1):
+            facets.facet_counts(status='active', search='phone', mode=facets.BROWSE)
+
+        Auction.objects.filter(title='Phone A').get().delete()
+        self.assertEqual(facets.facet_counts(status='active', search='phone')['product_type']['buy_now'], 1)
+
+
+@override_settings(**LOCAL_BACKENDS)
+class CachingTest(TestCase):
+    """auctions/caching.py: namespace versions, the stampede lock and a failing cache"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidate_bumps_the_namespace_version(self):
+        key = caching.make_key('things', 'list')
+        self.assertEqual(key, 'things:v1:list')
+        self.assertEqual(caching.get_or_set(key, lambda: 'old'), 'old')
+
+        caching.invalidate('things')
+        self.assertEqual(caching.namespace_version('things'), 2)
+        new_key = caching.make_key('things', 'list')
+        self.assertEqual(new_key, 'things:v2:list')
+        self.assertEqual(caching.get_or_set(new_key, lambda: 'new'), 'new')
+        self.assertEqual(caching.make_key('other', 'list'), 'other:v1:list')
+
+    def test_waiting_caller_reads_the_lock_holders_value(self):
+        # Another caller holds the lock and stores the value shortly
+        cache.add('stampede:lock', 1, 10)
+        writer = threading.Timer(0.1, lambda: cache.set('stampede', 'computed once'))
+        writer.start()
+        self.addCleanup(writer.cancel)
+
+        compute = mock.Mock(return_value='computed twice')
+        self.assertEqual(caching.get_or_set('stampede', compute, wait=0.02, max_wait=2), 'computed once')
+        compute.assert_not_called()
+
+    def test_computes_itself_when_the_lock_holder_never_finishes(self):
+        cache.add('stuck:lock', 1, 10)
+        compute = mock.Mock(return_value='fallback')
+        self.assertEqual(caching.get_or_set('stuck', compute, wait=0.02, max_wait=0.1), 'fallback')
+        compute.assert_called_once()
+
+    def test_lock_is_released_after_computing(self):
+        self.assertEqual(caching.get_or_set('fresh', lambda: 42), 42)
+        self.assertEqual(cache.get('fresh'), 42)
+        self.assertIsNone(cache.get('fresh:lock'))
+
+    def test_unreachable_cache_falls_back_to_the_database(self):
+        broken = mock.Mock(**{
+            f'{method}.side_effect': ConnectionError('cache down')
+            for method in ('get', 'set', 'add', 'incr', 'delete')
+        })
+        with mock.patch.object(caching, 'cache', broken), self.assertLogs('auctions.caching', 'WARNING'):
+            seller = User.objects.create_user('seller', password='x')
+            auction = Auction.objects.create(
+                title='Auction', description='Test auction', base_price=Decimal('100.00'),
+                participation_fee=Decimal('10.00'), created_by=seller, status='active'
+            )
+            caching.invalidate('things')
+            self.assertEqual(caching.get_or_set(caching.make_key('things'), lambda: 'computed'), 'computed')
+            self.assertEqual(round_cache.get_active_round(auction.id).round_number, 1)
+
+
+@override_settings(**LOCAL_BACKENDS)
+class PlaceBidTest(AuctionFixtureMixin, TestCase):
+    """auctions/bidding.py: one valid bid per user and round, upserted"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user('seller', password='x')
+        self.bidder = User.objects.create_user('bidder', password='x')
+        self.auction, self.round = self.create_auction(self.seller)
+        self.join(self.bidder, self.auction, self.round)
+
+    def assertRejected(self, user, pledge_amount, message, status_code=400):
+        with self.assertRaises(BidRejected) as raised:
+            place_bid(user, self.auction.id, pledge_amount)
+        self.assertEqual(raised.exception.message, message)
+        self.assertEqual(raised.exception.status_code, status_code)
+
+    def test_first_bid_creates_and_repeat_bid_updates(self):
+        first, created = place_bid(self.bidder, self.auction.id, '150')
+        self.assertTrue(created)
+
+        second, created = place_bid(self.bidder, self.auction.id, '175.50')
+        self.assertFalse(created)
+        self.assertEqual(second.id, first.id)
+
+        bids = Bid.objects.filter(user=self.bidder, round=self.round, is_valid=True)
+        self.assertEqual(bids.count(), 1)
+        self.assertEqual(bids.get().pledge_amount, Decimal('175.50'))
+
+    def test_rejects_without_paid_participation(self):
+        outsider = User.objects.create_user('outsider', password='x')
+        self.assertRejected(outsider, '150', 'You must pay the participation fee first', 403)
+
+        pending = User.objects.create_user('pending', password='x')
+        self.join(pending, self.auction, self.round, payment_status='pending')
+        self.assertRejected(pending, '150', 'You must pay the participation fee first', 403)
+        self.assertFalse(Bid.objects.exists())
+
+    def test_rejects_when_round_inactive(self):
+        self.round.is_active = False
+        self.round.save()
+        self.assertRejected(self.bidder, '150', 'No active round for this auction')
+
+    def test_rejects_pledge_outside_window(self):
+        self.assertRejected(self.bidder, '99.99', 'Minimum pledge is 100.00')
+        self.assertRejected(self.bidder, '500.01', 'Maximum pledge is 500.00')
+        self.assertRejected(self.bidder, 'lots', 'Invalid pledge amount')
+        self.assertFalse(Bid.objects.exists())
+
+    def test_api_response_for_create_and_update(self):
+        client = APIClient()
+        client.force_authenticate(self.bidder)
+
+        response = client.post('/api/bids/', {'auction': str(self.auction.id), 'pledge_amount': '150'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['message'], 'Bid placed successfully')
+        bid = response.data['bid']
+        self.assertEqual(bid['pledge_amount'], '150.00')
+        self.assertEqual(bid['round_number'], 1)
+        self.assertTrue(bid['is_valid'])
+        self.assertEqual(bid['user_info']['username'], 'bidder')
+
+        response = client.post('/api/bids/', {'auction': str(self.auction.id), 'pledge_amount': '200'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['message'], 'Bid updated successfully')
+        self.assertEqual(response.data['bid']['id'], bid['id'])
+        self.assertEqual(response.data['bid']['pledge_amount'], '200.00')
+
+        response = client.post('/api/bids/', {'auction': str(self.auction.id), 'pledge_amount': '600'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Maximum pledge is 500.00'})
+
+
+@override_settings(**LOCAL_BACKENDS)
+class CountersTest(AuctionFixtureMixin, TestCase):
+    """auctions/counters.py: stats rows follow bids, participations, payments and auctions"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user('seller', password='x')
+        self.bidder = User.objects.create_user('bidder', password='x')
+        self.auction, self.round = self.create_auction(self.seller)
+        self.join(self.bidder, self.auction, self.round)
+
+    def stats(self):
+        return AuctionStats.objects.get(auction=self.auction), RoundStats.objects.get(round=self.round)
+
+    def assertCountersMatch(self):
+        self.assertEqual(recompute_counters(verify_only=True), {'auctions': [], 'rounds': [], 'categories': []})
+
+    def test_place_bid_updates_counters_with_f_expressions(self):
+        place_bid(self.bidder, self.auction.id, '150')
+        other = User.objects.create_user('other', password='x')
+        self.join(other, self.auction, self.round)
+        place_bid(other, self.auction.id, '120')
+        place_bid(self.bidder, self.auction.id, '110')
+
+        auction_stats, round_stats = self.stats()
+        self.assertEqual((auction_stats.bid_count, auction_stats.highest_pledge), (2, Decimal('120.00')))
+        self.assertEqual((auction_stats.participant_count, round_stats.participant_count), (2, 2))
+        self.assertEqual(round_stats.bid_count, 2)
+        self.assertCountersMatch()
+
+    def test_saves_apply_the_difference(self):
+        bid, _ = place_bid(self.bidder, self.auction.id, '150')
+        bid = Bid.objects.get(id=bid.id)
+        bid.is_valid = False
+        bid.save()
+        bid.save()  # no change, no delta
+        auction_stats, round_stats = self.stats()
+        self.assertEqual((auction_stats.bid_count, round_stats.bid_count), (0, 0))
+        self.assertIsNone(auction_stats.highest_pledge)
+
+        payment = Payment.objects.create(
+            user=self.bidder, auction=self.auction, payment_type='participation',
+            amount=Decimal('10.00'), method='mpesa', status='pending'
+        )
+        payment = Payment.objects.get(id=payment.id)
+        payment.status = 'completed'
+        payment.save()
+        self.assertEqual(self.stats()[0].total_revenue, Decimal('10.00'))
+        payment.delete()
+        self.assertEqual(self.stats()[0].total_revenue, Decimal('0.00'))
+        self.assertCountersMatch()
+
+    def test_saving_a_loaded_row_does_not_reread_it(self):
+        bid, _ = place_bid(self.bidder, self.auction.id, '150')
+        bid = Bid.objects.get(id=bid.id)
+        bid.pledge_amount = Decimal('160')
+        with CaptureQueriesContext(connection) as queries:
+            bid.save()
+        bid_selects = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'FROM "auctions_bid"' in q['sql']
+                       and '"auctions_bid"."id" =' in q['sql']]
+        self.assertEqual(bid_selects, [])
+        self.assertEqual(self.stats()[0].highest_pledge, Decimal('160.00'))
+
+    def test_category_counts_follow_auction_status_and_deletes(self):
+        category = Category.objects.create(name='Phones', slug='phones')
+        auction = Auction.objects.get(id=self.auction.id)
+        auction.category = category
+        auction.save()
+        self.assertEqual(CategoryStats.objects.get(category=category).auction_count, 1)
+
+        place_bid(self.bidder, self.auction.id, '150')
+        auction.delete()
+        self.assertEqual(CategoryStats.objects.get(category=category).auction_count, 0)
+        self.assertCountersMatch()
+
+    def test_recompute_counters_command(self):
+        place_bid(self.bidder, self.auction.id, '150')
+        AuctionStats.objects.filter(auction=self.auction).update(bid_count=5)
+
+        with self.assertRaises(CommandError):
+            call_command('recompute_counters', '--verify', stdout=io.StringIO())
+        call_command('recompute_counters', stdout=io.StringIO())
+        self.assertEqual(self.stats()[0].bid_count, 1)
+
+        output = io.StringIO()
+        call_command('recompute_counters', '--verify', stdout=output)
+        self.assertIn('All counters match', output.getvalue())
+
+
+@override_settings(**LOCAL_BACKENDS)
+class WinnerStandingsTest(AuctionFixtureMixin, TestCase):
+    """Incremental standings, a full rebuild, winner_calculation and round close agree on the winner"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', email='admin@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.auction, self.round = self.create_auction(self.admin)
+        self.bidders = {name: User.objects.create_user(name, password='x') for name in ('ann', 'ben', 'cat')}
+
+    def bid(self, name, current_round, amount):
+        if not Participation.objects.filter(user=self.bidders[name], round=current_round).exists():
+            self.join(self.bidders[name], self.auction, current_round)
+        place_bid(self.bidders[name], self.auction.id, amount)
+
+    def expected_totals(self):
+        """Sum of each user's latest valid pledge per round, straight from the Bid table"""
+        latest = {}
+        for bid in Bid.objects.filter(auction=self.auction, is_valid=True).order_by('submitted_at'):
+            latest[(bid.user.username, bid.round_id)] = bid.pledge_amount
+        totals = {}
+        for (username, _), amount in latest.items():
+            totals[username] = totals.get(username, Decimal('0.00')) + amount
+        return totals
+
+    def standings(self):
+        return [(standing.user.username, standing.total_pledge) for standing in ranked_standings(self.auction)]
+
+    def close(self, current_round):
+        response = self.client.post(f'/api/rounds/{current_round.id}/close/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['winner']
+
+    def test_winner_agrees_across_paths(self):
+        self.bid('ann', self.round, '300')
+        self.bid('ann', self.round, '200')
+        self.bid('ben', self.round, '250')
+        self.bid('cat', self.round, '150')
+
+        winner = self.close(self.round)
+        self.assertEqual((winner['username'], winner['total_pledge']), ('ben', 250.0))
+
+        # Round 2: ben sits it out and counts as 0
+        with self.captureOnCommitCallbacks(execute=True):
+            second_round = Round.objects.create(
+                auction=self.auction, round_number=2, base_price=Decimal('100.00'),
+                participation_fee=Decimal('10.00'), min_pledge=Decimal('100.00'),
+                start_time=timezone.now(), end_time=timezone.now() + timedelta(hours=2), is_active=True
+            )
+        self.bid('ann', second_round, '400')
+        self.bid('cat', second_round, '300')
+
+        totals = self.expected_totals()
+        self.assertEqual(totals, {'ann': Decimal('600.00'), 'ben': Decimal('250.00'), 'cat': Decimal('450.00')})
+
+        incremental = self.standings()
+        self.assertEqual(incremental, sorted(totals.items(), key=lambda item: -item[1]))
+        rebuild_standings(self.auction.id)
+        self.assertEqual(self.standings(), incremental)
+
+        response = self.client.get(f'/api/auctions/{self.auction.id}/winner_calculation/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['winner']['user']['username'], 'ann')
+        self.assertEqual(response.data['winner']['total_pledge'], '600.00')
+        self.assertEqual(response.data['winner']['average_pledge'], '300.00')
+
+        winner = self.close(second_round)
+        self.assertEqual(
+            (winner['username'], winner['total_pledge'], winner['average_pledge'], winner['total_rounds']),
+            ('ann', 600.0, 300.0, 2)
+        )
+
+
+@override_settings(**LOCAL_BACKENDS)
+class DuplicateBidMigrationTest(AuctionFixtureMixin, TransactionTestCase):
+    """0017 keeps only each user's latest valid bid per round before adding the constraint"""
+
+    def test_invalidates_older_duplicates(self):
+        migration = importlib.import_module('auctions.migrations.0017_bid_unique_valid_per_round')
+        constraint = next(c for c in Bid._meta.constraints if c.name == 'unique_valid_bid_per_user_round')
+
+        seller = User.objects.create_user('seller', password='x')
+        bidder = User.objects.create_user('bidder', password='x')
+        auction, current_round = self.create_auction(seller)
+        now = timezone.now()
+
+        # Duplicates as they could exist before the constraint
+        with connection.schema_editor() as editor:
+            editor.remove_constraint(Bid, constraint)
+        try:
+            bids = Bid.objects.bulk_create([
+                Bid(user=bidder, auction=auction, round=current_round, pledge_amount=Decimal(amount))
+                for amount in ('100.00', '300.00', '200.00')
+            ])
+            for minutes, bid in zip((3, 2, 1), bids):
+                Bid.objects.filter(id=bid.id).update(submitted_at=now - timedelta(minutes=minutes))
+
+            migration.invalidate_duplicate_bids(django_apps, None)
+        finally:
+            with connection.schema_editor() as editor:
+                editor.add_constraint(Bid, constraint)
+
+        self.assertEqual(list(Bid.objects.filter(is_valid=True).values_list('id', flat=True)), [bids[-1].id])
+        self.assertEqual(Bid.objects.count(), 3)
+
+
+@override_settings(**LOCAL_BACKENDS, LEADERBOARD_BROADCAST_INTERVAL=0.15)
+class InlineBroadcastTest(AuctionFixtureMixin, TestCase):
+    """The inline queue sends on commit, without the coalescing timer"""
+
+    def test_committed_bid_sends_one_update(self):
+        seller = User.objects.create_user('seller', password='x')
+        bidder = User.objects.create_user('bidder', password='x')
+        auction, current_round = self.create_auction(seller)
+        self.join(bidder, auction, current_round)
+
+        channel_layer = mock.Mock(group_send=mock.AsyncMock())
+        with mock.patch.object(broadcast, 'get_channel_layer', return_value=channel_layer), \
+                mock.patch('threading.Timer') as timer:
+            with self.captureOnCommitCallbacks(execute=True):
+                place_bid(bidder, auction.id, '150')
+                channel_layer.group_send.assert_not_called()
+
+        timer.assert_not_called()
+        channel_layer.group_send.assert_called_once()
+        group, event = channel_layer.group_send.call_args.args
+        self.assertEqual(group, f'auction_{auction.id}')
+        self.assertEqual(event['type'], 'leaderboard_update')
+        self.assertEqual(event['bidder_ids'], [str(bidder.id)])
+        self.assertEqual(event['data']['top_bids'][0]['pledge_amount'], '150.00')
+
+
+@override_settings(**LOCAL_BACKENDS)
+class CoalescedBroadcastTest(AuctionFixtureMixin, TestCase):
+    """LeaderboardBroadcaster: a burst within one interval is a single group_send"""
+
+    def setUp(self):
+        seller = User.objects.create_user('seller', password='x')
+        self.auction, self.round = self.create_auction(seller)
+        self.channel_layer = mock.Mock(group_send=mock.AsyncMock())
+        for patcher in (
+            mock.patch.object(broadcast, 'get_channel_layer', return_value=self.channel_layer),
+            mock.patch.object(broadcast, 'connection'),  # flush closes the timer thread's connection
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_burst_is_sent_once(self):
+        broadcaster = broadcast.LeaderboardBroadcaster(interval=0.15)
+        bidders = [uuid.uuid4() for _ in range(3)]
+        with mock.patch('threading.Timer') as timer:
+            for bidder_id in bidders:
+                broadcaster.schedule(self.round, bidder_id)
+
+        timer.assert_called_once()
+        self.channel_layer.group_send.assert_not_called()
+
+        # The timer fires once the interval is up
+        broadcaster.flush(self.auction.id)
+        self.channel_layer.group_send.assert_called_once()
+        group, event = self.channel_layer.group_send.call_args.args
+        self.assertEqual(group, f'auction_{self.auction.id}')
+        self.assertEqual(event['bidder_ids'], sorted(str(bidder_id) for bidder_id in bidders))
+        self.assertEqual(broadcaster.stats(), {'sent': 1, 'suppressed': 2, 'pending': 0})
+
+    @override_settings(LEADERBOARD_BROADCAST_STATS_INTERVAL=0)
+    def test_counters_are_logged(self):
+        broadcaster = broadcast.LeaderboardBroadcaster(interval=0)
+        with self.assertLogs('auctions.broadcast', 'INFO') as logs:
+            broadcaster.schedule(self.round)
+        self.assertIn('sent=1 suppressed=0', logs.output[0])
+
+
+def apply_patch(data, patch):
+    """Apply a leaderboard_patch to a snapshot the way a delta client does"""
+    bids = {bid['user']['id']: bid for bid in data['top_bids']}
+    for op in patch['ops']:
+        if op['op'] == 'remove':
+            bids.pop(op['user_id'])
+        elif op['op'] == 'add':
+            bids[op['bid']['user']['id']] = op['bid']
+        elif op['op'] == 'update':
+            bids[op['user_id']] = {
+                **bids[op['user_id']],
+                'id': op['id'],
+                'pledge_amount': op['pledge_amount'],
+                'submitted_at': op['submitted_at'],
+            }
+        elif op['op'] == 'move':
+            bids[op['user_id']] = {**bids[op['user_id']], 'position': op['position']}
+    return {
+        **data,
+        **patch['fields'],
+        'top_bids': sorted(bids.values(), key=lambda bid: bid['position']),
+    }
+
+
+@override_settings(**LOCAL_BACKENDS)
+class DeltaProtocolConsumerTest(AuctionFixtureMixin, TransactionTestCase):
+    """?protocol=delta: snapshot on connect, sequenced patches, resync on a gap"""
+
+    def setUp(self):
+        cache.clear()
+        seller = User.objects.create_user('seller', password='x')
+        self.viewer = User.objects.create_user('viewer', password='x')
+        self.rival = User.objects.create_user('rival', password='x')
+        self.auction, self.round = self.create_auction(seller)
+        for user in (self.viewer, self.rival):
+            self.join(user, self.auction, self.round)
+        place_bid(self.viewer, self.auction.id, '150')
+
+    def expected(self):
+        return get_leaderboard_store().snapshot(self.round, self.viewer.id)
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f'/ws/auction/{self.auction.id}/?protocol=delta'
+        )
+        communicator.scope['user'] = self.viewer
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def bid(self, user, amount):
+        await sync_to_async(place_bid)(user, self.auction.id, amount)
+
+    def test_snapshot_then_patch(self):
+        async def run():
+            communicator = await self.connect()
+            snapshot = await communicator.receive_json_from()
+            self.assertEqual(snapshot['type'], 'leaderboard_snapshot')
+            self.assertEqual(snapshot['data'], await sync_to_async(self.expected)())
+            self.assertEqual(snapshot['data']['user_position'], 1)
+
+            # The rival outbids the viewer: one add, one move, and the viewer's new position
+            await self.bid(self.rival, '300')
+            patch = await communicator.receive_json_from()
+            self.assertEqual(patch['type'], 'leaderboard_patch')
+            self.assertEqual(patch['base_seq'], snapshot['seq'])
+            self.assertEqual(patch['seq'], snapshot['seq'] + 1)
+            self.assertEqual(patch['fields']['user_position'], 2)
+
+            data = apply_patch(snapshot['data'], patch)
+            self.assertEqual(data, await sync_to_async(self.expected)())
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_resync_after_gap(self):
+        async def run():
+            communicator = await self.connect()
+            snapshot = await communicator.receive_json_from()
+
+            # The client misses a patch...
+            await self.bid(self.rival, '300')
+            await communicator.receive_json_from()
+
+            # ...so the next one does not follow on from its seq
+            await self.bid(self.viewer, '400')
+            patch = await communicator.receive_json_from()
+            self.assertNotEqual(patch['base_seq'], snapshot['seq'])
+
+            await communicator.send_json_to({'type': 'resync'})
+            resync = await communicator.receive_json_from()
+            self.assertEqual(resync['type'], 'leaderboard_snapshot')
+            self.assertEqual(resync['seq'], patch['seq'])
+            self.assertEqual(resync['data'], await sync_to_async(self.expected)())
+            self.assertEqual(resync['data']['user_position'], 1)
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_falls_back_to_full_updates_without_a_shared_store(self):
+        # e.g. InMemoryLeaderboardStore behind the Redis channel layer: seqs would collide across workers
+        self.assertTrue(leaderboard.delta_protocol_supported(get_channel_layer()))
+        self.assertFalse(leaderboard.delta_protocol_supported(mock.Mock()))
+
+        async def run():
+            with mock.patch('auctions.consumers.delta_protocol_supported', return_value=False):
+                communicator = await self.connect()
+                message = await communicator.receive_json_from()
+            self.assertEqual(message['type'], 'leaderboard_update')
+            self.assertEqual(message['data']['user_position'], 1)
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+
+def redis_available():
+    try:
+        import redis
+        return redis.Redis.from_url(settings.LEADERBOARD_REDIS_URL, socket_connect_timeout=0.5).ping()
+    except Exception:
+        return False
+
+
+class LeaderboardStoreTestsMixin(AuctionFixtureMixin):
+    """Behaviour every leaderboard backend must share; subclasses provide make_store()"""
+
+    def setUp(self):
+        cache.clear()
+        seller = User.objects.create_user('seller', password='x')
+        self.auction, self.round = self.create_auction(seller)
+        self.round.max_pledge = None
+        self.round.save()
+        self.store = self.make_store()
+        self.now = timezone.now()
+
+    def place(self, username, amount, minutes_ago):
+        user, _ = User.objects.get_or_create(username=username)
+        bid = Bid.objects.create(user=user, auction=self.auction, round=self.round, pledge_amount=Decimal(amount))
+        Bid.objects.filter(id=bid.id).update(submitted_at=self.now - timedelta(minutes=minutes_ago))
+        bid.refresh_from_db()
+        return bid
+
+    def usernames(self, payload):
+        return [bid['user']['username'] for bid in payload['top_bids']]
+
+    def position(self, user_id):
+        """(position, pledge) - backends differ in the pledge's type"""
+        position, pledge = self.store.position_of(self.round.id, user_id)
+        return position, Decimal(pledge) if pledge is not None else None
+
+    def test_rank_and_count(self):
+        low = self.place('low', '150', 3)
+        self.place('high', '300', 2)
+        self.assertEqual(self.store.rebuild(self.round), 2)
+
+        payload = self.store.snapshot(self.round, low.user_id)
+        self.assertEqual(self.usernames(payload), ['high', 'low'])
+        self.assertEqual(payload['total_participants'], 2)
+        self.assertEqual(payload['highest_amount'], '300.00')
+        self.assertEqual(payload['user_position'], 2)
+        self.assertEqual(self.position(low.user_id), (2, Decimal('150.00')))
+
+    def test_upsert_replaces_the_users_entry(self):
+        self.place('high', '300', 2)
+        bid = self.place('climber', '150', 3)
+        self.store.rebuild(self.round)
+
+        bid.pledge_amount = Decimal('400')
+        bid.save()
+        self.store.record_bid(bid)
+
+        payload = self.store.snapshot(self.round)
+        self.assertEqual(self.usernames(payload), ['climber', 'high'])
+        self.assertEqual(payload['top_bids'][0]['pledge_amount'], '400.00')
+        self.assertEqual(payload['total_participants'], 2)
+        self.assertEqual(self.position(bid.user_id), (1, Decimal('400.00')))
+
+        bid.is_valid = False
+        bid.save()
+        self.store.record_bid(bid)
+        self.assertEqual(self.usernames(self.store.snapshot(self.round)), ['high'])
+        self.assertEqual(self.position(bid.user_id), (None, None))
+
+    def test_top_n_ordering(self):
+        for n in range(12):
+            self.place(f'bidder{n}', str(100 + n * 10), 30 - n)
+        self.store.rebuild(self.round)
+
+        payload = self.store.snapshot(self.round)
+        self.assertEqual(self.usernames(payload), [f'bidder{n}' for n in range(11, 1, -1)])
+        self.assertEqual([bid['position'] for bid in payload['top_bids']], list(range(1, 11)))
+        self.assertEqual(payload['total_participants'], 12)
+        self.assertEqual(self.position(User.objects.get(username='bidder0').id)[0], 12)
+
+    def test_ties_go_to_the_earlier_bid(self):
+        self.place('late', '300', 1)
+        self.place('early', '300', 5)
+        middle = self.place('middle', '300', 3)
+        self.store.rebuild(self.round)
+
+        payload = self.store.snapshot(self.round)
+        self.assertEqual(self.usernames(payload), ['early', 'middle', 'late'])
+        self.assertEqual(payload['tied_at_top_count'], 3)
+        self.assertEqual(self.position(middle.user_id)[0], 2)
+
+    def test_rolled_back_bid_never_reaches_the_store(self):
+        self.place('high', '300', 2)
+        self.store.rebuild(self.round)
+        loser = User.objects.create_user('loser', password='x')
+
+        with mock.patch.object(leaderboard, 'get_leaderboard_store', return_value=self.store):
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    Bid.objects.create(user=loser, auction=self.auction, round=self.round, pledge_amount=Decimal('500'))
+                    raise RuntimeError('payment failed')
+            self.assertEqual(self.usernames(self.store.snapshot(self.round)), ['high'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Bid.objects.create(user=loser, auction=self.auction, round=self.round, pledge_amount=Decimal('500'))
+        self.assertEqual(self.usernames(self.store.snapshot(self.round)), ['loser', 'high'])
+
+
+@override_settings(**LOCAL_BACKENDS)
+class InMemoryLeaderboardStoreTest(LeaderboardStoreTestsMixin, TestCase):
+
+    def make_store(self):
+        return InMemoryLeaderboardStore()
+
+
+@skipUnless(redis_available() or fakeredis, 'Neither Redis (LEADERBOARD_REDIS_URL) nor fakeredis is available')
+@override_settings(**LOCAL_BACKENDS)
+class RedisLeaderboardStoreTest(LeaderboardStoreTestsMixin, TestCase):
+    """Runs against Redis at LEADERBOARD_REDIS_URL when reachable, else fakeredis"""
+
+    def make_store(self):
+        key_prefix = f'test-leaderboard-{uuid.uuid4().hex}'
+        if redis_available():
+            store = RedisLeaderboardStore(key_prefix=key_prefix)
+        else:
+            server = fakeredis.FakeServer()
+            with mock.patch('redis.Redis.from_url', lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs)):
+                store = RedisLeaderboardStore(key_prefix=key_prefix)
+        self.addCleanup(lambda: [store.client.delete(key) for key in store.client.scan_iter(f'{store.key_prefix}:*')])
+        return store
+
+    def rebuild_while(self, concurrent_write):
+        """Rebuild the round, running concurrent_write between its DB read and its Redis write"""
+        real_iter_round_bids = leaderboard.iter_round_bids
+
+        def iter_then_write(round_obj, user_ids=None):
+            rows = list(real_iter_round_bids(round_obj, user_ids))
+            if user_ids is None:
+                concurrent_write()
+            return iter(rows)
+
+        with mock.patch.object(leaderboard, 'iter_round_bids', iter_then_write):
+            self.store.rebuild(self.round)
+
+    def test_rebuild_keeps_bids_recorded_during_it(self):
+        self.place('high', '300', 2)
+        self.store.rebuild(self.round)
+        self.store.evict_round(self.round.id)
+
+        self.rebuild_while(lambda: self.store.record_bid(self.place('late', '500', 1)))
+
+        payload = self.store.snapshot(self.round)
+        self.assertEqual(self.usernames(payload), ['late', 'high'])
+        self.assertEqual(payload['total_participants'], 2)
+
+    def test_rebuild_drops_bids_invalidated_during_it(self):
+        self.place('high', '300', 2)
+        cheat = self.place('cheat', '500', 3)
+
+        def invalidate():
+            Bid.objects.filter(id=cheat.id).update(is_valid=False)
+            cheat.is_valid = False
+            self.store.record_bid(cheat)
+
+        self.rebuild_while(invalidate)
+        self.assertEqual(self.usernames(self.store.snapshot(self.round)), ['high'])
+
+    def test_older_bid_does_not_replace_a_newer_entry(self):
+        stale = self.place('climber', '150', 5)
+        self.store.rebuild(self.round)
+
+        bid = Bid.objects.get(id=stale.id)
+        Bid.objects.filter(id=bid.id).update(pledge_amount=Decimal('400'), submitted_at=self.now)
+        bid.refresh_from_db()
+        self.store.record_bid(bid)
+
+        # e.g. a slower worker applying the earlier version afterwards
+        self.store.record_bid(stale)
+        self.assertEqual(self.position(bid.user_id), (1, Decimal('400.00')))
+
+    @override_settings(LEADERBOARD_REDIS_MAX_AGE=60)
+    def test_ready_marker_expires(self):
+        self.store.rebuild(self.round)
+        ttl = self.store.client.ttl(self.store._keys(self.round.id)[3])
+        self.assertTrue(0 < ttl <= 60)
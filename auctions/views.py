@@ -1,9 +1,11 @@
 from django.views.generic import TemplateView
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from . import homepage
+from .facets import BROWSE, facet_counts
 from .models import Auction, Category, ProductImage
+from .search import search_auctions
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
 from .models import Cart, Order
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
@@ -18,53 +20,11 @@ class HomeView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        now = timezone.now()
-
-        # Base queryset for active products
-        active_products = Auction.objects.filter(
-            status='active'
-        ).select_related('category', 'created_by')
 
-        # ========== HERO CAROUSEL - FEATURED PRODUCTS ==========
-        # Get featured products for hero carousel (ordered by display_order)
-        context['hero_slides'] = active_products.filter(
-            is_featured=True
-        ).order_by('display_order', '-created_at')[:5]  # Max 5 slides
-
-        # ========== FLASH SALES ==========
-        # Get flash sale products (ordered by display_order)
-        context['flash_sale_products'] = active_products.filter(
-            is_flash_sale=True,
-            flash_sale_ends_at__gte=now  # Only active flash sales
-        ).order_by('display_order', '-created_at')[:8]
-
-        # Buy Now Products (no time restrictions, just active)
-        context['buy_now_products'] = active_products.filter(
-            product_type='buy_now'
-        ).order_by('-created_at')[:8]
-
-        # Auction Products (time-restricted)
-        context['auction_products'] = active_products.filter(
-            product_type='auction',
-            start_time__lte=now,
-            end_time__gte=now
-        ).order_by('end_time')[:8]  # Order by ending soonest
-
-        # Both Options Products (time-restricted for auction component)
-        context['both_products'] = active_products.filter(
-            product_type='both',
-            start_time__lte=now,
-            end_time__gte=now
-        ).order_by('-created_at')[:8]
-
-        # Featured auctions for fallback (original logic)
-        context['featured_auctions'] = active_products.filter(
-            start_time__lte=now,
-            end_time__gte=now
-        ).order_by('-created_at')[:12]
-
-        # Get categories
-        context['categories'] = Category.objects.filter(is_active=True)[:8]
+        # Hero slides, flash sales, buy-now / auction / both products,
+        # featured auctions and categories: precomputed and cached per
+        # section, see auctions/homepage.py
+        context.update(homepage.get_feed())
 
         return context
 
@@ -111,40 +71,31 @@ class BrowseAuctionsView(TemplateView):
         if category_id:
             auctions = auctions.filter(category_id=category_id)
 
-        # Search
+        # Search (full-text, best matches first; see auctions/search.py)
         search_query = self.request.GET.get('search')
         if search_query:
-            auctions = auctions.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query)
-            )
+            context['auctions'] = search_auctions(auctions, search_query, ranked=True)
+        else:
+            context['auctions'] = auctions.order_by('-created_at')
 
-        context['auctions'] = auctions.order_by('-created_at')
         context['categories'] = Category.objects.filter(is_active=True)
 
         # NEW - Add these context variables for the filter tabs
         context['current_product_type'] = product_type or ''
         context['search_query'] = search_query or ''
 
-        # NEW - Add product counts for badges
-        context['buy_now_count'] = Auction.objects.filter(
-            status='active',
-            product_type='buy_now'
-        ).count()
-
-        context['auction_count'] = Auction.objects.filter(
-            status='active',
-            product_type='auction',
-            start_time__lte=now,
-            end_time__gte=now
-        ).count()
-
-        context['both_count'] = Auction.objects.filter(
-            status='active',
-            product_type='both',
-            start_time__lte=now,
-            end_time__gte=now
-        ).count()
+        # Tab badges and filter counts, one grouped query (see auctions/facets.py)
+        facets = facet_counts(
+            product_type=product_type,
+            category=category_id,
+            status=self.request.GET.get('status'),
+            search=search_query,
+            mode=BROWSE
+        )
+        context['facets'] = facets
+        context['buy_now_count'] = facets['product_type']['buy_now']
+        context['auction_count'] = facets['product_type']['auction']
+        context['both_count'] = facets['product_type']['both']
 
         return context
 
@@ -211,13 +162,12 @@ class CategoryView(TemplateView):
         # Search within category
         search_query = self.request.GET.get('search')
         if search_query:
-            auctions = auctions.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query)
-            )
+            auctions = search_auctions(auctions, search_query, ranked=True)
+        else:
+            auctions = auctions.order_by('-created_at')
 
         context['category'] = category
-        context['auctions'] = auctions.order_by('-created_at')
+        context['auctions'] = auctions
         context['all_categories'] = Category.objects.filter(is_active=True)
 
         return context
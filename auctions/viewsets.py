@@ -1,13 +1,24 @@
+import json
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, IsAdminUser
 from django.db.models import Q, Max, Count, Sum, Sum
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from .models import Auction, Category, Bid, Round, Participation, HeroBanner, SpecialOfferBanner
+from . import dashboard_stats, homepage
+from .facets import facet_counts
+from .leaderboard import get_leaderboard_store, evict_round
+from .bidding import place_bid, BidRejected
+from .round_cache import invalidate_active_round
+from .standings import ranked_standings, build_standings, iter_standings
+from .pagination import CreatedAtCursorPagination, RelevancePagination, SubmittedAtCursorPagination
+from .search import autocomplete, search_auctions
 from accounts.models import User
 from .serializers import (
     AuctionListSerializer, AuctionDetailSerializer, AuctionCreateSerializer,
@@ -24,6 +35,7 @@ class AuctionViewSet(viewsets.ModelViewSet):
     """
     queryset = Auction.objects.all().select_related('category', 'created_by')
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = CreatedAtCursorPagination
     lookup_field = 'id'
 
     def get_serializer_class(self):
@@ -52,15 +64,54 @@ class AuctionViewSet(viewsets.ModelViewSet):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         
-        # Search
+        # Search (full-text on PostgreSQL, see auctions/search.py);
+        # ?ordering=relevance ranks the matches instead of newest first
         search = self.request.query_params.get('search', None)
+        ranked = self.is_ranked_search()
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search)
-            )
+            queryset = search_auctions(queryset, search, ranked=ranked)
+
+        if self.action == 'list':
+            # Participant count / highest pledge as annotations (no per-row queries)
+            queryset = AuctionListSerializer.setup_eager_loading(queryset)
+        elif self.action == 'retrieve':
+            queryset = AuctionDetailSerializer.setup_eager_loading(queryset)
         
-        return queryset.order_by('-created_at')
+        return queryset if ranked else queryset.order_by('-created_at')
+
+    def is_ranked_search(self):
+        params = self.request.query_params
+        return bool(params.get('search')) and params.get('ordering') == 'relevance'
+
+    @property
+    def paginator(self):
+        """Ranked search results can't use the created_at cursor"""
+        if not hasattr(self, '_paginator') and self.is_ranked_search():
+            self._paginator = RelevancePagination()
+        return super().paginator
+
+    def list(self, request, *args, **kwargs):
+        """
+        ?facets=1 adds product_type / category / status counts for the
+        current filters (see auctions/facets.py). A paginated response gets
+        a 'facets' key; an unpaginated one becomes {'results', 'facets'}.
+        """
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('facets') not in ('1', 'true'):
+            return response
+
+        params = request.query_params
+        facets = facet_counts(
+            product_type=params.get('product_type') or None,
+            category=params.get('category') or None,
+            status=params.get('status') or None,
+            search=params.get('search') or None
+        )
+        if isinstance(response.data, dict):
+            response.data['facets'] = facets
+        else:
+            response.data = {'results': response.data, 'facets': facets}
+        return response
 
     def perform_update(self, serializer):
         """Handle music removal when remove_music flag is set"""
@@ -77,6 +128,14 @@ class AuctionViewSet(viewsets.ModelViewSet):
             # Normal update - let serializer handle it
             serializer.save()
 
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        GET /api/auctions/autocomplete/?q=iph
+        Search box typeahead: ids/titles/slugs only, cached per prefix
+        """
+        return Response(autocomplete(request.query_params.get('q', '')))
+
     @action(detail=True, methods=['get'])
     def leaderboard(self, request, id=None):
         """Get top bids for an auction"""
@@ -90,19 +149,22 @@ class AuctionViewSet(viewsets.ModelViewSet):
                 'highest_amount': 0
             })
 
-        top_bids = current_round.bids.filter(
-            is_valid=True
-        ).select_related('user').order_by(
-            '-pledge_amount',
-            'submitted_at'
-        )[:10]
+        # Ranking and counts come from the leaderboard store; only the
+        # top-10 rows are loaded for serialization
+        snapshot = get_leaderboard_store().snapshot(current_round)
+        top_ids = [entry['id'] for entry in snapshot['top_bids']]
+        bids_by_id = {
+            str(bid.id): bid
+            for bid in Bid.objects.filter(id__in=top_ids).select_related('user', 'auction', 'round')
+        }
+        top_bids = [bids_by_id[bid_id] for bid_id in top_ids if bid_id in bids_by_id]
 
         serialized_bids = BidSerializer(top_bids, many=True).data
         
         return Response({
             'top_bids': serialized_bids,
-            'total_participants': current_round.bids.filter(is_valid=True).count(),
-            'highest_amount': top_bids.first().pledge_amount if top_bids else 0
+            'total_participants': snapshot['total_participants'],
+            'highest_amount': top_bids[0].pledge_amount if top_bids else 0
         })
 
     @action(detail=True, methods=['get'])
@@ -487,8 +549,8 @@ class AuctionViewSet(viewsets.ModelViewSet):
             )
 
         # Get all rounds for this auction
-        rounds = auction.rounds.all().order_by('round_number')
-        total_rounds = rounds.count()
+        round_numbers = list(auction.rounds.order_by('round_number').values_list('round_number', flat=True))
+        total_rounds = len(round_numbers)
 
         if total_rounds == 0:
             return Response({
@@ -497,74 +559,49 @@ class AuctionViewSet(viewsets.ModelViewSet):
                 'participants': []
             })
 
-        # Get all users who participated in at least one round
-        from django.db.models import Q
-        participant_users = User.objects.filter(
-            Q(bids__auction=auction, bids__is_valid=True) |
-            Q(participations__auction=auction, participations__payment_status='completed')
-        ).distinct()
-
-        # Calculate average for each user
-        user_calculations = []
-
-        for user in participant_users:
-            round_details = []
-            total_pledge = Decimal('0.00')
-            rounds_participated = 0
-
-            for round_obj in rounds:
-                # Get user's latest valid bid for this round
-                bid = Bid.objects.filter(
-                    user=user,
-                    round=round_obj,
-                    is_valid=True
-                ).order_by('-submitted_at').first()
-
-                if bid:
-                    pledge_amount = bid.pledge_amount
-                    total_pledge += pledge_amount
-                    rounds_participated += 1
-                    participated = True
-                else:
-                    pledge_amount = Decimal('0.00')
-                    participated = False
-
-                round_details.append({
-                    'round_number': round_obj.round_number,
-                    'pledge_amount': str(pledge_amount),
-                    'participated': participated
-                })
-
-            # Calculate average: total_pledge / total_rounds (not rounds_participated!)
-            average_pledge = total_pledge / total_rounds if total_rounds > 0 else Decimal('0.00')
-
-            user_calculations.append({
-                'user': {
-                    'id': str(user.id),
-                    'username': user.username,
-                    'full_name': f"{user.first_name} {user.last_name}".strip(),
-                    'email': user.email,
-                    'phone_number': getattr(user, 'phone_number', None),
-                },
-                'total_pledge': str(total_pledge),
-                'rounds_participated': rounds_participated,
+        auction_info = {
+            'id': str(auction.id),
+            'title': auction.title,
+            'status': auction.status
+        }
+
+        # Materialised standings (latest valid bid per user/round), ranked by
+        # total pledge = same order as average over all rounds - see auctions/standings.py
+        ranked = ranked_standings(auction)
+
+        # Streaming mode for very large auctions: one JSON object per line
+        if request.query_params.get('stream') == 'ndjson':
+            def rows():
+                yield json.dumps({'auction': auction_info, 'total_rounds': total_rounds}) + '\n'
+                for standing in iter_standings(auction, round_numbers):
+                    yield json.dumps(standing) + '\n'
+
+            return StreamingHttpResponse(rows(), content_type='application/x-ndjson')
+
+        # Paginated mode (?page=N) - numbered pages over the ranking, not the
+        # viewset's created_at cursor
+        if 'page' in request.query_params:
+            paginator = PageNumberPagination()
+            page = paginator.paginate_queryset(ranked, request, view=self)
+            user_calculations = build_standings(page, round_numbers)
+            winner_rows = build_standings(ranked[:1], round_numbers)
+            return Response({
+                'auction': auction_info,
                 'total_rounds': total_rounds,
-                'average_pledge': str(average_pledge),
-                'round_details': round_details
+                'total_participants': paginator.page.paginator.count,
+                'winner': winner_rows[0] if winner_rows else None,
+                'all_participants': user_calculations,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
             })
 
-        # Sort by average pledge (descending)
-        user_calculations.sort(key=lambda x: Decimal(x['average_pledge']), reverse=True)
+        user_calculations = build_standings(ranked, round_numbers)
 
         # Determine winner
         winner = user_calculations[0] if user_calculations else None
 
         return Response({
-            'auction': {
-                'id': str(auction.id),
-                'title': auction.title,
-                'status': auction.status
-            },
+            'auction': auction_info,
             'total_rounds': total_rounds,
             'total_participants': len(user_calculations),
             'winner': winner,
@@ -580,9 +617,10 @@ class CategoryViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
 
+        # stats: maintained auction_count (see auctions/counters.py)
         if self.request.user.is_authenticated and self.request.user.is_superuser:
-            return Category.objects.all().order_by('name')
-        return Category.objects.filter(is_active=True).order_by('name')
+            return Category.objects.all().select_related('stats').order_by('name')
+        return Category.objects.filter(is_active=True).select_related('stats').order_by('name')
 
         # ✅ Add this method here
 
@@ -683,6 +721,7 @@ class BidViewSet(viewsets.ModelViewSet):
     """
     serializer_class = BidSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SubmittedAtCursorPagination
     lookup_field = 'id'
 
     def get_queryset(self):
@@ -693,7 +732,7 @@ class BidViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         """
-        Create a new bid with payment verification + INSTANT WebSocket broadcast
+        Create or update the user's bid with payment verification + WebSocket broadcast after commit
         """
         auction_id = request.data.get('auction')
         pledge_amount = request.data.get('pledge_amount')
@@ -705,102 +744,19 @@ class BidViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            # Get auction
-            auction = Auction.objects.get(id=auction_id)
-
-            # Check if auction is active
-            if auction.status != 'active':
-                return Response(
-                    {'error': 'Auction is not active'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Get current round
-            current_round = auction.get_current_round()
-            if not current_round:
-                return Response(
-                    {'error': 'No active round for this auction'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # CRITICAL: Check if user has paid participation fee
-            participation = Participation.objects.filter(
-                user=request.user,
-                auction=auction,
-                round=current_round,
-                payment_status='completed'
-            ).first()
-
-            if not participation:
-                return Response(
-                    {'error': 'You must pay the participation fee first'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-
-            # Validate pledge amount
-            pledge_amount = float(pledge_amount)
-            if pledge_amount < current_round.min_pledge:
-                return Response(
-                    {'error': f'Minimum pledge is {current_round.min_pledge}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-
-            # Enforce maximum pledge
-            if pledge_amount > current_round.max_pledge:
-                return Response(
-                    {'error': f'Maximum pledge is {current_round.max_pledge}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            # Check if user already has a bid
-            existing_bid = Bid.objects.filter(
-                user=request.user,
-                round=current_round,
-                is_valid=True
-            ).first()
-
-            if existing_bid:
-                # Update existing bid
-                existing_bid.pledge_amount = pledge_amount
-                existing_bid.submitted_at = timezone.now()
-                existing_bid.save()
-                bid = existing_bid
-                message = 'Bid updated successfully'
-            else:
-                # Create new bid
-                bid = Bid.objects.create(
-                    user=request.user,
-                    auction=auction,
-                    round=current_round,
-                    pledge_amount=pledge_amount,
-                    is_valid=True
-                )
-                message = 'Bid placed successfully'
-
-            # 🚀 INSTANT WEBSOCKET BROADCAST
-            channel_layer = get_channel_layer()
-
-            # Get fresh leaderboard data (now includes position and is_current_user)
-            leaderboard_data = self._get_leaderboard_data(auction, current_round, request.user.id)
-
-            # Broadcast to all connected clients
-            async_to_sync(channel_layer.group_send)(
-                f'auction_{auction_id}',
-                {
-                    'type': 'leaderboard_update',
-                    'data': leaderboard_data
-                }
-            )
+            # Validates round, participation and pledge window, then upserts
+            # the user's bid in one statement (see auctions/bidding.py)
+            bid, created = place_bid(request.user, auction_id, pledge_amount)
 
             return Response({
-                'message': message,
+                'message': 'Bid placed successfully' if created else 'Bid updated successfully',
                 'bid': BidSerializer(bid).data
             }, status=status.HTTP_201_CREATED)
 
-        except Auction.DoesNotExist:
+        except BidRejected as e:
             return Response(
-                {'error': 'Auction not found'},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': e.message},
+                status=e.status_code
             )
         except Exception as e:
             return Response(
@@ -808,75 +764,6 @@ class BidViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def _get_leaderboard_data(self, auction, current_round, current_user_id=None):
-        """
-        Helper method to get leaderboard data for WebSocket broadcast
-        ✅ NOW INCLUDES: position, is_current_user fields
-        """
-        # Get all valid bids, ordered by amount and time
-        all_bids = current_round.bids.filter(
-            is_valid=True
-        ).select_related('user').order_by(
-            '-pledge_amount',
-            'submitted_at'
-        )
-
-        # Get top bids
-        top_bids = all_bids[:10]  # Only top 10 for display
-        serialized_bids = []
-
-        for index, bid in enumerate(top_bids, start=1):
-            serialized_bids.append({
-                'id': str(bid.id),
-                'position': index,  # ✅ ADDED
-                'is_current_user': str(bid.user.id) == str(current_user_id) if current_user_id else False,  # ✅ ADDED
-                'user': {
-                    'id': str(bid.user.id),
-                    'username': bid.user.username,
-                    'first_name': bid.user.first_name or bid.user.username,
-                },
-                'pledge_amount': str(bid.pledge_amount),
-                'submitted_at': bid.submitted_at.isoformat(),
-            })
-
-        highest_bid = top_bids.first() if top_bids else None
-        highest_amount = highest_bid.pledge_amount if highest_bid else 0
-
-        tied_at_top = all_bids.filter(
-            pledge_amount=highest_amount
-        ).count() if highest_amount > 0 else 0
-
-        # Check if current user is in top 10
-        user_in_top_10 = False
-        user_position = None
-        user_bid = None
-        
-        if current_user_id:
-            user_bid_obj = all_bids.filter(user_id=current_user_id).first()
-            if user_bid_obj:
-                # Find user's position in all bids
-                all_bid_ids = list(all_bids.values_list('id', flat=True))
-                user_position = all_bid_ids.index(user_bid_obj.id) + 1
-                user_in_top_10 = user_position <= 10
-                
-                if not user_in_top_10:
-                    user_bid = {
-                        'pledge_amount': str(user_bid_obj.pledge_amount),
-                        'position': user_position
-                    }
-
-        return {
-            'top_bids': serialized_bids,
-            'total_participants': all_bids.count(),
-            'highest_amount': str(highest_amount),
-            'tied_at_top_count': tied_at_top,
-            'round_number': current_round.round_number,
-            'round_base_price': str(current_round.base_price),
-            'user_position': user_position,  # ✅ ADDED
-            'user_bid': user_bid,  # ✅ ADDED
-            'user_in_top_10': user_in_top_10,  # ✅ ADDED
-        }
-
 
 class ParticipationViewSet(viewsets.ModelViewSet):
     """
@@ -968,6 +855,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
     
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         """Users can only see their own payments"""
@@ -1138,6 +1026,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     ViewSet for order management (Admin + User)
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
     lookup_field = 'id'
 
     def get_queryset(self):
@@ -1258,22 +1147,17 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        from decimal import Decimal
-        from .models import Order
-        
-        all_orders = Order.objects.all()
-        
+        order_stats = dashboard_stats.order_stats()
+
         stats = {
-            'total_orders': all_orders.count(),
-            'pending': all_orders.filter(status='pending').count(),
-            'paid': all_orders.filter(status='paid').count(),
-            'processing': all_orders.filter(status='processing').count(),
-            'shipped': all_orders.filter(status='shipped').count(),
-            'delivered': all_orders.filter(status='delivered').count(),
-            'cancelled': all_orders.filter(status='cancelled').count(),
-            'total_revenue': str(all_orders.filter(
-                status__in=['paid', 'processing', 'shipped', 'delivered']
-            ).aggregate(total=models.Sum('total_amount'))['total'] or Decimal('0.00'))
+            'total_orders': order_stats['total'],
+            'pending': order_stats['pending'],
+            'paid': order_stats['paid'],
+            'processing': order_stats['processing'],
+            'shipped': order_stats['shipped'],
+            'delivered': order_stats['delivered'],
+            'cancelled': order_stats['cancelled'],
+            'total_revenue': str(order_stats['revenue'])
         }
         
         return Response(stats)
@@ -1469,36 +1353,11 @@ class RoundViewSet(viewsets.ModelViewSet):
         round_obj.save()
 
         # Calculate winner based on AVERAGE across ALL rounds
-        # CRITICAL: Average is sum of all bids divided by TOTAL NUMBER OF ROUNDS (not just participated rounds)
-        from django.db.models import Sum
-
-        # Get total number of rounds for this auction
+        # CRITICAL: Average is sum of each round's latest pledge divided by TOTAL NUMBER OF ROUNDS
+        # (not just participated rounds) - read from the materialised standings
         total_rounds = auction.rounds.count()
 
-        # Get all users who have placed bids
-        user_bids = Bid.objects.filter(
-            auction=auction,
-            is_valid=True
-        ).values('user').annotate(
-            total_pledge=Sum('pledge_amount'),
-            bid_count=Count('id')
-        )
-
-        # Calculate average for each user across ALL rounds (including rounds they didn't bid in)
-        user_averages = []
-        for user_data in user_bids:
-            total_pledge = float(user_data['total_pledge'])
-            # Divide by total number of rounds, not just participated rounds
-            average_pledge = total_pledge / total_rounds
-            user_averages.append({
-                'user_id': user_data['user'],
-                'average_pledge': average_pledge,
-                'total_pledge': total_pledge,
-                'bid_count': user_data['bid_count']
-            })
-
-        # Sort by average pledge (highest first)
-        user_averages.sort(key=lambda x: x['average_pledge'], reverse=True)
+        leader = ranked_standings(auction).filter(rounds_participated__gt=0).first()
 
         response_data = {
             'message': f'Round {round_obj.round_number} closed successfully',
@@ -1510,19 +1369,20 @@ class RoundViewSet(viewsets.ModelViewSet):
         }
 
         # Determine winner if there are bids
-        if user_averages:
-            winner_data = user_averages[0]
-            winner_user = User.objects.get(id=winner_data['user_id'])
+        if leader:
+            winner_user = leader.user
+            total_pledge = float(leader.total_pledge)
+            average_pledge = total_pledge / total_rounds
 
             response_data['winner'] = {
                 'username': winner_user.username,
                 'email': winner_user.email,
-                'average_pledge': winner_data['average_pledge'],
-                'total_pledge': winner_data['total_pledge'],
-                'total_bids': winner_data['bid_count'],
+                'average_pledge': average_pledge,
+                'total_pledge': total_pledge,
+                'total_bids': leader.rounds_participated,
                 'total_rounds': total_rounds
             }
-            response_data['message'] = f'Round {round_obj.round_number} closed! Current leader: {winner_user.username} with average bid of KSh {winner_data["average_pledge"]:.2f} (Total: KSh {winner_data["total_pledge"]:.2f} across {total_rounds} rounds, participated in {winner_data["bid_count"]} bids)'
+            response_data['message'] = f'Round {round_obj.round_number} closed! Current leader: {winner_user.username} with average bid of KSh {average_pledge:.2f} (Total: KSh {total_pledge:.2f} across {total_rounds} rounds, participated in {leader.rounds_participated} bids)'
         else:
             response_data['winner'] = None
             response_data['message'] = f'Round {round_obj.round_number} closed with no bids'
@@ -1610,7 +1470,13 @@ class RoundViewSet(viewsets.ModelViewSet):
             new_round = serializer.save()
             
             # Auto-close previous active rounds
-            auction.rounds.filter(is_active=True).exclude(id=new_round.id).update(is_active=False)
+            closed_round_ids = list(
+                auction.rounds.filter(is_active=True).exclude(id=new_round.id).values_list('id', flat=True)
+            )
+            auction.rounds.filter(id__in=closed_round_ids).update(is_active=False)
+            for round_id in closed_round_ids:
+                evict_round(round_id)
+            invalidate_active_round(auction.id)
             
             # Broadcast new round via WebSocket
             from channels.layers import get_channel_layer
@@ -1666,6 +1532,20 @@ class HeroBannerViewSet(viewsets.ModelViewSet):
             return HeroBanner.objects.all().order_by('order', 'created_at')
         return HeroBanner.objects.filter(is_active=True).order_by('order', 'created_at')
 
+    def list(self, request, *args, **kwargs):
+        """
+        Public carousel comes from the cached homepage feed (auctions/homepage.py),
+        paginated like the superuser listing so both get the same response shape
+        """
+        if request.user and request.user.is_superuser:
+            return super().list(request, *args, **kwargs)
+
+        banners = homepage.get_section('hero_banners')
+        page = self.paginate_queryset(banners)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(banners, many=True).data)
+
 
 class SpecialOfferBannerViewSet(viewsets.ModelViewSet):
     """
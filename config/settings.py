@@ -273,6 +273,26 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 100,
 }
 
+# =======================
+# Cache
+# =======================
+# Shared by all workers through the same Redis as channels / leaderboards
+# (its own database). For local dev / tests without Redis set
+# CACHE_BACKEND=django.core.cache.backends.locmem.LocMemCache (per process).
+# Cache-aside helpers: auctions/caching.py
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.redis.RedisCache')
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='redis://127.0.0.1:6379/2')
+CACHE_DEFAULT_TIMEOUT = config('CACHE_DEFAULT_TIMEOUT', default=300, cast=int)
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_REDIS_URL if CACHE_BACKEND.endswith('RedisCache') else 'bidsoko',
+        'TIMEOUT': CACHE_DEFAULT_TIMEOUT,
+        'KEY_PREFIX': 'bidsoko',
+    }
+}
+
 # =======================
 # Django Channels & WebSocket Configuration
 # =======================
@@ -286,6 +306,54 @@ CHANNEL_LAYERS = {
         },
     },
 }
+
+# =======================
+# Leaderboard Store
+# =======================
+# RedisLeaderboardStore shares round leaderboards across all Daphne/uvicorn
+# workers; InMemoryLeaderboardStore keeps them per process (dev/tests)
+LEADERBOARD_BACKEND = config('LEADERBOARD_BACKEND', default='auctions.leaderboard.RedisLeaderboardStore')
+LEADERBOARD_REDIS_URL = config('LEADERBOARD_REDIS_URL', default='redis://127.0.0.1:6379/1')
+
+# Seconds a Redis round leaderboard is trusted before it is reloaded from the
+# Bid table (picks up bulk updates that bypass the store)
+LEADERBOARD_REDIS_MAX_AGE = config('LEADERBOARD_REDIS_MAX_AGE', default=300, cast=int)
+
+# Seconds before a worker rebuilds its in-memory round leaderboard from the DB
+# (bids accepted by other worker processes are picked up on rebuild)
+LEADERBOARD_MAX_AGE = config('LEADERBOARD_MAX_AGE', default=30, cast=int)
+
+# Bid bursts are coalesced into at most one leaderboard broadcast per auction
+# per this many seconds in each worker process (0 = broadcast every bid immediately)
+LEADERBOARD_BROADCAST_INTERVAL = config('LEADERBOARD_BROADCAST_INTERVAL', default=0.15, cast=float)
+
+# Seconds between INFO log lines with each worker's broadcast sent/suppressed counts
+LEADERBOARD_BROADCAST_STATS_INTERVAL = config('LEADERBOARD_BROADCAST_STATS_INTERVAL', default=60, cast=int)
+
+# Outbox that runs leaderboard broadcasts after the bid commits, off the
+# request thread (InlineBroadcastQueue runs them in-line, for tests)
+LEADERBOARD_BROADCAST_QUEUE = config('LEADERBOARD_BROADCAST_QUEUE', default='auctions.broadcast.ThreadedBroadcastQueue')
+
+# Seconds an auction's active round / a user's paid entitlement stay cached
+# (both are also invalidated on save, see auctions/round_cache.py)
+ACTIVE_ROUND_CACHE_TIMEOUT = config('ACTIVE_ROUND_CACHE_TIMEOUT', default=300, cast=int)
+ENTITLEMENT_CACHE_TIMEOUT = config('ENTITLEMENT_CACHE_TIMEOUT', default=300, cast=int)
+
+# Upper bound in seconds on how long a homepage feed section stays cached
+# (sections are also rebuilt on writes and when a sale/auction window ends,
+# see auctions/homepage.py)
+HOMEPAGE_FEED_TIMEOUT = config('HOMEPAGE_FEED_TIMEOUT', default=300, cast=int)
+
+# Seconds a search box typeahead result stays cached per typed prefix
+AUTOCOMPLETE_CACHE_TIMEOUT = config('AUTOCOMPLETE_CACHE_TIMEOUT', default=30, cast=int)
+
+# Seconds browse facet counts stay cached per filter combination (auction writes drop them sooner)
+FACETS_CACHE_TIMEOUT = config('FACETS_CACHE_TIMEOUT', default=60, cast=int)
+
+# Seconds admin dashboard status breakdowns stay cached (order, user, auction,
+# payment and participation writes drop them sooner, see auctions/dashboard_stats.py)
+DASHBOARD_STATS_CACHE_TIMEOUT = config('DASHBOARD_STATS_CACHE_TIMEOUT', default=60, cast=int)
+
 # =======================
 # Logging Configuration
 # =======================
@@ -1,5 +1,33 @@
 import { useState, useEffect, useRef } from 'react';
 
+// Apply a leaderboard_patch (see auctions/leaderboard.py build_leaderboard_patch)
+const applyLeaderboardPatch = (data, patch) => {
+  const bids = new Map(data.top_bids.map((bid) => [bid.user.id, bid]));
+
+  patch.ops.forEach((op) => {
+    if (op.op === 'remove') {
+      bids.delete(op.user_id);
+    } else if (op.op === 'add') {
+      bids.set(op.bid.user.id, op.bid);
+    } else if (op.op === 'update' && bids.has(op.user_id)) {
+      bids.set(op.user_id, {
+        ...bids.get(op.user_id),
+        id: op.id,
+        pledge_amount: op.pledge_amount,
+        submitted_at: op.submitted_at,
+      });
+    } else if (op.op === 'move' && bids.has(op.user_id)) {
+      bids.set(op.user_id, { ...bids.get(op.user_id), position: op.position });
+    }
+  });
+
+  return {
+    ...data,
+    ...patch.fields,
+    top_bids: [...bids.values()].sort((a, b) => a.position - b.position),
+  };
+};
+
 export const useWebSocket = (auctionId, onLeaderboardUpdate, onBidPlaced, onRoundUpdate) => {
   const [isConnected, setIsConnected] = useState(false);
   const ws = useRef(null);
@@ -18,7 +46,11 @@ export const useWebSocket = (auctionId, onLeaderboardUpdate, onBidPlaced, onRoun
     // Use dynamic host based on current location
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     const host = window.location.host;
-    const wsUrl = `${protocol}//${host}/ws/auction/${auctionId}/`;
+    const wsUrl = `${protocol}//${host}/ws/auction/${auctionId}/?protocol=delta`;
+
+    // Delta protocol state: last applied seq + reconstructed leaderboard
+    let board = { seq: null, data: null };
+    let resyncPending = false;
 
     const socket = new WebSocket(wsUrl);
 
@@ -40,7 +72,24 @@ export const useWebSocket = (auctionId, onLeaderboardUpdate, onBidPlaced, onRoun
         const message = JSON.parse(event.data);
         console.log('📨 WebSocket message type:', message.type);
 
-        if (message.type === 'leaderboard_update') {
+        if (message.type === 'leaderboard_snapshot') {
+          board = { seq: message.seq, data: message.data };
+          resyncPending = false;
+          callbacksRef.current.onLeaderboardUpdate?.(message.data);
+        } else if (message.type === 'leaderboard_patch') {
+          if (board.data === null || message.base_seq !== board.seq) {
+            // Missed an update - ask for a fresh snapshot (once)
+            if (!resyncPending) {
+              console.log('🔄 Leaderboard gap detected, resyncing');
+              resyncPending = true;
+              board = { seq: null, data: null };
+              socket.send(JSON.stringify({ type: 'resync' }));
+            }
+            return;
+          }
+          board = { seq: message.seq, data: applyLeaderboardPatch(board.data, message) };
+          callbacksRef.current.onLeaderboardUpdate?.(board.data);
+        } else if (message.type === 'leaderboard_update') {
           callbacksRef.current.onLeaderboardUpdate?.(message.data);
         } else if (message.type === 'bid_placed') {
           callbacksRef.current.onBidPlaced?.(message.data);
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0020_cursor_pagination_indexes'),
+        ('payments', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mpesatransaction',
+            index=models.Index(fields=['-created_at', '-id'], name='payments_mp_created_073a31_idx'),
+        ),
+    ]
@@ -1,9 +1,9 @@
 from django.db import models
 from django.conf import settings
-from auctions.models import Order
+from auctions.models import LoadedValuesMixin, Order
 
 
-class MpesaTransaction(models.Model):
+class MpesaTransaction(LoadedValuesMixin, models.Model):
     """Track M-Pesa payment transactions"""
 
     STATUS_CHOICES = [
@@ -47,6 +47,8 @@ class MpesaTransaction(models.Model):
             models.Index(fields=['checkout_request_id']),
             models.Index(fields=['mpesa_receipt_number']),
             models.Index(fields=['status']),
+            # Keyset pagination of the transaction list (auctions/financial_views.py)
+            models.Index(fields=['-created_at', '-id']),
         ]
 
     def __str__(self):